@@ -1,15 +1,55 @@
 from importlib import metadata
 
+from . import _pickling  # noqa: F401  # enables pickle_support option of register
+from ._async import AsyncSerializer, dump_file_async, load_file_async
+from ._cache import MigrationCache
 from ._class_register import (
     REGISTER,
     MigrationInfo,
+    MigrationOperation,
     MigrationRegistration,
     class_to_str,
+    convert_value,
+    drop_key,
+    nest_keys,
     register_class,
     rename_key,
+    set_default,
+    unnest_key,
     update_argument,
 )
-from ._serialize_hooks import Encoder, check_for_errors_in_dkt_values, object_encoder, object_hook
+from ._columnar import ColumnarList
+from ._container import ContainerReader, ContainerWriter, dump_container, load_container
+from ._delta import DeltaWriter, load_delta
+from ._hooks import BoundHooks, make_hooks
+from ._io import dump_file, load_file
+from ._projection import project
+from ._records import (
+    RecordReader,
+    RecordWriter,
+    dump_records,
+    dump_sharded_records,
+    load_records,
+    load_sharded_records,
+)
+from ._serialize_hooks import (
+    ClassCollector,
+    DecodeContext,
+    DecodeError,
+    Encoder,
+    Interner,
+    ReferenceResolver,
+    ReferenceTracker,
+    cbor_decoder,
+    cbor_encoder,
+    check_for_errors_in_dkt_values,
+    object_encoder,  # noqa: F401  # documented explicitly in docs/api.rst
+    object_hook,
+    schema_object_encoder,
+)
+from ._shared import SharedBlock, SharedView
+from ._store import MigratingStore
+from ._stream import CanonicalEncoder, StreamingEncoder, content_hash, dump_stream, dumps_canonical
 from .version import version as __version__
 
 try:
@@ -27,40 +67,6 @@ else:  # pragma: no cover
 del metadata
 
 
-def cbor_encoder(encoder, value):
-    """
-    Cbor encoder hook. Use :py:func:`nme_object_encoder` to encode objects.
-
-    :param encoder: cbor2.Encoder
-    :param value: object to be encoded
-
-    Examples::
-
-        with open(path_to_file, "wb") as f_p:
-            cbor2.dump(data, f_p, default=nme_cbor_encoder)
-    """
-    res = object_encoder(value)
-    if res is None:
-        raise TypeError(f"Cannot encode {value} of class {type(value)}")
-    return encoder.encode(res)
-
-
-def cbor_decoder(decoder, value):  # noqa: ARG001
-    """
-    Cbor decoder hook. Use :py:func:`nme_object_hook` to decode objects.
-
-    :param decoder: cbor2.Decoder
-    :param value: object to be decoded
-
-    Examples::
-
-        with open(path_to_file, "rb") as f_p:
-            data = cbor2.load(f_p, object_hook=nme_cbor_decoder)
-
-    """
-    return object_hook(value)
-
-
 nme_object_hook = object_hook
 NMEEncoder = Encoder
 nme_cbor_encoder = cbor_encoder
@@ -74,9 +80,19 @@ __all__ = (
     "object_hook",
     "nme_object_hook",
     "rename_key",
+    "drop_key",
+    "set_default",
+    "convert_value",
+    "nest_keys",
+    "unnest_key",
+    "MigrationOperation",
     "MigrationInfo",
     "MigrationRegistration",
+    "MigratingStore",
+    "MigrationCache",
     "Encoder",
+    "ReferenceResolver",
+    "ReferenceTracker",
     "NMEEncoder",
     "REGISTER",
     "update_argument",
@@ -84,5 +100,38 @@ __all__ = (
     "cbor_decoder",
     "nme_cbor_encoder",
     "nme_cbor_decoder",
+    "load_file",
+    "dump_file",
+    "AsyncSerializer",
+    "load_file_async",
+    "dump_file_async",
+    "StreamingEncoder",
+    "dump_stream",
+    "ContainerReader",
+    "ContainerWriter",
+    "dump_container",
+    "load_container",
+    "project",
+    "DecodeContext",
+    "DecodeError",
+    "ColumnarList",
+    "DeltaWriter",
+    "load_delta",
+    "CanonicalEncoder",
+    "dumps_canonical",
+    "content_hash",
+    "schema_object_encoder",
+    "SharedBlock",
+    "SharedView",
+    "Interner",
+    "RecordReader",
+    "RecordWriter",
+    "dump_records",
+    "load_records",
+    "dump_sharded_records",
+    "load_sharded_records",
+    "BoundHooks",
+    "make_hooks",
+    "ClassCollector",
     "__version__",
 )
@@ -0,0 +1,73 @@
+"""
+Command line interface of local_migrator.
+
+Usage::
+
+    python -m local_migrator upgrade [--dry-run] [--workers N] [--import MODULE] PATH [PATH ...]
+    python -m local_migrator analyze [--samples N] [--workers N] [--import MODULE] PATH [PATH ...]
+"""
+
+import argparse
+import sys
+import typing
+
+from ._analyze import analyze_paths
+from ._upgrade import upgrade_paths
+
+
+def _upgrade(args: argparse.Namespace) -> int:
+    status = 0
+    for report in upgrade_paths(args.paths, dry_run=args.dry_run, workers=args.workers, modules=args.modules):
+        print(report)
+        if report.error is not None:
+            status = 1
+    return status
+
+
+def _analyze(args: argparse.Namespace) -> int:
+    report = analyze_paths(args.paths, workers=args.workers, modules=args.modules, samples=args.samples)
+    print(report)
+    return 1 if report.errors else 0
+
+
+def _add_common_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument(
+        "--import",
+        dest="modules",
+        action="append",
+        default=[],
+        metavar="MODULE",
+        help="module to import before processing files (to register classes)",
+    )
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m local_migrator", description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade = subparsers.add_parser(
+        "upgrade", help="Rewrite json and cbor files using current versions of registered classes."
+    )
+    upgrade.add_argument("paths", nargs="+", help="files or directories to upgrade")
+    upgrade.add_argument("--dry-run", action="store_true", help="only report classes and migrations to be applied")
+    _add_common_arguments(upgrade)
+    upgrade.set_defaults(func=_upgrade)
+    analyze = subparsers.add_parser(
+        "analyze", help="Report classes, versions and cost of migrations present in json and cbor files."
+    )
+    analyze.add_argument("paths", nargs="+", help="files or directories to analyze")
+    analyze.add_argument(
+        "--samples", type=int, default=10, help="number of benchmarked objects per class and set of versions"
+    )
+    _add_common_arguments(analyze)
+    analyze.set_defaults(func=_analyze)
+    return parser
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    args = create_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
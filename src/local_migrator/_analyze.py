@@ -0,0 +1,215 @@
+"""
+This module contains analyzer of saved files reporting which versions of classes are still present
+and how expensive are migrations that need to be applied to them.
+"""
+
+import copy
+import time
+import typing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+
+from ._class_register import REGISTER, MigrationRegistration, migration_name, str_to_version
+from ._io import PathType, load_file
+from ._projection import project
+from ._serialize_hooks import iter_encoded_objects
+from ._upgrade import find_files, import_modules
+
+_ObjectKey = typing.Tuple[str, typing.Tuple[typing.Tuple[str, str], ...]]
+
+
+@dataclass
+class StepStats:
+    """
+    Statistics of single migration step
+    (entry of ``migrations`` argument of :py:meth:`~.MigrationRegistration.register`).
+
+    :ivar str class_str: current path of class owning migration
+    :ivar str version: version to which migration upgrades data
+    :ivar str name: name of migration (see :py:func:`~._class_register.migration_name`)
+    :ivar int calls: number of objects in corpus for which migration will be applied
+    :ivar int samples: number of benchmarked calls
+    :ivar float total_time: time of all benchmarked calls in seconds
+    :ivar int failures: number of benchmarked calls which raised exception
+    """
+
+    class_str: str
+    version: str
+    name: str
+    calls: int = 0
+    samples: int = 0
+    total_time: float = 0.0
+    failures: int = 0
+
+    @property
+    def mean_time(self) -> typing.Optional[float]:
+        """Mean time of single call in seconds or ``None`` if migration was not benchmarked."""
+        return self.total_time / self.samples if self.samples else None
+
+    def __str__(self):
+        res = f"{self.class_str} {self.version} {self.name}: "
+        if not self.calls:
+            return res + "unused"
+        res += f"x{self.calls}"
+        if self.samples:
+            res += f", mean {self.mean_time * 1e6:.1f} us ({self.samples} samples)"
+        if self.failures:
+            res += f", {self.failures} failures"
+        return res
+
+
+@dataclass
+class CorpusReport:
+    """
+    Summary of classes, versions and migrations present in set of files.
+
+    :ivar int files: number of scanned files
+    :ivar typing.Dict[str,int] classes: number of objects per saved class path
+    :ivar typing.Dict[str,typing.Dict[str,int]] versions: for each class path from version dicts
+        number of objects per saved version
+    :ivar typing.List[StepStats] steps: statistics of migrations of classes present in files
+    :ivar typing.Dict[str,str] errors: files which could not be read and classes which could not be resolved
+    """
+
+    files: int = 0
+    classes: typing.Dict[str, int] = field(default_factory=dict)
+    versions: typing.Dict[str, typing.Dict[str, int]] = field(default_factory=dict)
+    steps: typing.List[StepStats] = field(default_factory=list)
+    errors: typing.Dict[str, str] = field(default_factory=dict)
+
+    def __str__(self):
+        lines = [f"files: {self.files}", "classes:"]
+        lines.extend(f"    {name} x{count}" for name, count in sorted(self.classes.items()))
+        lines.append("versions:")
+        for name, versions in sorted(self.versions.items()):
+            lines.extend(f"    {name} {version} x{count}" for version, count in sorted(versions.items()))
+        lines.append("migrations:")
+        lines.extend(f"    {step}" for step in self.steps)
+        if self.errors:
+            lines.append("errors:")
+            lines.extend(f"    {name}: {message}" for name, message in sorted(self.errors.items()))
+        return "\n".join(lines)
+
+
+def scan_file(
+    path: PathType, samples: int = 10
+) -> typing.Tuple[typing.Counter[_ObjectKey], typing.Dict[_ObjectKey, typing.List[dict]]]:
+    """
+    Count objects per class path and set of versions in file. Objects are not constructed.
+
+    :param path: path to file
+    :param samples: maximum number of values dicts collected per class path and set of versions
+    :return: counts and samples of values dicts of objects
+    """
+    counts: typing.Counter[_ObjectKey] = Counter()
+    collected: typing.Dict[_ObjectKey, typing.List[dict]] = {}
+    for class_str, version_dkt, values in iter_encoded_objects(load_file(path, hooks=False)):
+        key = (class_str, tuple(sorted(version_dkt.items())))
+        counts[key] += 1
+        if counts[key] <= samples:
+            collected.setdefault(key, []).append(values)
+    return counts, collected
+
+
+def _safe_scan_file(path: Path, samples: int):
+    try:
+        return scan_file(path, samples), None
+    except Exception as e:  # pylint: disable=W0703
+        return None, str(e)
+
+
+def _benchmark(
+    values: dict,
+    steps: typing.List[typing.Tuple[str, typing.Any, typing.Callable]],
+    stats: typing.List[StepStats],
+    register: MigrationRegistration,
+):
+    """Apply migrations one by one to restored copy of values, measuring time of each step."""
+    try:
+        values = project(values, register=register)
+    except Exception:  # pylint: disable=W0703
+        return
+    for (_, _, migration), step_stats in zip(steps, stats):
+        data = copy.deepcopy(values)
+        start = time.perf_counter()
+        try:
+            values = migration(data)
+        except Exception:  # pylint: disable=W0703
+            step_stats.failures += 1
+            return
+        step_stats.total_time += time.perf_counter() - start
+        step_stats.samples += 1
+
+
+def analyze_paths(
+    paths: typing.Iterable[PathType],
+    workers: typing.Optional[int] = None,
+    modules: typing.Sequence[str] = (),
+    samples: int = 10,
+    register: MigrationRegistration = REGISTER,
+) -> CorpusReport:
+    """
+    Scan files and report classes and versions present in them. For each class present in files
+    all its migration steps are reported with number of objects they will be applied to.
+    Each step is benchmarked on values of real objects from files (``samples`` objects
+    per class path and set of versions). Nested objects in sampled values are restored before benchmark.
+
+    :param paths: list of files and directories
+    :param workers: number of worker processes used for scanning. If ``1`` then work is done in current process.
+    :param modules: modules that need to be imported to register classes
+    :param samples: number of benchmarked objects per class path and set of versions
+    :param register: register used to resolve classes and migrations
+    """
+    files = find_files(paths)
+    import_modules(modules)
+    report = CorpusReport(files=len(files))
+    counts: typing.Counter[_ObjectKey] = Counter()
+    collected: typing.Dict[_ObjectKey, typing.List[dict]] = {}
+
+    func = partial(_safe_scan_file, samples=samples)
+    if workers == 1:
+        results = list(map(func, files))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=import_modules, initargs=(tuple(modules),)
+        ) as executor:
+            results = list(executor.map(func, files, chunksize=8))
+    for path, (result, error) in zip(files, results):
+        if error is not None:
+            report.errors[str(path)] = error
+            continue
+        counts.update(result[0])
+        for key, values_list in result[1].items():
+            collected.setdefault(key, []).extend(values_list[: samples - len(collected.get(key, []))])
+
+    classes: typing.Counter[str] = Counter()
+    versions: typing.Dict[str, typing.Counter[str]] = {}
+    steps: typing.Dict[typing.Tuple[str, str, int], StepStats] = {}
+    for key, count in counts.items():
+        class_str, version_items = key
+        classes[class_str] += count
+        for name, version in version_items:
+            versions.setdefault(name, Counter())[version] += count
+        try:
+            all_steps = register.migration_steps(class_str, {})
+            fired = register.migration_steps(class_str, dict(version_items))
+        except Exception as e:  # pylint: disable=W0703
+            report.errors[class_str] = str(e)
+            continue
+        for owner, version, migration in all_steps:
+            steps.setdefault(
+                (owner, str(version), id(migration)), StepStats(owner, str(version), migration_name(migration))
+            )
+        fired_stats = [steps[(owner, str(version), id(migration))] for owner, version, migration in fired]
+        for step_stats in fired_stats:
+            step_stats.calls += count
+        for values in collected.get(key, []) if fired else []:
+            _benchmark(values, fired, fired_stats, register)
+
+    report.classes = dict(classes)
+    report.versions = {name: dict(counter) for name, counter in versions.items()}
+    report.steps = sorted(steps.values(), key=lambda x: (x.class_str, str_to_version(x.version)))
+    return report
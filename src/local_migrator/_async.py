@@ -0,0 +1,131 @@
+"""
+This module contains asyncio friendly helpers for reading and writing files with serialization hooks.
+"""
+
+import asyncio
+import threading
+import typing
+from concurrent.futures import Executor
+from pathlib import Path
+
+from ._io import PathType, dumps, file_format, loads, write_atomic
+
+
+class AsyncSerializer:
+    """
+    Load and save files without blocking event loop.
+
+    Files are read and written in chunks in the default executor of the loop.
+    Encoding and decoding (including migrations) is done in ``executor``,
+    which could be :py:class:`concurrent.futures.ThreadPoolExecutor`
+    or :py:class:`concurrent.futures.ProcessPoolExecutor`.
+    In the second case loaded objects need to be picklable.
+    Number of concurrent operations is limited to bound memory usage.
+
+    Cancellation of operation stops reading or writing at next chunk.
+    Cancelled save does not modify destination file and its temporary file is removed
+    before cancellation is propagated. File is written in single executor call.
+
+    :param executor: executor for encoding and decoding. If ``None`` then default executor of loop is used.
+    :param max_concurrency: maximum number of concurrent load and save operations
+    :param chunk_size: size of chunk used for reading and writing files
+
+    Example::
+
+        serializer = AsyncSerializer(ProcessPoolExecutor(), max_concurrency=2)
+        data = await serializer.load("project.json")
+        await serializer.dump(data, "project.cbor")
+    """
+
+    def __init__(self, executor: typing.Optional[Executor] = None, max_concurrency: int = 4, chunk_size: int = 2**20):
+        self._executor = executor
+        self._max_concurrency = max_concurrency
+        self._semaphore_info: typing.Optional[typing.Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+        self.chunk_size = chunk_size
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore_info is None or self._semaphore_info[0] is not loop:
+            # semaphore is bound to loop, so it needs to be created in running loop
+            self._semaphore_info = (loop, asyncio.Semaphore(self._max_concurrency))
+        return self._semaphore_info[1]
+
+    async def _read(self, path: PathType) -> bytes:
+        loop = asyncio.get_running_loop()
+        f_p = await loop.run_in_executor(None, open, path, "rb")
+        chunks = []
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, f_p.read, self.chunk_size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            f_p.close()
+        return b"".join(chunks)
+
+    async def _write(self, path: Path, data: bytes):
+        cancelled = threading.Event()
+        future = asyncio.get_running_loop().run_in_executor(None, write_atomic, path, data, self.chunk_size, cancelled)
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # write stops at next chunk, temporary file is removed before cancellation is propagated
+            cancelled.set()
+            await asyncio.wait([future])
+            if not future.cancelled():
+                future.exception()
+            raise
+
+    async def load(self, path: PathType, format_: typing.Optional[str] = None, hooks: bool = True) -> typing.Any:
+        """
+        Load data from file. See :py:func:`~local_migrator.load_file`.
+
+        :param path: path to file
+        :param format_: ``"json"`` or ``"cbor"``. If not provided then determined by file suffix.
+        :param hooks: if :py:func:`object_hook` should be used to restore objects.
+        """
+        if format_ is None:
+            format_ = file_format(path)
+        async with self._semaphore():
+            content = await self._read(path)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, loads, content, format_, hooks)
+
+    async def dump(self, obj: typing.Any, path: PathType, format_: typing.Optional[str] = None):
+        """
+        Atomically save data to file. See :py:func:`~local_migrator.dump_file`.
+
+        :param obj: object to be saved
+        :param path: path to file
+        :param format_: ``"json"`` or ``"cbor"``. If not provided then determined by file suffix.
+        """
+        if format_ is None:
+            format_ = file_format(path)
+        async with self._semaphore():
+            data = await asyncio.get_running_loop().run_in_executor(self._executor, dumps, obj, format_)
+            await self._write(Path(path), data)
+
+
+_DEFAULT_SERIALIZER = AsyncSerializer()
+
+
+async def load_file_async(path: PathType, format_: typing.Optional[str] = None, hooks: bool = True) -> typing.Any:
+    """
+    Load data from file without blocking event loop. Uses default :py:class:`AsyncSerializer` instance.
+
+    :param path: path to file
+    :param format_: ``"json"`` or ``"cbor"``. If not provided then determined by file suffix.
+    :param hooks: if :py:func:`object_hook` should be used to restore objects.
+    """
+    return await _DEFAULT_SERIALIZER.load(path, format_, hooks)
+
+
+async def dump_file_async(obj: typing.Any, path: PathType, format_: typing.Optional[str] = None):
+    """
+    Atomically save data to file without blocking event loop. Uses default :py:class:`AsyncSerializer` instance.
+
+    :param obj: object to be saved
+    :param path: path to file
+    :param format_: ``"json"`` or ``"cbor"``. If not provided then determined by file suffix.
+    """
+    await _DEFAULT_SERIALIZER.dump(obj, path, format_)
@@ -0,0 +1,112 @@
+"""
+This module contains on-disk cache of documents decoded with migrations and encoded again in current versions.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import typing
+from pathlib import Path
+
+from ._class_register import REGISTER, MigrationRegistration
+from ._hooks import make_hooks
+from ._io import PathType, dumps, loads, write_atomic
+from ._serialize_hooks import DecodeContext, contains_errors, iter_encoded_objects
+
+
+class MigrationCache:
+    """
+    Content addressed on-disk cache of migrated documents.
+
+    Entries are identified by hash of the original document content. Each entry contains
+    the document encoded again using current versions of classes, together with
+    :py:meth:`~.MigrationRegistration.class_fingerprint` of each class present in the original document.
+    Entry is ignored and replaced if any of these fingerprints changes, so change of class version
+    or list of migrations invalidates entries automatically.
+
+    Cache size is limited by removing least recently used entries.
+
+    :param directory: directory to store cache entries
+    :param max_size: maximum size of all entries in bytes
+    :param register: register used to restore and encode documents and to calculate fingerprints
+
+    Example::
+
+        cache = MigrationCache(Path.home() / ".cache" / "my_app")
+        data = load_file("old_project.json", cache=cache)
+    """
+
+    def __init__(self, directory: PathType, max_size: int = 256 * 2**20, register: MigrationRegistration = REGISTER):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self._register = register
+        self._hooks = make_hooks(register)
+
+    def _entry_path(self, key: str, format_: str) -> Path:
+        return self.directory / f"{key}.{format_}"
+
+    def _fingerprints(self, class_strs: typing.Iterable[str]) -> typing.Dict[str, str]:
+        return {x: self._register.class_fingerprint(x) for x in class_strs}
+
+    def _read(self, key: str, format_: str) -> typing.Tuple[bool, typing.Any]:
+        path = self._entry_path(key, format_)
+        try:
+            with open(path, "rb") as f_p:
+                header = json.loads(f_p.readline())
+                if header != self._fingerprints(header):
+                    return False, None
+                data = loads(f_p.read(), format_, context=DecodeContext(self._register))
+        except (OSError, ValueError):
+            return False, None
+        if contains_errors(data):  # pragma: no cover
+            return False, None
+        os.utime(path)
+        return True, data
+
+    def _write(self, key: str, format_: str, raw: typing.Any, data: typing.Any):
+        header = self._fingerprints({class_str for class_str, _, _ in iter_encoded_objects(raw)})
+        content = json.dumps(header).encode("utf-8") + b"\n" + dumps(data, format_, self._hooks)
+        write_atomic(self._entry_path(key, format_), content)
+        self.evict()
+
+    def load(self, content: bytes, format_: str = "json") -> typing.Any:
+        """
+        Decode document using cache. On miss document is decoded with migrations and result is stored in cache.
+        Documents which contain objects that could not be restored are not cached.
+
+        :param content: raw document content
+        :param format_: ``"json"`` or ``"cbor"``
+        """
+        key = hashlib.sha256(content).hexdigest()
+        found, data = self._read(key, format_)
+        if found:
+            return data
+        context = DecodeContext(self._register)
+        data = loads(content, format_, context=context)
+        if not context.report(data):
+            self._write(key, format_, loads(content, format_, hooks=False), data)
+        return data
+
+    def evict(self):
+        """Remove least recently used entries until total size is below ``max_size``."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(x[1] for x in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            total -= size
+
+    def clear(self):
+        """Remove all entries."""
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                os.unlink(entry.path)
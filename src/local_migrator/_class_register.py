@@ -2,12 +2,34 @@
 This module contains utility for registration migration information for class.
 """
 
+import collections.abc
+import contextlib
+import copy
+import dataclasses
+import enum
+import hashlib
 import importlib
 import inspect
+import types
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from functools import wraps
-from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
 
 from packaging.version import Version
 from packaging.version import parse as parse_version
@@ -51,6 +73,15 @@ def _class_str_replace(func):
 
 
 MigrationCallable = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def migration_name(migration: MigrationCallable) -> str:
+    """Get human-readable name of migration."""
+    if inspect.isfunction(migration) or inspect.ismethod(migration):
+        return f"{migration.__module__}.{migration.__qualname__}"
+    return repr(migration)
+
+
 MigrationInfo = Tuple[Version, MigrationCallable]
 """Type describing single migration entry. For given class Version number should be unique."""
 MigrationStartInfo = Tuple[Union[str, Version], MigrationCallable]
@@ -70,6 +101,8 @@ class TypeInfo:
     :ivar packaging.version.Version version: current clas version
     :ivar typing.List[~.MigrationInfo] migrations: list of migrations for deserialize old version
     :ivar bool use_parent_migrations: if migrations from parent class should be applied when deserialized object.
+    :ivar bool memoize: if encoded form of instances should be cached.
+    :ivar bool pickle_support: if instances are pickled in migration aware way.
     """
 
     base_path: str
@@ -78,6 +111,8 @@ class TypeInfo:
     migrations: List[MigrationInfo]
     use_parent_migrations: bool
     allow_errors_in_values: bool
+    memoize: bool = False
+    pickle_support: bool = False
 
 
 class MigrationRegistration:
@@ -85,8 +120,49 @@ class MigrationRegistration:
     Implementation of class register to storage information needed for migration from previous version.
     """
 
+    _pickle_reducer: Optional[Callable[..., Tuple[Any, ...]]] = None
+    """``__reduce_ex__`` installed on classes registered with ``pickle_support=True``. Set by ``_pickling`` module."""
+
     def __init__(self):
         self._data_dkt: Dict[str, TypeInfo] = {}
+        self._encoder_cache: Dict[Type, Callable[[Any], Dict[str, Any]]] = {}
+        self._decoder_cache: Dict[Tuple[str, tuple, bool], Callable[[Dict[str, Any]], Any]] = {}
+        self._fingerprint_cache: Dict[str, str] = {}
+        self._plan_cache: Dict[Tuple[str, tuple], List[MigrationCallable]] = {}
+        self._schema_cache: Dict[Type, Dict[str, Any]] = {}
+
+    def _clear_caches(self):
+        """
+        Drop all compiled per-class helpers.
+        Caches are cleared in place, as they are prebound in hooks created by :py:func:`~.make_hooks`.
+        """
+        self._encoder_cache.clear()
+        self._decoder_cache.clear()
+        self._fingerprint_cache.clear()
+        self._plan_cache.clear()
+        self._schema_cache.clear()
+
+    def _invalidate(self, cls: Type):
+        """
+        Drop compiled helpers which depend on registration of given class,
+        that is helpers of this class and its subclasses. Helpers of other classes are kept.
+        Caches are modified in place, as they are prebound in hooks created by :py:func:`~.make_hooks`.
+        """
+
+        def _affected(class_str: str) -> bool:
+            type_info = self._data_dkt.get(class_str)
+            return type_info is None or issubclass(type_info.type_, cls)
+
+        for key in [x for x in self._encoder_cache if issubclass(x, cls)]:
+            self._encoder_cache.pop(key, None)
+        for key in [x for x in self._schema_cache if issubclass(x, cls)]:
+            self._schema_cache.pop(key, None)
+        for key in [x for x in self._decoder_cache if _affected(x[0])]:
+            self._decoder_cache.pop(key, None)
+        for key in [x for x in self._plan_cache if _affected(x[0])]:
+            self._plan_cache.pop(key, None)
+        for key in [x for x in self._fingerprint_cache if _affected(x)]:
+            self._fingerprint_cache.pop(key, None)
 
     def register(  # noqa: PLR0913
         self,
@@ -96,6 +172,9 @@ class MigrationRegistration:
         old_paths: Optional[List[str]] = None,
         use_parent_migrations: bool = True,
         allow_errors_in_values: bool = False,
+        *,
+        memoize: bool = False,
+        pickle_support: bool = False,
     ) -> RegisterReturnType:
         """
         Register class instance for storage information needed for deserialization of object from older version.
@@ -108,6 +187,14 @@ class MigrationRegistration:
         :param use_parent_migrations: if migrations from parent class should be applied when deserialized object
         :param allow_errors_in_values: if errors in constructor kwargs should be ignored. Added to not block creating
             of custom Mapping class that could contain broken items.
+        :param memoize: if encoded form of instances should be cached and reused when the same
+            instance is saved again. Should be used only for immutable classes, for example frozen dataclasses.
+            Instances which could not be weak referenced are not cached.
+        :param pickle_support: if instances should be pickled as class path, versions and values
+            and restored with migrations from :py:data:`REGISTER` (``__reduce_ex__`` is replaced).
+            Supported for dataclasses, enums and classes with ``as_dict`` method.
+            Only classes registered in :py:data:`REGISTER` are supported, as unpickling process
+            has no access to other registers.
         :return: class itself if cls parameter is provided. Otherwise,
             one argument function which will consume Type to be registered.
         """
@@ -120,6 +207,10 @@ class MigrationRegistration:
             raise ValueError("class version lower than in migrations")
 
         def _register(cls_):
+            if pickle_support and not _encoded_by_fields(cls_):
+                raise ValueError(f"Pickle support is not available for class {class_to_str(cls_)}")
+            if pickle_support and self is not REGISTER:
+                raise ValueError("Pickle support is available only for classes registered in global REGISTER")
             base_path = class_to_str(cls_)
             type_info = TypeInfo(
                 base_path=base_path,
@@ -128,6 +219,8 @@ class MigrationRegistration:
                 migrations=migrations,
                 use_parent_migrations=use_parent_migrations,
                 allow_errors_in_values=allow_errors_in_values,
+                memoize=memoize,
+                pickle_support=pickle_support,
             )
             if base_path in self._data_dkt:
                 raise RuntimeError(f"Class name {base_path} already taken by {self._data_dkt[base_path].base_path}")
@@ -136,6 +229,9 @@ class MigrationRegistration:
                 if name in self._data_dkt and self._data_dkt[name].base_path != base_path:
                     raise RuntimeError(f"Class name {name} already taken by {self._data_dkt[name].base_path}")
                 self._data_dkt[name] = type_info
+            if pickle_support:
+                cls_.__reduce_ex__ = self._pickle_reducer
+            self._invalidate(cls_)
             return cls_
 
         return _register if cls is None else _register(cls)
@@ -166,6 +262,21 @@ class MigrationRegistration:
         self._register_missed(class_str=class_str)
         return self._data_dkt[class_str].type_
 
+    def class_paths(self, cls: Union[str, Type]) -> List[str]:
+        """
+        Get all paths under which class is registered: current path followed by old paths
+        (see ``old_paths`` argument of :py:meth:`register`).
+
+        :param cls: class or full qualified path to class (current or old one)
+        """
+        if not isinstance(cls, str):
+            cls = class_to_str(cls)
+        self._register_missed(class_str=cls)
+        type_info = self._data_dkt[cls]
+        return [type_info.base_path] + [
+            name for name, info in self._data_dkt.items() if info is type_info and name != type_info.base_path
+        ]
+
     def allow_errors_in_values(self, cls: Union[str, Type]) -> bool:
         """
         Check if class should allow errors in values.
@@ -177,6 +288,17 @@ class MigrationRegistration:
         self._register_missed(class_str=cls)
         return self._data_dkt[cls].allow_errors_in_values
 
+    def memoize(self, cls: Union[str, Type]) -> bool:
+        """
+        Check if encoded form of class instances should be cached.
+
+        :param cls: class or full qualified path to class
+        """
+        if not isinstance(cls, str):
+            cls = class_to_str(cls)
+        self._register_missed(class_str=cls)
+        return self._data_dkt[cls].memoize
+
     @_class_str_replace
     def migrate_data(
         self, cls: Union[str, Type], class_str_to_version_dkt: Dict[str, Union[str, Version]], data: Dict[str, Any]
@@ -189,36 +311,127 @@ class MigrationRegistration:
             If class is absent from this dict then assumed version is "0.0.0"
         :param data: dict of kwargs to constructor of class
         """
+        for migration in self.migration_plan(cls, class_str_to_version_dkt, fuse=True):
+            data = migration(data)
+        return data
+
+    def migration_plan(
+        self, cls: Union[str, Type], class_str_to_version_dkt: Dict[str, Union[str, Version]], fuse: bool = False
+    ) -> List[MigrationCallable]:
+        """
+        Get flat list of migrations which :py:meth:`migrate_data` applies for given versions.
+        Parent class migrations are placed first.
+
+        :param cls: class or fully qualified class path
+        :param class_str_to_version_dkt: for each parent class information about version during serialization.
+            If class is absent from this dict then assumed version is "0.0.0"
+        :param fuse: if runs of declarative migrations should be fused (see :py:func:`fuse_migrations`).
+            Fused plans are cached, so returned list should not be modified.
+        """
+        if fuse:
+            key = (cls if isinstance(cls, str) else class_to_str(cls), tuple(class_str_to_version_dkt.items()))
+            try:
+                return self._plan_cache[key]
+            except KeyError:
+                pass
+            plan = fuse_migrations(self.migration_plan(cls, class_str_to_version_dkt))
+            self._plan_cache[key] = plan
+            return plan
+        return [migration for _, _, migration in self.migration_steps(cls, class_str_to_version_dkt)]
+
+    def migration_steps(
+        self, cls: Union[str, Type], class_str_to_version_dkt: Dict[str, Union[str, Version]]
+    ) -> List[Tuple[str, Version, MigrationCallable]]:
+        """
+        Get list of migrations which :py:meth:`migrate_data` applies for given versions,
+        together with information which :py:data:`MigrationInfo` entry provides each of them.
+
+        :param cls: class or fully qualified class path
+        :param class_str_to_version_dkt: for each parent class information about version during serialization.
+            If class is absent from this dict then assumed version is "0.0.0"
+        :return: list of tuples with current path of class owning migration, target version and migration
+        """
         if not isinstance(cls, str):
             cls = class_to_str(cls)
 
+        steps = []
         if self.use_parent_migrations(cls):
             super_klass = get_super_class(self.get_class(cls))
             if super_klass is not None:
-                data = self.migrate_data(class_to_str(super_klass), class_str_to_version_dkt, data)
+                steps = self.migration_steps(class_to_str(super_klass), class_str_to_version_dkt)
         version = str_to_version(class_str_to_version_dkt.get(cls, "0.0.0"))
-        for version_, migration in self._data_dkt[cls].migrations:
-            if version < version_:
-                data = migration(data)
-        return data
+        type_info = self._data_dkt[cls]
+        steps.extend(
+            (type_info.base_path, version_, migration)
+            for version_, migration in type_info.migrations
+            if version < version_
+        )
+        return steps
+
+    def class_fingerprint(self, cls: Union[str, Type]) -> str:
+        """
+        Calculate digest of register information used to deserialize given class:
+        current path, version, migrations and the same information for parent classes if their migrations are used.
+
+        :param cls: class or fully qualified class path (current or old one)
+        """
+        if not isinstance(cls, str):
+            cls = class_to_str(cls)
+        try:
+            return self._fingerprint_cache[cls]
+        except KeyError:
+            pass
+        self._register_missed(class_str=cls)
+        type_info = self._data_dkt[cls]
+        parts = [type_info.base_path, str(type_info.version), str(type_info.allow_errors_in_values)]
+        parts.extend(f"{version}:{migration_name(migration)}" for version, migration in type_info.migrations)
+        if type_info.use_parent_migrations:
+            super_klass = get_super_class(type_info.type_)
+            if super_klass is not None:
+                parts.append(self.class_fingerprint(super_klass))
+        res = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+        self._fingerprint_cache[cls] = res
+        return res
+
+    def fingerprint(self, classes: Iterable[Union[str, Type]]) -> str:
+        """
+        Calculate digest of register information used to deserialize given set of classes.
+        See :py:meth:`class_fingerprint`.
+
+        :param classes: classes or fully qualified class paths
+        """
+        fingerprints = sorted({self.class_fingerprint(x) for x in classes})
+        return hashlib.sha256("\n".join(fingerprints).encode("utf-8")).hexdigest()
+
+    def prefetch(self, class_paths: Iterable[str], max_workers: Optional[int] = None) -> List[str]:
+        """
+        Import modules of given classes concurrently using thread pool and register classes missed in register.
+        Could be used for warm-up of application. It is also called before decoding of document
+        (see :py:func:`~local_migrator.load_file`), so modules are not imported one by one during decoding.
+
+        :param class_paths: fully qualified class paths
+        :param max_workers: maximum number of threads used for import
+        :return: class paths which could not be resolved
+        """
+        missed = sorted({x for x in class_paths if x not in self._data_dkt})
+        # one class per module is enough, rest of classes from the same module are cheap
+        to_import = list({x.rsplit(".", maxsplit=1)[0]: x for x in missed}.values())
+        if len(to_import) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(_try_import_class_module, to_import))
+        res = []
+        for class_str in missed:
+            try:
+                self._register_missed(class_str)
+            except Exception:  # pylint: disable=W0703
+                res.append(class_str)
+        return res
 
     def _register_missed(self, class_str):
         """Register class if missed from register"""
         if class_str in self._data_dkt:
             return
-        module_name, class_name = class_str.rsplit(".", maxsplit=1)
-        class_path = [class_name]
-        while True:
-            try:
-                module = importlib.import_module(module_name)
-                break
-            except ModuleNotFoundError as e:
-                module_name_split = module_name.rsplit(".", maxsplit=1)
-                if len(module_name_split) == 1:
-                    raise ValueError(f"Class {class_str} not found") from e
-
-                module_name, class_name_ = module_name_split
-                class_path.append(class_name_)
+        module, class_path = _import_class_module(class_str)
         if class_str in self._data_dkt:
             return
         class_ = module
@@ -230,12 +443,254 @@ class MigrationRegistration:
         self.register(class_)
 
 
+def _encoded_by_fields(cls: Type) -> bool:
+    """Check if instances of class are encoded as dict of constructor arguments by generated encoder."""
+    return dataclasses.is_dataclass(cls) or issubclass(cls, enum.Enum) or callable(getattr(cls, "as_dict", None))
+
+
+def _import_class_module(class_str: str) -> Tuple[types.ModuleType, List[str]]:
+    """
+    Import module containing class.
+
+    :param class_str: fully qualified class path
+    :return: module and path of class inside module
+    """
+    module_name, class_name = class_str.rsplit(".", maxsplit=1)
+    class_path = [class_name]
+    while True:
+        try:
+            return importlib.import_module(module_name), class_path
+        except ModuleNotFoundError as e:
+            module_name_split = module_name.rsplit(".", maxsplit=1)
+            if len(module_name_split) == 1:
+                raise ValueError(f"Class {class_str} not found") from e
+
+            module_name, class_name_ = module_name_split
+            class_path.append(class_name_)
+
+
+def _try_import_class_module(class_str: str):
+    # errors are reported when class is registered
+    with contextlib.suppress(Exception):
+        _import_class_module(class_str)
+
+
 # The global instance of register is use because registration is performed on import time.
 # There should no information storage for objects.
 REGISTER = MigrationRegistration()
 """Default register to storage class information. Instance of :py:class:`MigrationRegistration`"""
 
 
+class MigrationOperation:
+    """
+    Base class for declarative migration steps.
+
+    Subclasses implement :py:meth:`apply` which modifies dict in place.
+    Called directly operation works as ordinary migration function (returns modified copy of dict).
+    Consecutive operations in migration chain are fused by :py:func:`fuse_migrations`,
+    so the dict is copied only once for whole sequence.
+    """
+
+    def apply(self, dkt: Dict[str, Any]):
+        """Apply operation in place."""
+        raise NotImplementedError
+
+    def apply_columns(self, columns: Dict[str, Any], length: int) -> bool:  # noqa: ARG002
+        """
+        Apply operation in place to dict of columns (sequences of values of given field for many objects).
+
+        :param columns: mapping from field name to column
+        :param length: number of objects
+        :return: ``False`` if operation does not support columns. Then columns are not modified.
+        """
+        return False
+
+    def __call__(self, dkt: Dict[str, Any]) -> Dict[str, Any]:
+        res_dkt = dkt.copy()
+        self.apply(res_dkt)
+        return res_dkt
+
+    def _arguments(self) -> Tuple[Any, ...]:
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._arguments() == other._arguments()
+
+    def __hash__(self):
+        return hash((type(self), self._arguments()))
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self._arguments()!r}"
+
+
+class RenameKey(MigrationOperation):
+    """Rename field. See :py:func:`rename_key`"""
+
+    def __init__(self, from_key: str, to_key: str, optional: bool = False):
+        self.from_key = from_key
+        self.to_key = to_key
+        self.optional = optional
+
+    def apply(self, dkt: Dict[str, Any]):
+        if self.optional and self.from_key not in dkt:
+            return
+        dkt[self.to_key] = dkt.pop(self.from_key)
+
+    def apply_columns(self, columns: Dict[str, Any], length: int) -> bool:  # noqa: ARG002
+        self.apply(columns)
+        return True
+
+    def _arguments(self) -> Tuple[Any, ...]:
+        return self.from_key, self.to_key, self.optional
+
+
+class DropKey(MigrationOperation):
+    """Remove field. See :py:func:`drop_key`"""
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def apply(self, dkt: Dict[str, Any]):
+        dkt.pop(self.key, None)
+
+    def apply_columns(self, columns: Dict[str, Any], length: int) -> bool:  # noqa: ARG002
+        self.apply(columns)
+        return True
+
+    def _arguments(self) -> Tuple[Any, ...]:
+        return (self.key,)
+
+
+_IMMUTABLE_TYPES = (type(None), bool, int, float, complex, str, bytes, frozenset, enum.Enum)
+
+
+class SetDefault(MigrationOperation):
+    """Set value of missed field. See :py:func:`set_default`"""
+
+    def __init__(self, key: str, value: Any = None, factory: Optional[Callable[[], Any]] = None):
+        self.key = key
+        self.value = value
+        self.factory = factory
+        self._shared = factory is None and isinstance(value, _IMMUTABLE_TYPES)
+
+    def _new_value(self) -> Any:
+        if self.factory is not None:
+            return self.factory()
+        return copy.deepcopy(self.value)
+
+    def apply(self, dkt: Dict[str, Any]):
+        if self.key not in dkt:
+            dkt[self.key] = self.value if self._shared else self._new_value()
+
+    def apply_columns(self, columns: Dict[str, Any], length: int) -> bool:
+        if self.key not in columns:
+            if self._shared:
+                columns[self.key] = [self.value] * length
+            else:
+                columns[self.key] = [self._new_value() for _ in range(length)]
+        return True
+
+    def _arguments(self) -> Tuple[Any, ...]:
+        factory = None if self.factory is None else migration_name(self.factory)
+        return self.key, self.value, factory
+
+
+class ConvertValue(MigrationOperation):
+    """Convert value of field. See :py:func:`convert_value`"""
+
+    def __init__(self, key: str, converter: Callable[[Any], Any], optional: bool = True):
+        self.key = key
+        self.converter = converter
+        self.optional = optional
+
+    def apply(self, dkt: Dict[str, Any]):
+        if self.optional and self.key not in dkt:
+            return
+        dkt[self.key] = self.converter(dkt[self.key])
+
+    def apply_columns(self, columns: Dict[str, Any], length: int) -> bool:  # noqa: ARG002
+        if self.optional and self.key not in columns:
+            return True
+        column = columns[self.key]
+        if not isinstance(column, list):
+            column = column.tolist()
+        columns[self.key] = [self.converter(x) for x in column]
+        return True
+
+    def _arguments(self) -> Tuple[Any, ...]:
+        return self.key, migration_name(self.converter), self.optional
+
+
+class NestKeys(MigrationOperation):
+    """Move fields to sub dict. See :py:func:`nest_keys`"""
+
+    def __init__(self, keys: Iterable[str], to_key: str):
+        self.keys = tuple(keys)
+        self.to_key = to_key
+
+    def apply(self, dkt: Dict[str, Any]):
+        dkt[self.to_key] = {key: dkt.pop(key) for key in self.keys if key in dkt}
+
+    def _arguments(self) -> Tuple[Any, ...]:
+        return self.keys, self.to_key
+
+
+class UnnestKey(MigrationOperation):
+    """Move fields from sub dict to top level. See :py:func:`unnest_key`"""
+
+    def __init__(self, key: str, prefix: str = ""):
+        self.key = key
+        self.prefix = prefix
+
+    def apply(self, dkt: Dict[str, Any]):
+        value = dkt.pop(self.key)
+        if dataclasses.is_dataclass(value) and not isinstance(value, type):
+            value = {x.name: getattr(value, x.name) for x in dataclasses.fields(value)}
+        for key, val in value.items():
+            dkt[f"{self.prefix}{key}"] = val
+
+    def _arguments(self) -> Tuple[Any, ...]:
+        return self.key, self.prefix
+
+
+class FusedMigration:
+    """Sequence of :py:class:`MigrationOperation` applied to single copy of dict."""
+
+    def __init__(self, operations: Iterable[MigrationOperation]):
+        self.operations = tuple(operations)
+
+    def __call__(self, dkt: Dict[str, Any]) -> Dict[str, Any]:
+        res_dkt = dkt.copy()
+        for operation in self.operations:
+            operation.apply(res_dkt)
+        return res_dkt
+
+    def __repr__(self):
+        return f"FusedMigration({', '.join(map(repr, self.operations))})"
+
+
+def fuse_migrations(migrations: Iterable[MigrationCallable]) -> List[MigrationCallable]:
+    """
+    Replace each run of consecutive :py:class:`MigrationOperation` with single :py:class:`FusedMigration`.
+    Other migration functions are kept untouched and split runs.
+
+    :param migrations: chain of migrations
+    """
+    res: List[MigrationCallable] = []
+    run: List[MigrationOperation] = []
+    for migration in migrations:
+        if isinstance(migration, MigrationOperation):
+            run.append(migration)
+            continue
+        if run:
+            res.append(run[0] if len(run) == 1 else FusedMigration(run))
+            run = []
+        res.append(migration)
+    if run:
+        res.append(run[0] if len(run) == 1 else FusedMigration(run))
+    return res
+
+
 def rename_key(from_key: str, to_key: str, optional=False) -> MigrationCallable:
     """
     simple migration function for rename fields
@@ -245,25 +700,225 @@ def rename_key(from_key: str, to_key: str, optional=False) -> MigrationCallable:
     :param optional: if migration is required (for backward compatibility)
     :return: migration function
     """
+    return RenameKey(from_key, to_key, optional)
 
-    def _migrate(dkt: Dict[str, Any]) -> Dict[str, Any]:
-        if optional and from_key not in dkt:
-            return dkt
-        res_dkt = dkt.copy()
-        res_dkt[to_key] = res_dkt.pop(from_key)
-        return res_dkt
 
-    return _migrate
+def drop_key(key: str) -> MigrationCallable:
+    """
+    Migration function for remove field. Missed field is ignored.
+
+    :param key: name of removed field
+    :return: migration function
+    """
+    return DropKey(key)
+
+
+def set_default(key: str, value: Any = None, factory: Optional[Callable[[], Any]] = None) -> MigrationCallable:
+    """
+    Migration function for set value of field if it is missed.
+
+    :param key: name of field
+    :param value: value to set. Mutable values (like lists) are copied for each object.
+    :param factory: function without arguments returning value to set. If provided then ``value`` is ignored.
+    :return: migration function
+    """
+    return SetDefault(key, value, factory)
 
 
-def update_argument(argument_name):
+def convert_value(key: str, converter: Callable[[Any], Any], optional: bool = True) -> MigrationCallable:
+    """
+    Migration function for convert value of field.
+
+    :param key: name of field
+    :param converter: function converting old value to new one
+    :param optional: if ``True`` then missed field is ignored, otherwise ``KeyError`` is raised
+    :return: migration function
+    """
+    return ConvertValue(key, converter, optional)
+
+
+def nest_keys(keys: Iterable[str], to_key: str) -> MigrationCallable:
+    """
+    Migration function for move fields to sub dict. Missed fields are ignored.
+
+    :param keys: names of fields to move
+    :param to_key: name of field which will contain dict with moved fields
+    :return: migration function
+    """
+    return NestKeys(keys, to_key)
+
+
+def unnest_key(key: str, prefix: str = "") -> MigrationCallable:
+    """
+    Migration function for move fields from sub dict (or dataclass instance) to top level.
+
+    :param key: name of field which contains sub dict
+    :param prefix: prefix added to names of moved fields
+    :return: migration function
+    """
+    return UnnestKey(key, prefix)
+
+
+class _ClassConverter:
+    """Convert dict to instance of class using cached migration plan."""
+
+    __slots__ = ("class_str", "klass", "register")
+
+    def __init__(self, klass: Type, register: MigrationRegistration):
+        self.klass = klass
+        self.class_str = class_to_str(klass)
+        self.register = register
+
+    def plan(self) -> List[MigrationCallable]:
+        return self.register.migration_plan(self.class_str, {}, fuse=True)
+
+    def convert(self, value: Any, plan: List[MigrationCallable]) -> Any:
+        if not isinstance(value, dict):
+            return value
+        for migration in plan:
+            value = migration(value)
+        return self.klass(**value)
+
+    def __call__(self, value: Any) -> Any:
+        return self.convert(value, self.plan()) if isinstance(value, dict) else value
+
+
+class _SequenceConverter:
+    """Convert elements of list or tuple."""
+
+    __slots__ = ("inner",)
+
+    def __init__(self, inner: Callable[[Any], Any]):
+        self.inner = inner
+
+    def __call__(self, value: Any) -> Any:
+        if not isinstance(value, (list, tuple)):
+            return value
+        if isinstance(self.inner, _ClassConverter):
+            plan = self.inner.plan()
+            convert = self.inner.convert
+            res = [convert(x, plan) for x in value]
+        else:
+            res = [self.inner(x) for x in value]
+        return res if isinstance(value, list) else tuple(res)
+
+
+class _TupleConverter:
+    """Convert elements of fixed length tuple."""
+
+    __slots__ = ("converters",)
+
+    def __init__(self, converters: List[Callable[[Any], Any]]):
+        self.converters = converters
+
+    def __call__(self, value: Any) -> Any:
+        if not isinstance(value, (list, tuple)) or len(value) != len(self.converters):
+            return value
+        return tuple(converter(x) for converter, x in zip(self.converters, value))
+
+
+class _MappingConverter:
+    """Convert values of dict."""
+
+    __slots__ = ("inner",)
+
+    def __init__(self, inner: Callable[[Any], Any]):
+        self.inner = inner
+
+    def __call__(self, value: Any) -> Any:
+        if not isinstance(value, dict):
+            return value
+        if isinstance(self.inner, _ClassConverter):
+            plan = self.inner.plan()
+            convert = self.inner.convert
+            return {key: convert(val, plan) for key, val in value.items()}
+        return {key: self.inner(val) for key, val in value.items()}
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+_SEQUENCE_TYPES = {
+    list,
+    tuple,
+    collections.abc.Sequence,
+    collections.abc.MutableSequence,
+    collections.abc.Iterable,
+    collections.abc.Collection,
+}
+_MAPPING_TYPES = {dict, collections.abc.Mapping, collections.abc.MutableMapping}
+_UNION_TYPES = {Union, getattr(types, "UnionType", Union)}
+_NOT_CONVERTIBLE_MODULES = frozenset({"builtins", "typing", "abc", "collections", "collections.abc"})
+
+
+def _is_convertible(annotation: Any, register: MigrationRegistration) -> bool:
+    """
+    Check if dict passed for argument annotated with given class should be converted to instance of this class.
+    This is true for registered classes (including enums) and other classes constructed from keyword arguments,
+    but not for :py:data:`typing.Any`, builtins, not registered enums or abstract classes.
+    """
+    if annotation is Any or not inspect.isclass(annotation):
+        return False
+    if class_to_str(annotation) in register._data_dkt:
+        return True
+    if (
+        issubclass(annotation, enum.Enum)
+        or annotation.__module__ in _NOT_CONVERTIBLE_MODULES
+        or inspect.isabstract(annotation)
+    ):
+        return False
+    try:
+        parameters = inspect.signature(annotation).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return all(x.kind is not inspect.Parameter.POSITIONAL_ONLY for x in parameters)
+
+
+def _compile_converter(  # noqa: PLR0911
+    annotation: Any, register: MigrationRegistration
+) -> Optional[Callable[[Any], Any]]:
+    """
+    Create converter of raw data to objects for given annotation.
+
+    :return: converter or ``None`` if annotation does not contain class to convert to (see :py:func:`_is_convertible`).
+    """
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is None:
+        return _ClassConverter(annotation, register) if _is_convertible(annotation, register) else None
+    if origin in _UNION_TYPES:
+        not_none = [x for x in args if x is not type(None)]
+        return _compile_converter(not_none[0], register) if len(not_none) == 1 else None
+    if origin is tuple and args and (len(args) != 2 or args[1] is not Ellipsis):  # noqa: PLR2004
+        converters = [_compile_converter(x, register) for x in args]
+        if all(x is None for x in converters):
+            return None
+        return _TupleConverter([_identity if x is None else x for x in converters])
+    if origin in _SEQUENCE_TYPES and args:
+        inner = _compile_converter(args[0], register)
+        return None if inner is None else _SequenceConverter(inner)
+    if origin in _MAPPING_TYPES and len(args) == 2:  # noqa: PLR2004
+        inner = _compile_converter(args[1], register)
+        return None if inner is None else _MappingConverter(inner)
+    return None
+
+
+def update_argument(argument_name: str, register: MigrationRegistration = REGISTER):
     """
     This is decorator for move conversion of dict to class outside function code.
     It first inspects function signature to determine type th which argument should be converted.
-    Then, if argument is passed as dict then all migrations from :py:attr:`REGISTER` all applied,
+    Then, if argument is passed as dict then all migrations from ``register`` all applied,
     then object is constructed and replace base one.
 
+    Beside bare class, the annotation could be container of classes like ``List[Model]``,
+    ``Dict[str, Model]``, ``Optional[Model]``, ``Tuple[Model, ...]`` or ``Tuple[Model, Other]``.
+    Then all dicts in container are converted. Parts of container annotation without class constructed from dict
+    (like ``Dict[str, Any]`` or ``List[int]``) are passed unchanged. Converter is prepared when function
+    is decorated and migration plan is calculated once per class.
+
     :param argument_name: name of argument which should be converted
+    :param register: register used to resolve classes and migrations
 
     Example::
 
@@ -286,20 +941,31 @@ def update_argument(argument_name):
         if argument_name not in signature.parameters:  # pragma: no cover
             raise RuntimeError("Argument should be accessible using inspect module.")
         arg_index = list(signature.parameters).index(argument_name)
-        klass = signature.parameters[argument_name].annotation
-        if not inspect.isclass(klass):  # pragma: no cover
-            raise ValueError(f"Annotation {klass} of {argument_name} parameter is not a class")
+        try:
+            annotation = get_type_hints(func)[argument_name]
+        except Exception:  # pylint: disable=W0703
+            annotation = signature.parameters[argument_name].annotation
+        converter = _compile_converter(annotation, register)
+        if converter is None and annotation is not Any and inspect.isclass(annotation):
+            # bare class is always converted, only parts of containers are skipped
+            converter = _ClassConverter(annotation, register)
+        if converter is None:
+            raise ValueError(
+                f"Annotation {annotation} of {argument_name} parameter is not a class constructed from dict"
+            )
 
         @wraps(func)
         def _update_from_dict(*args, **kwargs):
-            if argument_name in kwargs and isinstance(kwargs[argument_name], dict):
-                kwargs = kwargs.copy()
-                kw = REGISTER.migrate_data(class_to_str(klass), {}, kwargs[argument_name])
-                kwargs[argument_name] = klass(**kw)
-            elif len(args) > arg_index and isinstance(args[arg_index], dict):
-                args = list(args)
-                kw = REGISTER.migrate_data(class_to_str(klass), {}, args[arg_index])
-                args[arg_index] = klass(**kw)
+            if argument_name in kwargs:
+                value = converter(kwargs[argument_name])
+                if value is not kwargs[argument_name]:
+                    kwargs = kwargs.copy()
+                    kwargs[argument_name] = value
+            elif len(args) > arg_index:
+                value = converter(args[arg_index])
+                if value is not args[arg_index]:
+                    args = list(args)
+                    args[arg_index] = value
             return func(*args, **kwargs)
 
         return _update_from_dict
@@ -314,6 +980,9 @@ def register_class(  # noqa: PLR0913
     old_paths: Optional[List[str]] = None,
     use_parent_migrations: bool = True,
     allow_errors_in_values: bool = False,
+    *,
+    memoize: bool = False,
+    pickle_support: bool = False,
 ) -> RegisterReturnType:
     """
     This is wrapper for call :py:meth:`MigrationRegistration.register` of default register instance.
@@ -326,6 +995,8 @@ def register_class(  # noqa: PLR0913
     :param use_parent_migrations: if migrations from parent class should be applied when deserialized object
     :param allow_errors_in_values: if errors in constructor kwargs should be ignored. Added to not block creating
         of custom Mapping class that could contain broken items.
+    :param memoize: if encoded form of instances should be cached and reused
+    :param pickle_support: if instances should be pickled in migration aware way
     :return: class itself if cls parameter is provided. Otherwise,
         one argument function which will consume Type to be registered.
 
@@ -348,4 +1019,13 @@ def register_class(  # noqa: PLR0913
         register_class(DataClass2, version="0.0.1", migrations=[("0.0.1", rename_key("value", "value1"))])
 
     """
-    return REGISTER.register(cls, version, migrations, old_paths, use_parent_migrations, allow_errors_in_values)
+    return REGISTER.register(
+        cls,
+        version,
+        migrations,
+        old_paths,
+        use_parent_migrations,
+        allow_errors_in_values,
+        memoize=memoize,
+        pickle_support=pickle_support,
+    )
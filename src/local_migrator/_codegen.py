@@ -0,0 +1,510 @@
+"""
+This module contains generators of specialized per-class functions used by serialization hooks.
+
+Generated functions are cached on :py:class:`~.MigrationRegistration` instance
+and dropped when class they depend on (or its parent) is registered.
+"""
+
+import collections.abc
+import contextlib
+import dataclasses
+import enum
+import keyword
+import types
+import typing
+import weakref
+
+from ._class_register import MigrationRegistration, class_to_str
+
+try:
+    from pydantic import BaseModel
+except ImportError:  # pragma: no cover
+    # allow to use in environment without pydantic.
+    class BaseModel:  # type: ignore  [no-redef]
+        pass
+
+
+try:
+    from pydantic.v1 import BaseModel as BaseModelV1
+except ImportError:
+
+    class BaseModelV1:  # type: ignore  [no-redef]
+        pass
+
+
+SKIPPED_CLASSES = frozenset(
+    {
+        "object",
+        "pydantic.main.BaseModel",
+        "pydantic.utils.Representation",
+        "enum.Enum",
+        "builtins.object",
+        "typing.Generic",
+    }
+)
+
+EncoderFunction = typing.Callable[[typing.Any], typing.Dict[str, typing.Any]]
+
+
+def class_version_dkt(cls: typing.Type, register: MigrationRegistration) -> typing.Dict[str, str]:
+    """
+    Calculate ``__class_version_dkt__`` entry for a given class.
+
+    :param cls: class of serialized object
+    :param register: register used to determine versions
+    """
+    return {
+        class_to_str(sup_obj): str(register.get_version(sup_obj))
+        for sup_obj in cls.__mro__
+        if class_to_str(sup_obj) not in SKIPPED_CLASSES and not class_to_str(sup_obj).startswith("collections.abc")
+    }
+
+
+def _attribute_access(name: str) -> str:
+    if name.isidentifier() and not keyword.iskeyword(name):
+        return f"obj.{name}"
+    return f"getattr(obj, {name!r})"  # pragma: no cover
+
+
+class _ReadOnlyDict(dict):
+    """
+    Dict shared between encoded objects (for example ``__class_version_dkt__`` prebound in encoder).
+    Modification raises :py:class:`TypeError`, so caller could not corrupt later encodings.
+    Copies (``dict(...)``, :py:meth:`copy`, pickle) are plain dicts.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *_args, **_kwargs):
+        raise TypeError("Shared encoded data could not be modified, modify a copy created with dict()")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class _EnumPayloads(dict):
+    """
+    Encoded form of enum members. Members are singletons, so payload is built once per member.
+    Payloads are shared between all encoded objects and should not be modified.
+    """
+
+    def __init__(self, cls: typing.Type[enum.Enum], register: MigrationRegistration):
+        super().__init__()
+        self._class_str = class_to_str(cls)
+        self._version_dkt = _ReadOnlyDict(class_version_dkt(cls, register))
+        for member in cls:
+            self[member] = self.__missing__(member)
+
+    def __missing__(self, member: enum.Enum) -> typing.Dict[str, typing.Any]:
+        # called for pseudo-members of flags created by combining members
+        res = _ReadOnlyDict(
+            __class__=self._class_str,
+            __class_version_dkt__=self._version_dkt,
+            __values__=_ReadOnlyDict(value=member.value),
+        )
+        self[member] = res
+        return res
+
+
+def _memoized(encoder: EncoderFunction) -> EncoderFunction:
+    """
+    Wrap encoder with cache of encoded form of instances. Cache is keyed by identity of instance
+    and entry is dropped when instance is garbage collected.
+    Instances which could not be weak referenced are encoded on each call.
+    """
+    cache: typing.Dict[int, typing.Tuple[weakref.ref, typing.Dict[str, typing.Any]]] = {}
+
+    def __encode__(obj):
+        key = id(obj)
+        entry = cache.get(key)
+        if entry is not None and entry[0]() is obj:
+            return entry[1]
+        res = encoder(obj)
+        with contextlib.suppress(TypeError):
+            ref = weakref.ref(obj, lambda _: cache.pop(key, None))
+            res = _ReadOnlyDict(res)
+            cache[key] = (ref, res)
+        return res
+
+    __encode__.__qualname__ = encoder.__qualname__
+    return __encode__
+
+
+def compile_encoder(cls: typing.Type, register: MigrationRegistration) -> typing.Optional[EncoderFunction]:
+    """
+    Generate function encoding instances of ``cls``.
+    Field names are inlined in function code and class metadata is prebound,
+    similar to how :py:mod:`dataclasses` generates ``__init__``.
+
+    Dataclasses and classes with ``as_dict`` method are supported. For enums the encoded form
+    of each member is built once and reused. If class is registered with ``memoize=True``
+    encoded form of instances is cached until instance is garbage collected.
+
+    :param cls: class for which encoder should be generated
+    :param register: register used to determine versions
+    :return: encoder function or ``None`` if class is not supported.
+    """
+    if issubclass(cls, enum.Enum):
+        return _EnumPayloads(cls, register).__getitem__
+    if issubclass(cls, (BaseModel, BaseModelV1)):
+        return None
+    if dataclasses.is_dataclass(cls):
+        values = ", ".join(f"{x.name!r}: {_attribute_access(x.name)}" for x in dataclasses.fields(cls))
+        values = f"{{{values}}}"
+    elif callable(getattr(cls, "as_dict", None)):
+        values = "obj.as_dict()"
+    else:
+        return None
+    source = (
+        "def __encode__(obj):\n"
+        f"    return {{'__class__': __class_str, '__class_version_dkt__': __version_dkt, '__values__': {values}}}\n"
+    )
+    namespace = {"__class_str": class_to_str(cls), "__version_dkt": _ReadOnlyDict(class_version_dkt(cls, register))}
+    exec(source, namespace)  # noqa: S102  # nosec
+    encoder = namespace["__encode__"]
+    encoder.__qualname__ = f"{cls.__qualname__}.__encode__"
+    if register.memoize(cls):
+        return _memoized(encoder)
+    return encoder
+
+
+def get_encoder(cls: typing.Type, register: MigrationRegistration) -> typing.Optional[EncoderFunction]:
+    """
+    Get encoder for given class from register cache. Generate it on first use.
+
+    :param cls: class for which encoder should be returned
+    :param register: register which storage cache
+    :return: encoder function or ``None`` if class is not supported.
+    """
+    try:
+        return register._encoder_cache[cls]
+    except KeyError:
+        pass
+    encoder = compile_encoder(cls, register)
+    if encoder is not None:
+        register._encoder_cache[cls] = encoder
+    return encoder
+
+
+DecoderFunction = typing.Callable[[typing.Dict[str, typing.Any]], typing.Any]
+
+
+def _cached_enum_decoder(decoder: DecoderFunction) -> DecoderFunction:
+    """
+    Wrap enum decoder with cache from saved value to member,
+    so migrations and member lookup are done once per distinct value.
+    """
+    members: typing.Dict[typing.Any, enum.Enum] = {}
+
+    def __decode__(dkt):
+        values = dkt["__values__"]
+        if len(values) != 1 or "value" not in values:
+            return decoder(dkt)
+        value = values["value"]
+        try:
+            return members[value]
+        except KeyError:
+            pass
+        except TypeError:
+            return decoder(dkt)
+        res = decoder(dkt)
+        if isinstance(res, enum.Enum):
+            members[value] = res
+        return res
+
+    __decode__.__qualname__ = decoder.__qualname__
+    return __decode__
+
+
+def compile_decoder(
+    class_str: str,
+    class_str_to_version_dkt: typing.Dict[str, str],
+    register: MigrationRegistration,
+    check_errors: bool = True,
+) -> DecoderFunction:
+    """
+    Generate function restoring object of a given class serialized with given versions.
+    Generated function performs check for errors in values, applies flattened and fused list of migrations
+    (see :py:meth:`~.MigrationRegistration.migration_plan`) and calls class constructor.
+
+    Decoders of enums cache restored member per saved value.
+    If dict is marked with ``__schema__`` key, statically typed fields are restored
+    from values dicts after migrations (see :py:func:`strip_values`).
+
+    Generated function consumes normalized dict (with ``__class__``, ``__class_version_dkt__``
+    and ``__values__`` keys). If restoring fails then ``"__error__"`` key is set in this dict and it is returned.
+
+    :param class_str: fully qualified class path (current or old one)
+    :param class_str_to_version_dkt: for each parent class information about version during serialization
+    :param register: register used to resolve class and migrations
+    :param check_errors: if values should be scanned for objects that failed to restore.
+        Could be disabled if caller already knows that there are no such values (see :py:class:`DecodeContext`).
+    :raises ValueError: if class could not be found
+    """
+    try:
+        cls = register.get_class(class_str)
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"Class {class_str} not found in register.") from e
+    migrations = register.migration_plan(class_str, class_str_to_version_dkt, fuse=True)
+    namespace: typing.Dict[str, typing.Any] = {"__cls": cls}
+    lines = ["def __decode__(dkt):", "    values = dkt['__values__']"]
+    if check_errors and not register.allow_errors_in_values(class_str):
+        lines += [
+            (
+                "    problematic_fields = [key for key, value in values.items() "
+                "if isinstance(value, dict) and '__error__' in value]"
+            ),
+            "    if problematic_fields:",
+            "        dkt['__error__'] = f\"Error in fields: {', '.join(problematic_fields)}\"",
+            "        return dkt",
+        ]
+    lines.append("    try:")
+    for i, migration in enumerate(migrations):
+        namespace[f"__migration_{i}"] = migration
+        lines.append(f"        values = __migration_{i}(values)")
+    schema = get_class_schema(cls, register)
+    if schema:
+        namespace.update(__schema=schema, __register=register, __restore_values=restore_values)
+        lines += [
+            "        if '__schema__' in dkt:",
+            "            values = __restore_values(__schema, values, dkt['__class_version_dkt__'], __register)",
+        ]
+    lines += [
+        "        return __cls(**values)",
+        "    except Exception as e:",
+        "        dkt['__error__'] = str(e)",
+        "        return dkt",
+    ]
+    exec("\n".join(lines), namespace)  # noqa: S102  # nosec
+    decoder = namespace["__decode__"]
+    decoder.__qualname__ = f"{cls.__qualname__}.__decode__"
+    if issubclass(cls, enum.Enum):
+        return _cached_enum_decoder(decoder)
+    return decoder
+
+
+def get_decoder(
+    class_str: str,
+    class_str_to_version_dkt: typing.Dict[str, str],
+    register: MigrationRegistration,
+    check_errors: bool = True,
+) -> DecoderFunction:
+    """
+    Get decoder for given class and versions from register cache. Generate it on first use.
+
+    :param class_str: fully qualified class path (current or old one)
+    :param class_str_to_version_dkt: for each parent class information about version during serialization
+    :param register: register which storage cache
+    :param check_errors: if values should be scanned for objects that failed to restore
+    :raises ValueError: if class could not be found
+    """
+    key = (class_str, tuple(class_str_to_version_dkt.items()), check_errors)
+    try:
+        return register._decoder_cache[key]
+    except KeyError:
+        pass
+    decoder = compile_decoder(class_str, class_str_to_version_dkt, register, check_errors)
+    register._decoder_cache[key] = decoder
+    return decoder
+
+
+def _is_schema_class(cls: typing.Type) -> bool:
+    """Check if instances of class are encoded with class metadata, which could be omitted in schema mode."""
+    return (
+        dataclasses.is_dataclass(cls)
+        or issubclass(cls, (enum.Enum, BaseModel, BaseModelV1))
+        or callable(getattr(cls, "as_dict", None))
+    )
+
+
+class _ClassSchema:
+    """Statically typed field holding instance of concrete class."""
+
+    __slots__ = ("class_str", "klass")
+
+    def __init__(self, klass: typing.Type):
+        self.klass = klass
+        self.class_str = class_to_str(klass)
+
+    def strip(self, value: typing.Any, versions: typing.Dict[str, str], register: MigrationRegistration) -> typing.Any:
+        if value.__class__ is not self.klass:
+            # instance of subclass or other type, encoded with class metadata
+            return value
+        encoder = get_encoder(self.klass, register)
+        if encoder is None:
+            dkt = {"__class_version_dkt__": class_version_dkt(self.klass, register), "__values__": dict(value)}
+        else:
+            dkt = encoder(value)
+        versions.update(dkt["__class_version_dkt__"])
+        return strip_values(self.klass, dkt["__values__"], versions, register)
+
+    def restore(
+        self, value: typing.Any, versions: typing.Dict[str, str], register: MigrationRegistration
+    ) -> typing.Any:
+        if not isinstance(value, dict) or "__class__" in value:
+            return value
+        dkt = {"__class__": self.class_str, "__class_version_dkt__": versions, "__values__": value, "__schema__": 1}
+        res = get_decoder(self.class_str, versions, register)(dkt)
+        if res is dkt:
+            raise ValueError(f"Could not restore {self.class_str}: {dkt['__error__']}")
+        return res
+
+
+class _SequenceSchema:
+    """List or tuple of elements of single type."""
+
+    __slots__ = ("inner",)
+
+    def __init__(self, inner: typing.Any):
+        self.inner = inner
+
+    def strip(self, value: typing.Any, versions: typing.Dict[str, str], register: MigrationRegistration) -> typing.Any:
+        if not isinstance(value, (list, tuple)):
+            return value
+        return [self.inner.strip(x, versions, register) for x in value]
+
+    def restore(
+        self, value: typing.Any, versions: typing.Dict[str, str], register: MigrationRegistration
+    ) -> typing.Any:
+        if not isinstance(value, list):
+            return value
+        return [self.inner.restore(x, versions, register) for x in value]
+
+
+class _MappingSchema:
+    """Dict with values of single type."""
+
+    __slots__ = ("inner",)
+
+    def __init__(self, inner: typing.Any):
+        self.inner = inner
+
+    def strip(self, value: typing.Any, versions: typing.Dict[str, str], register: MigrationRegistration) -> typing.Any:
+        if not isinstance(value, dict):
+            return value
+        return {key: self.inner.strip(val, versions, register) for key, val in value.items()}
+
+    def restore(
+        self, value: typing.Any, versions: typing.Dict[str, str], register: MigrationRegistration
+    ) -> typing.Any:
+        if not isinstance(value, dict) or "__class__" in value:
+            return value
+        return {key: self.inner.restore(val, versions, register) for key, val in value.items()}
+
+
+_SchemaNode = typing.Union[_ClassSchema, _SequenceSchema, _MappingSchema]
+
+
+def _compile_schema(annotation: typing.Any) -> typing.Optional[_SchemaNode]:  # noqa: PLR0911
+    """
+    Create schema node for annotation, similar to converters used by :py:func:`~.update_argument`.
+
+    :return: schema node or ``None`` if type of value is not determined by annotation.
+    """
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is None:
+        if isinstance(annotation, type) and _is_schema_class(annotation):
+            return _ClassSchema(annotation)
+        return None
+    if origin is typing.Union or (hasattr(types, "UnionType") and origin is types.UnionType):
+        not_none = [x for x in args if x is not type(None)]
+        return _compile_schema(not_none[0]) if len(not_none) == 1 else None
+    if origin in {list, tuple, collections.abc.Sequence, collections.abc.MutableSequence} and args:
+        if origin is tuple and (len(args) != 2 or args[1] is not Ellipsis):  # noqa: PLR2004
+            return None
+        inner = _compile_schema(args[0])
+        return None if inner is None else _SequenceSchema(inner)
+    if origin in {dict, collections.abc.Mapping, collections.abc.MutableMapping} and len(args) == 2:  # noqa: PLR2004
+        inner = _compile_schema(args[1])
+        return None if inner is None else _MappingSchema(inner)
+    return None
+
+
+def _field_annotations(cls: typing.Type) -> typing.Dict[str, typing.Any]:
+    if issubclass(cls, enum.Enum):
+        return {}
+    try:
+        if dataclasses.is_dataclass(cls):
+            hints = typing.get_type_hints(cls)
+            return {x.name: hints[x.name] for x in dataclasses.fields(cls) if x.name in hints}
+        if issubclass(cls, (BaseModel, BaseModelV1)):
+            hints = typing.get_type_hints(cls)
+            fields = getattr(cls, "model_fields", None) or getattr(cls, "__fields__", {})
+            return {name: hints[name] for name in fields if name in hints}
+        hints = typing.get_type_hints(cls.__init__)
+    except Exception:  # pylint: disable=W0703
+        # unresolved forward references
+        return {}
+    hints.pop("return", None)
+    return hints
+
+
+def get_class_schema(cls: typing.Type, register: MigrationRegistration) -> typing.Dict[str, _SchemaNode]:
+    """
+    Get schema nodes for statically typed fields of class (fields annotated with concrete class
+    or container of concrete class). Cached in register.
+
+    :param cls: class for which schema should be returned
+    :param register: register which storage cache
+    """
+    try:
+        return register._schema_cache[cls]
+    except KeyError:
+        pass
+    schema = {}
+    for name, annotation in _field_annotations(cls).items():
+        node = _compile_schema(annotation)
+        if node is not None:
+            schema[name] = node
+    register._schema_cache[cls] = schema
+    return schema
+
+
+def strip_values(
+    cls: typing.Type,
+    values: typing.Dict[str, typing.Any],
+    versions: typing.Dict[str, str],
+    register: MigrationRegistration,
+) -> typing.Dict[str, typing.Any]:
+    """
+    Replace instances in statically typed fields of values dict with their values dicts.
+    Versions of omitted classes are added to ``versions``.
+
+    :param cls: class of object
+    :param values: encoded values of object, not modified
+    :param versions: version dict to be updated
+    :param register: register used to determine versions
+    :return: new values dict
+    """
+    schema = get_class_schema(cls, register)
+    if not schema:
+        return values
+    values = dict(values)
+    for name, node in schema.items():
+        if name in values:
+            values[name] = node.strip(values[name], versions, register)
+    return values
+
+
+def restore_values(
+    schema: typing.Dict[str, _SchemaNode],
+    values: typing.Dict[str, typing.Any],
+    versions: typing.Dict[str, str],
+    register: MigrationRegistration,
+) -> typing.Dict[str, typing.Any]:
+    """
+    Restore instances in statically typed fields from values dicts. Inverse of :py:func:`strip_values`.
+
+    :param schema: schema of class (see :py:func:`get_class_schema`)
+    :param values: values of object after migrations
+    :param versions: version dict of object containing versions of omitted classes
+    :param register: register used to resolve migrations
+    """
+    values = dict(values)
+    for name, node in schema.items():
+        if name in values:
+            values[name] = node.restore(values[name], versions, register)
+    return values
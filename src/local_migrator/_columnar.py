@@ -0,0 +1,225 @@
+"""
+This module contains columnar encoding of lists of objects of single registered class.
+"""
+
+import base64
+import dataclasses
+import enum
+import typing
+from collections.abc import Sequence
+
+from ._class_register import REGISTER, MigrationOperation, MigrationRegistration, class_to_str, fuse_migrations
+from ._codegen import class_version_dkt
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    # allow to use in environment without numpy, columns are stored as lists then.
+    np = None
+
+_NUMERIC_TYPES = {bool: "bool", int: "int64", float: "float64"}
+
+
+def _compact_column(column: typing.List[typing.Any]) -> typing.Any:
+    """
+    Convert column of python numbers of single type to numpy array
+    and column of enums or dataclasses of single class to nested :py:class:`ColumnarList`.
+    Other columns are returned untouched.
+    """
+    if not column:
+        return column
+    types = set(map(type, column))
+    if len(types) != 1:
+        return column
+    type_ = types.pop()
+    if issubclass(type_, enum.Enum) or dataclasses.is_dataclass(type_):
+        return ColumnarList(column, type_)
+    dtype = _NUMERIC_TYPES.get(type_)
+    if np is None or dtype is None:
+        return column
+    try:
+        return np.array(column, dtype=dtype)
+    except OverflowError:
+        return column
+
+
+def _encode_column(column: typing.Any) -> typing.Any:
+    if np is None or not isinstance(column, np.ndarray):
+        return column
+    return {"dtype": column.dtype.str, "data": base64.b64encode(column.tobytes()).decode("ascii")}
+
+
+def _decode_column(column: typing.Any) -> typing.Any:
+    if isinstance(column, dict):
+        if np is None:  # pragma: no cover
+            raise RuntimeError("numpy package is required to decode binary columns")
+        return np.frombuffer(base64.b64decode(column["data"]), dtype=np.dtype(column["dtype"]))
+    return column
+
+
+def _extract_columns(cls: typing.Type, items: typing.List[typing.Any]) -> typing.Dict[str, typing.List[typing.Any]]:
+    if issubclass(cls, enum.Enum):
+        return {"value": [x.value for x in items]}
+    if dataclasses.is_dataclass(cls):
+        return {field.name: [getattr(x, field.name) for x in items] for field in dataclasses.fields(cls)}
+    if hasattr(cls, "as_dict"):
+        rows = [x.as_dict() for x in items]
+        return {name: [row[name] for row in rows] for name in (rows[0] if rows else {})}
+    raise TypeError(f"Class {class_to_str(cls)} is not supported by columnar encoding")
+
+
+class ColumnarList(Sequence):
+    """
+    Sequence of objects of single class (dataclass, enum or class with ``as_dict`` method)
+    stored as one column per field. Columns of python ``bool``, ``int`` or ``float`` values are stored
+    as :py:class:`numpy.ndarray` and saved in binary form. Objects are constructed on indexing.
+
+    Wrapping list in this class before saving enables columnar encoding: single header
+    and a column per field instead of separate dict per element. Decoding produces :py:class:`ColumnarList`
+    again, migrations are applied once per column (see :py:meth:`.MigrationOperation.apply_columns`).
+    Migrations which do not support columns are applied per element.
+
+    :param items: objects of the same class
+    :param cls: class of objects, required if ``items`` is empty
+
+    Example::
+
+        dump_file({"labels": ColumnarList(labels)}, "labels.json")
+        labels = load_file("labels.json")["labels"]
+        labels[10]  # constructed on access
+    """
+
+    def __init__(self, items: typing.Iterable[typing.Any] = (), cls: typing.Optional[typing.Type] = None):
+        items = list(items)
+        if cls is None:
+            if not items:
+                raise ValueError("cls is required for empty list")
+            cls = type(items[0])
+        if any(type(x) is not cls for x in items):
+            raise TypeError(f"All elements should be instances of {class_to_str(cls)}")
+        columns = {name: _compact_column(column) for name, column in _extract_columns(cls, items).items()}
+        self._set_state(cls, columns, len(items))
+
+    def _set_state(self, cls: typing.Type, columns: typing.Dict[str, typing.Any], length: int):
+        self._cls = cls
+        self._columns = columns
+        self._length = length
+        self._getters = [
+            (name, column.item if np is not None and isinstance(column, np.ndarray) else column.__getitem__)
+            for name, column in columns.items()
+        ]
+
+    @classmethod
+    def from_columns(cls, klass: typing.Type, columns: typing.Dict[str, typing.Any], length: int) -> "ColumnarList":
+        """
+        Create sequence from columns.
+
+        :param klass: class of objects
+        :param columns: mapping from field name to list or :py:class:`numpy.ndarray` of values
+        :param length: number of objects
+        """
+        res = cls.__new__(cls)
+        res._set_state(klass, columns, length)
+        return res
+
+    @property
+    def element_class(self) -> typing.Type:
+        """Class of elements."""
+        return self._cls
+
+    @property
+    def columns(self) -> typing.Dict[str, typing.Any]:
+        """Mapping from field name to column. Should not be modified."""
+        return self._columns
+
+    def structured_array(self) -> "np.ndarray":
+        """
+        Return numeric columns as numpy structured array.
+
+        :raises ValueError: if some column is not numeric
+        """
+        if np is None:  # pragma: no cover
+            raise RuntimeError("numpy package is required to create structured array")
+        not_numeric = [name for name, column in self._columns.items() if not isinstance(column, np.ndarray)]
+        if not_numeric:
+            raise ValueError(f"Columns {', '.join(not_numeric)} are not numeric")
+        res = np.empty(self._length, dtype=[(name, column.dtype) for name, column in self._columns.items()])
+        for name, column in self._columns.items():
+            res[name] = column
+        return res
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            indices = range(self._length)[item]
+            columns = {name: column[item] for name, column in self._columns.items()}
+            return ColumnarList.from_columns(self._cls, columns, len(indices))
+        index = range(self._length)[item]
+        return self._cls(**{name: getter(index) for name, getter in self._getters})
+
+    def tolist(self) -> typing.List[typing.Any]:
+        """Construct all elements."""
+        columns = {
+            name: column if isinstance(column, list) else column.tolist() for name, column in self._columns.items()
+        }
+        return [self._cls(**dict(zip(columns, values))) for values in zip(*columns.values())]
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(x == y for x, y in zip(self, other))
+
+    __hash__ = None  # type: ignore  [assignment]
+
+    def __repr__(self):
+        return f"ColumnarList({class_to_str(self._cls)}, length={self._length})"
+
+    def encode(self, register: MigrationRegistration = REGISTER) -> typing.Dict[str, typing.Any]:
+        """
+        Encode as dict with class information, number of elements and columns.
+
+        :param register: register used to determine versions of class
+        """
+        return {
+            "__columnar__": class_to_str(self._cls),
+            "__class_version_dkt__": class_version_dkt(self._cls, register),
+            "length": self._length,
+            "columns": {name: _encode_column(column) for name, column in self._columns.items()},
+        }
+
+
+def _migrate_columns(
+    plan: typing.List[typing.Any], columns: typing.Dict[str, typing.Any], length: int
+) -> typing.Dict[str, typing.Any]:
+    """
+    Apply leading migrations supporting columns to whole columns.
+    Remaining migrations are applied to each element separately.
+    """
+    num = 0
+    while num < len(plan) and isinstance(plan[num], MigrationOperation) and plan[num].apply_columns(columns, length):
+        num += 1
+    if num == len(plan):
+        return columns
+    lists = [column if isinstance(column, list) else column.tolist() for column in columns.values()]
+    rows = [dict(zip(columns, values)) for values in zip(*lists)]
+    for migration in fuse_migrations(plan[num:]):
+        rows = [migration(row) for row in rows]
+    names = rows[0] if rows else columns
+    return {name: _compact_column([row[name] for row in rows]) for name in names}
+
+
+def decode_columnar(dkt: typing.Dict[str, typing.Any], register: MigrationRegistration = REGISTER) -> ColumnarList:
+    """
+    Restore :py:class:`ColumnarList` from output of :py:meth:`ColumnarList.encode`, applying migrations.
+
+    :param dkt: encoded columns
+    :param register: register used to resolve class and migrations
+    """
+    class_str = dkt["__columnar__"]
+    version_dkt = dkt.get("__class_version_dkt__", {class_str: "0.0.0"})
+    cls = register.get_class(class_str)
+    columns = {name: _decode_column(column) for name, column in dkt["columns"].items()}
+    columns = _migrate_columns(register.migration_plan(class_str, version_dkt), columns, dkt["length"])
+    return ColumnarList.from_columns(cls, columns, dkt["length"])
@@ -0,0 +1,300 @@
+"""
+This module contains framed compressed container format. Each top level record is encoded
+and compressed separately, so single record could be read without decompressing the whole file.
+
+Layout of file::
+
+    MAGIC
+    header length (uint32) | header (json with codec, format, kind and fingerprint)
+    frame 0 | frame 1 | ...
+    index (json with frame offsets and sizes and list of classes)
+    index offset (uint64) | index length (uint64) | MAGIC
+"""
+
+import gzip
+import json
+import lzma
+import os
+import struct
+import typing
+from pathlib import Path
+
+from ._class_register import REGISTER, MigrationRegistration
+from ._hooks import make_hooks
+from ._io import PathType, _replace, _temporary_file, cbor2, loads
+from ._serialize_hooks import ClassCollector, DecodeContext, Encoder
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    # allow to use in environment without zstandard.
+    zstandard = None
+
+MAGIC = b"LMCONT1\n"
+_HEADER_LEN = struct.Struct("<I")
+_TRAILER = struct.Struct("<QQ")
+_FINGERPRINT_PLACEHOLDER = "0" * 64
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor().compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+CODECS: typing.Dict[str, typing.Tuple[typing.Callable[[bytes], bytes], typing.Callable[[bytes], bytes]]] = {
+    "none": (bytes, bytes),
+    "gzip": (gzip.compress, gzip.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+"""Mapping from name of codec to pair of compress and decompress functions."""
+
+if zstandard is not None:
+    CODECS["zstd"] = (_zstd_compress, _zstd_decompress)
+
+
+def _get_codec(codec: str) -> typing.Tuple[typing.Callable[[bytes], bytes], typing.Callable[[bytes], bytes]]:
+    try:
+        return CODECS[codec]
+    except KeyError:
+        raise ValueError(f"Unknown or unavailable codec {codec}. Available codecs: {', '.join(CODECS)}") from None
+
+
+class ContainerWriter:
+    """
+    Write records to compressed container one by one. Data are written to temporary file
+    which replaces destination on :py:meth:`close`, so the destination file is never partially written.
+
+    :param path: path to destination file
+    :param format_: ``"json"`` or ``"cbor"``, format of single record
+    :param codec: name of compression codec, one of :py:data:`CODECS`
+    :param kind: ``"list"`` if records are stored by position or ``"dict"`` if records are stored by key
+    :param register: register used to encode records and to calculate fingerprint of classes
+
+    Example::
+
+        with ContainerWriter("session.lmc", codec="zstd") as writer:
+            for record in records:
+                writer.append(record)
+    """
+
+    def __init__(
+        self,
+        path: PathType,
+        format_: str = "json",
+        codec: str = "gzip",
+        kind: str = "list",
+        register: MigrationRegistration = REGISTER,
+    ):
+        if format_ not in {"json", "cbor"}:
+            raise ValueError(f"Unknown format {format_}")
+        if format_ == "cbor" and cbor2 is None:  # pragma: no cover
+            raise RuntimeError("cbor2 package is required to handle cbor files")
+        if kind not in {"list", "dict", "object"}:
+            raise ValueError(f"Unknown kind {kind}")
+        self._compress = _get_codec(codec)[0]
+        self.path = Path(path)
+        self.header = {"codec": codec, "format": format_, "kind": kind, "fingerprint": _FINGERPRINT_PLACEHOLDER}
+        self._register = register
+        self._collector = ClassCollector(make_hooks(register).encoder)
+        self._json_encoder = Encoder(encoder=self._collector.encode)
+        self._frames: typing.List[typing.Tuple[typing.Optional[str], int, int]] = []
+        self._file = _temporary_file(self.path)
+        try:
+            self._file.write(MAGIC)
+            self._write_header()
+        except BaseException:
+            self.abort()
+            raise
+
+    def _write_header(self):
+        header = json.dumps(self.header).encode("utf-8")
+        self._file.write(_HEADER_LEN.pack(len(header)))
+        self._file.write(header)
+
+    def _encode(self, record: typing.Any) -> bytes:
+        if self.header["format"] == "cbor":
+            return cbor2.dumps(record, default=self._collector.cbor_encoder)
+        return self._json_encoder.encode(record).encode("utf-8")
+
+    def append(self, record: typing.Any, key: typing.Optional[str] = None):
+        """
+        Encode, compress and write single record.
+
+        :param record: object to be saved
+        :param key: key of record. Required if ``kind`` is ``"dict"``.
+        """
+        if (key is None) != (self.header["kind"] != "dict"):
+            raise ValueError("key has to be provided if and only if kind of container is dict")
+        if self.header["kind"] == "object" and self._frames:
+            raise ValueError("container of kind object could contain only one record")
+        data = self._compress(self._encode(record))
+        self._frames.append((key, self._file.tell(), len(data)))
+        self._file.write(data)
+
+    def close(self):
+        """Write index, fill fingerprint in header and replace destination file."""
+        try:
+            index = json.dumps({"classes": sorted(self._collector.classes), "frames": self._frames}).encode("utf-8")
+            index_offset = self._file.tell()
+            self._file.write(index)
+            self._file.write(_TRAILER.pack(index_offset, len(index)))
+            self._file.write(MAGIC)
+            # fingerprint has fixed length, so header could be overwritten in place
+            self.header["fingerprint"] = self._register.fingerprint(self._collector.classes)
+            self._file.seek(len(MAGIC))
+            self._write_header()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        except BaseException:
+            self.abort()
+            raise
+        _replace(self._file.name, self.path)
+
+    def abort(self):
+        """Discard written data. Destination file is not modified."""
+        self._file.close()
+        os.unlink(self._file.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ContainerReader:
+    """
+    Read records from compressed container. Only index is read on opening,
+    records are decompressed and decoded on access.
+
+    :param path: path to container file
+    :param hooks: if :py:func:`object_hook` should be used to restore objects.
+    :param register: register used to restore objects and to check fingerprint of classes
+
+    Example::
+
+        with ContainerReader("session.lmc") as reader:
+            last = reader[len(reader) - 1]
+    """
+
+    def __init__(self, path: PathType, hooks: bool = True, register: MigrationRegistration = REGISTER):
+        self.path = Path(path)
+        self.hooks = hooks
+        self._register = register
+        self._file = open(self.path, "rb")  # noqa: SIM115
+        try:
+            self._read_index()
+        except BaseException:
+            self._file.close()
+            raise
+        self._decompress = _get_codec(self.header["codec"])[1]
+
+    def _read_index(self):
+        if self._file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"File {self.path} is not a container file")
+        (header_len,) = _HEADER_LEN.unpack(self._file.read(_HEADER_LEN.size))
+        self.header: typing.Dict[str, str] = json.loads(self._file.read(header_len))
+        self._file.seek(-(_TRAILER.size + len(MAGIC)), os.SEEK_END)
+        index_offset, index_len = _TRAILER.unpack(self._file.read(_TRAILER.size))
+        if self._file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Container file {self.path} is truncated")
+        self._file.seek(index_offset)
+        index = json.loads(self._file.read(index_len))
+        self.classes: typing.List[str] = index["classes"]
+        self._frames: typing.List[typing.Tuple[typing.Optional[str], int, int]] = [tuple(x) for x in index["frames"]]
+        self._keys = {key: i for i, (key, _, _) in enumerate(self._frames)}
+
+    @property
+    def up_to_date(self) -> bool:
+        """If fingerprint of classes stored in container matches current register, so no migration is needed."""
+        return self._register.fingerprint(self.classes) == self.header["fingerprint"]
+
+    def __len__(self):
+        return len(self._frames)
+
+    def keys(self) -> typing.List[str]:
+        """Keys of records if kind of container is ``"dict"``."""
+        return [key for key, _, _ in self._frames]
+
+    def _read_frame(self, num: int) -> typing.Any:
+        _, offset, size = self._frames[num]
+        self._file.seek(offset)
+        data = self._decompress(self._file.read(size))
+        return loads(data, self.header["format"], self.hooks, DecodeContext(self._register))
+
+    def __getitem__(self, item: typing.Union[int, str]) -> typing.Any:
+        """Read record by position or by key."""
+        if isinstance(item, str):
+            return self._read_frame(self._keys[item])
+        return self._read_frame(range(len(self._frames))[item])
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        for i in range(len(self._frames)):
+            yield self._read_frame(i)
+
+    def load(self) -> typing.Any:
+        """Read whole content of container as it was passed to :py:func:`dump_container`."""
+        if self.header["kind"] == "dict":
+            return {key: self._read_frame(i) for i, key in enumerate(self.keys())}
+        if self.header["kind"] == "object":
+            return self._read_frame(0)
+        return list(self)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def dump_container(
+    obj: typing.Any,
+    path: PathType,
+    format_: str = "json",
+    codec: str = "gzip",
+    register: MigrationRegistration = REGISTER,
+):
+    """
+    Atomically save data to compressed container. Each element of list or value of dict with string keys
+    is stored as separate record, which could be read with :py:class:`ContainerReader`.
+    Other objects are stored as single record.
+
+    :param obj: object to be saved
+    :param path: path to file
+    :param format_: ``"json"`` or ``"cbor"``, format of single record
+    :param codec: name of compression codec, one of :py:data:`CODECS`
+    :param register: register used to encode objects
+    """
+    if isinstance(obj, (list, tuple)):
+        with ContainerWriter(path, format_, codec, "list", register) as writer:
+            for record in obj:
+                writer.append(record)
+    elif isinstance(obj, dict) and all(isinstance(x, str) for x in obj):
+        with ContainerWriter(path, format_, codec, "dict", register) as writer:
+            for key, record in obj.items():
+                writer.append(record, key)
+    else:
+        with ContainerWriter(path, format_, codec, "object", register) as writer:
+            writer.append(obj)
+
+
+def load_container(path: PathType, hooks: bool = True, register: MigrationRegistration = REGISTER) -> typing.Any:
+    """
+    Load data from compressed container saved with :py:func:`dump_container`.
+
+    :param path: path to file
+    :param hooks: if :py:func:`object_hook` should be used to restore objects.
+    :param register: register used to restore objects
+    """
+    with ContainerReader(path, hooks, register) as reader:
+        return reader.load()
@@ -0,0 +1,266 @@
+"""
+This module contains incremental saving of data which changes slowly, for example autosave of session.
+
+Each registered object is stored as separate node and objects reference each other by node id
+(``{"__node__": id}``). File is a log of blocks. First block is full snapshot, each next block contains
+only nodes which changed since previous save. Block is a sequence of lines terminated by ``.`` line::
+
+    LMDELTA1
+    n 0 {"__class__": ..., "__values__": {...}}
+    n 1 {"__class__": ..., "__values__": {"child": {"__node__": 0}}}
+    r {"session": {"__node__": 1}}
+    .
+    n 2 {...}
+    n 3 {...}
+    d 1
+    r {"session": {"__node__": 3}}
+    .
+
+Changed node gets new id, so its parents change too and nodes always reference nodes with smaller ids.
+"""
+
+import json
+import os
+import typing
+from pathlib import Path
+
+from ._io import PathType, write_atomic
+from ._serialize_hooks import Encoder, object_encoder, object_hook
+
+MAGIC = "LMDELTA1"
+_NODE_KEY = "__node__"
+
+
+class _Node:
+    __slots__ = ("children", "node_id", "obj", "text")
+
+    def __init__(self, obj: typing.Any, node_id: int, text: str, children: typing.Tuple[int, ...]):
+        self.obj = obj  # kept to prevent reuse of its id
+        self.node_id = node_id
+        self.text = text
+        self.children = children  # keys of referenced nodes
+
+
+class DeltaWriter:
+    """
+    Save consecutive states of data to single file, writing only registered objects
+    which changed since previous save.
+
+    On each :py:meth:`save` registered objects are encoded without their registered children
+    (they are replaced by node references) and compared with their form from previous save.
+    Objects are matched between saves by identity. Only changed objects and their ancestors are appended
+    to the log, so the amount of written data is proportional to the change, not to the size of data.
+
+    By default every object is encoded on each save to detect changes, so time of save is proportional
+    to the size of data. If the caller knows which objects were modified, it should pass them as ``changed``
+    argument of :py:meth:`save`. Then only these objects and their ancestors are encoded.
+
+    Log is compacted into single snapshot (written atomically) when it contains ``compact_every`` deltas
+    or when it becomes larger than the snapshot.
+
+    :param path: path to file
+    :param compact_every: maximum number of deltas stored after snapshot
+    :param fsync: if each delta should be flushed to disk
+
+    Example::
+
+        writer = DeltaWriter("session.lmd")
+        while running:
+            writer.save(session)
+            time.sleep(5)
+        session = load_delta("session.lmd")
+    """
+
+    def __init__(self, path: PathType, compact_every: int = 100, fsync: bool = True):
+        self.path = Path(path)
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._nodes: typing.Dict[int, _Node] = {}
+        self._root_text: typing.Optional[str] = None
+        self._next_id = 0
+        self._deltas = 0
+        self._snapshot_size = 0
+        self._log_size = 0
+        self._json_encoder = Encoder(separators=(",", ":"), check_circular=False, encoder=self._encode_object)
+        self._current: typing.Dict[int, _Node] = {}
+        self._in_progress: typing.Set[int] = set()
+        self._children: typing.List[typing.List[int]] = []
+        self._stale: typing.Optional[typing.Set[int]] = None
+
+    def _reference(self, key: int, node: _Node) -> typing.Dict[str, int]:
+        if self._children:
+            self._children[-1].append(key)
+        return {_NODE_KEY: node.node_id}
+
+    def _reuse(self, key: int):
+        """Keep node from previous save together with its descendants, without encoding them."""
+        stack = [key]
+        while stack:
+            key = stack.pop()
+            if key not in self._current:
+                node = self._nodes[key]
+                self._current[key] = node
+                stack.extend(node.children)
+
+    def _encode_object(self, obj: typing.Any) -> typing.Any:
+        key = id(obj)
+        node = self._current.get(key)
+        if node is not None:
+            return self._reference(key, node)
+        node = self._nodes.get(key)
+        if node is not None and self._stale is not None and key not in self._stale and node.obj is obj:
+            self._reuse(key)
+            return self._reference(key, node)
+        res = object_encoder(obj)
+        if not isinstance(res, dict) or "__class__" not in res:
+            return res
+        if key in self._in_progress:
+            raise ValueError(f"Cycle of objects detected on object of class {res['__class__']}")
+        self._in_progress.add(key)
+        self._children.append([])
+        try:
+            text = self._json_encoder.encode(res)
+        finally:
+            self._in_progress.discard(key)
+            children = tuple(self._children.pop())
+        if node is None or node.text != text:
+            node = _Node(obj, self._next_id, text, children)
+            self._next_id += 1
+        self._current[key] = node
+        return self._reference(key, node)
+
+    def _ancestors(self, keys: typing.Set[int]) -> typing.Set[int]:
+        """Keys of nodes from previous save which are given nodes or reference them, directly or not."""
+        parents: typing.Dict[int, typing.List[int]] = {}
+        for key, node in self._nodes.items():
+            for child in node.children:
+                parents.setdefault(child, []).append(key)
+        res: typing.Set[int] = set()
+        stack = [x for x in keys if x in self._nodes]
+        while stack:
+            key = stack.pop()
+            if key not in res:
+                res.add(key)
+                stack.extend(parents.get(key, ()))
+        return res
+
+    def save(self, obj: typing.Any, changed: typing.Optional[typing.Iterable[typing.Any]] = None) -> int:
+        """
+        Save current state of data.
+
+        :param obj: data to be saved, the same structure should be passed on each call
+        :param changed: registered objects modified since previous save. If provided then only these objects
+            and their ancestors are encoded, other objects from previous save are reused without encoding.
+            Objects newly attached to modified ones are encoded too. Modification of object
+            not listed here is not saved. If ``None`` then every object is encoded and compared
+            with previous save, which costs time proportional to the size of data.
+        :return: number of written nodes
+        """
+        self._current = {}
+        if changed is not None:
+            self._stale = self._ancestors({id(x) for x in changed})
+        try:
+            root_text = self._json_encoder.encode(obj)
+        except BaseException:
+            self._current = {}
+            self._in_progress = set()
+            self._children = []
+            raise
+        finally:
+            self._stale = None
+        old_ids = {node.node_id for node in self._nodes.values()}
+        self._nodes, self._current = self._current, {}
+        if self._root_text is None:
+            self._root_text = root_text
+            self.compact()
+            return len(self._nodes)
+
+        new_ids = {node.node_id for node in self._nodes.values()}
+        changed = [node for node in self._nodes.values() if node.node_id not in old_ids]
+        root_changed = root_text != self._root_text
+        self._root_text = root_text
+        if not changed and not root_changed and old_ids == new_ids:
+            return 0
+        lines = [f"n {node.node_id} {node.text}\n" for node in changed]
+        lines.extend(f"d {node_id}\n" for node_id in sorted(old_ids - new_ids))
+        if root_changed:
+            lines.append(f"r {root_text}\n")
+        lines.append(".\n")
+        block = "".join(lines).encode("ascii")
+        if self._deltas + 1 >= self.compact_every or self._log_size + len(block) > self._snapshot_size:
+            self.compact()
+            return len(changed)
+        with open(self.path, "ab") as f_p:
+            f_p.write(block)
+            if self.fsync:
+                f_p.flush()
+                os.fsync(f_p.fileno())
+        self._log_size += len(block)
+        self._deltas += 1
+        return len(changed)
+
+    def compact(self):
+        """Replace log with single snapshot of last saved state."""
+        if self._root_text is None:
+            raise ValueError("Nothing was saved yet")
+        lines = [f"{MAGIC}\n"]
+        lines.extend(f"n {node.node_id} {node.text}\n" for node in self._nodes.values())
+        lines.append(f"r {self._root_text}\n.\n")
+        data = "".join(lines).encode("ascii")
+        write_atomic(self.path, data)
+        self._snapshot_size = len(data)
+        self._log_size = 0
+        self._deltas = 0
+
+
+def _replay(path: PathType) -> typing.Tuple[typing.Dict[int, str], str]:
+    """Apply all complete blocks of log. Return final texts of nodes and root."""
+    with open(path, encoding="ascii") as f_p:
+        if f_p.readline() != f"{MAGIC}\n":
+            raise ValueError(f"File {path} is not a delta log")
+        nodes: typing.Dict[int, str] = {}
+        root: typing.Optional[str] = None
+        block: typing.List[str] = []
+        for line in f_p:
+            if not line.endswith("\n"):
+                break  # interrupted write
+            if line != ".\n":
+                block.append(line)
+                continue
+            for entry in block:
+                kind, _, rest = entry.partition(" ")
+                if kind == "n":
+                    node_id, _, text = rest.partition(" ")
+                    nodes[int(node_id)] = text
+                elif kind == "d":
+                    del nodes[int(rest)]
+                elif kind == "r":
+                    root = rest
+                else:
+                    raise ValueError(f"Unknown entry {kind} in {path}")
+            block = []
+    if root is None:
+        raise ValueError(f"File {path} does not contain complete snapshot")
+    return nodes, root
+
+
+def load_delta(path: PathType, hook: typing.Callable[[dict], typing.Any] = object_hook) -> typing.Any:
+    """
+    Load data saved with :py:class:`DeltaWriter`. Snapshot and complete deltas are replayed
+    and then objects are restored with ``hook``. Incomplete last block (interrupted write) is ignored.
+
+    :param path: path to file
+    :param hook: function used to restore objects, same as ``object_hook`` of :py:func:`json.load`
+    """
+    nodes, root = _replay(path)
+    restored: typing.Dict[int, typing.Any] = {}
+
+    def _hook(dkt: dict) -> typing.Any:
+        if len(dkt) == 1 and _NODE_KEY in dkt:
+            return restored[dkt[_NODE_KEY]]
+        return hook(dkt)
+
+    # node references only nodes with smaller ids, so they are already restored
+    for node_id in sorted(nodes):
+        restored[node_id] = json.loads(nodes[node_id], object_hook=_hook)
+    return json.loads(root, object_hook=_hook)
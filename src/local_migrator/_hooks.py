@@ -0,0 +1,127 @@
+"""
+This module contains serialization hooks bound to given :py:class:`~.MigrationRegistration`,
+so independent registers could be used side by side.
+"""
+
+import json
+import typing
+
+from ._class_register import REGISTER, MigrationRegistration, update_argument
+from ._serialize_hooks import Encoder, _encode_uncached, _restore, _strip_metadata
+
+
+class BoundHooks:
+    """
+    Set of serialization hooks using single register. Create with :py:func:`make_hooks`.
+
+    Register caches and options are resolved when hooks are created, so each call
+    skips lookups of global state done by :py:func:`object_encoder` and :py:func:`object_hook`.
+
+    :ivar MigrationRegistration register: register used by hooks
+    :ivar bool trusted: if restored objects are not checked for nested objects which failed to restore
+    :ivar bool schema: if class metadata of objects in statically typed fields is omitted
+    :ivar typing.Callable encoder: replacement of :py:func:`object_encoder`
+    :ivar typing.Callable object_hook: replacement of :py:func:`object_hook`
+    :ivar typing.Type[Encoder] json_encoder: :py:class:`json.JSONEncoder` subclass using :py:attr:`encoder`
+    """
+
+    __slots__ = ("encoder", "json_encoder", "object_hook", "register", "schema", "trusted")
+
+    def __init__(self, register: MigrationRegistration, trusted: bool, schema: bool):
+        self.register = register
+        self.trusted = trusted
+        self.schema = schema
+        self.encoder = _bind_encoder(register, schema)
+        self.object_hook = _bind_object_hook(register, not trusted)
+        self.json_encoder = _bind_json_encoder(self.encoder)
+
+    def cbor_encoder(self, encoder, value):
+        """Cbor encoder hook. See :py:func:`cbor_encoder`."""
+        res = self.encoder(value)
+        if res is None:
+            raise TypeError(f"Cannot encode {value} of class {type(value)}")
+        return encoder.encode(res)
+
+    def cbor_decoder(self, decoder, value):  # noqa: ARG002
+        """Cbor decoder hook. See :py:func:`cbor_decoder`."""
+        return self.object_hook(value)
+
+    def dumps(self, obj: typing.Any, **kwargs) -> str:
+        """Serialize object to json string. Arguments are passed to :py:func:`json.dumps`."""
+        return json.dumps(obj, cls=self.json_encoder, **kwargs)
+
+    def loads(self, data: typing.Union[str, bytes], **kwargs) -> typing.Any:
+        """Deserialize json document. Arguments are passed to :py:func:`json.loads`."""
+        return json.loads(data, object_hook=self.object_hook, **kwargs)
+
+    def update_argument(self, argument_name: str):
+        """Same as :py:func:`update_argument` using register of hooks."""
+        return update_argument(argument_name, self.register)
+
+
+def _bind_encoder(register: MigrationRegistration, schema: bool) -> typing.Callable[[typing.Any], typing.Any]:
+    get_cached = register._encoder_cache.get
+
+    def encode(obj: typing.Any) -> typing.Any:
+        encoder = get_cached(obj.__class__)
+        if encoder is not None:
+            return encoder(obj)
+        return _encode_uncached(obj, register)
+
+    if not schema:
+        return encode
+
+    def schema_encode(obj: typing.Any) -> typing.Any:
+        return _strip_metadata(obj, encode(obj), register)
+
+    return schema_encode
+
+
+def _bind_object_hook(register: MigrationRegistration, check_errors: bool) -> typing.Callable[[dict], typing.Any]:
+    get_cached = register._decoder_cache.get
+
+    def object_hook(dkt: dict) -> typing.Any:
+        if "__class__" not in dkt:
+            if "__columnar__" not in dkt and "__error__" not in dkt:
+                return dkt
+        elif "__values__" in dkt and "__error__" not in dkt:
+            versions = dkt.get("__class_version_dkt__")
+            if isinstance(versions, dict):
+                # fast path for objects in current layout with cached decoder
+                decoder = get_cached((dkt["__class__"], tuple(versions.items()), check_errors))
+                if decoder is not None:
+                    return decoder(dkt)
+        return _restore(dkt, register, check_errors)
+
+    return object_hook
+
+
+def _bind_json_encoder(encode: typing.Callable[[typing.Any], typing.Any]) -> typing.Type[Encoder]:
+    class BoundEncoder(Encoder):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, encoder=encode, **kwargs)
+
+    return BoundEncoder
+
+
+def make_hooks(register: MigrationRegistration = REGISTER, trusted: bool = False, schema: bool = False) -> BoundHooks:
+    """
+    Create serialization hooks bound to given register.
+
+    :param register: register used to encode and restore objects
+    :param trusted: if data are trusted to restore without errors. Then values of restored objects
+        are not scanned for nested objects which failed to restore
+        (see ``allow_errors_in_values`` argument of :py:meth:`~.MigrationRegistration.register`).
+    :param schema: if class metadata of objects in statically typed fields should be omitted
+        (see :py:func:`schema_object_encoder`)
+
+    Example::
+
+        plugin_register = MigrationRegistration()
+        plugin_register.register(PluginData, version="0.0.1", migrations=[...])
+        hooks = make_hooks(plugin_register)
+        text = json.dumps(data, cls=hooks.json_encoder)
+        data = json.loads(text, object_hook=hooks.object_hook)
+        data = cbor2.loads(raw, object_hook=hooks.cbor_decoder)
+    """
+    return BoundHooks(register, trusted, schema)
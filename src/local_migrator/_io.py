@@ -0,0 +1,241 @@
+"""
+This module contains helpers for reading and writing files with serialization hooks.
+"""
+
+import functools
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import typing
+from pathlib import Path
+
+from ._serialize_hooks import DecodeContext, Encoder, cbor_encoder
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from ._cache import MigrationCache
+    from ._hooks import BoundHooks
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    # allow to use in environment without cbor2.
+    cbor2 = None
+
+FILE_FORMATS = {".json": "json", ".cbor": "cbor"}
+"""Mapping from file suffix to name of format."""
+
+PathType = typing.Union[str, Path]
+
+
+def file_format(path: PathType) -> str:
+    """
+    Determine format of file based on its suffix.
+
+    :param path: path to file
+    :raises ValueError: if suffix is not listed in :py:data:`FILE_FORMATS`
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in FILE_FORMATS:
+        raise ValueError(f"Unknown format of file {path}")
+    return FILE_FORMATS[suffix]
+
+
+def _check_cbor(format_: str):
+    if format_ == "cbor" and cbor2 is None:  # pragma: no cover
+        raise RuntimeError("cbor2 package is required to handle cbor files")
+
+
+_JSON_CLASS_RE = re.compile(rb'"__(?:class|columnar)__"\s*:\s*"([^"\\]+)"')
+_CBOR_CLASS_KEYS = (b"\x69__class__", b"\x6c__columnar__")
+_CBOR_SHORT_STR = range(0x60, 0x78)
+_CBOR_STR_LEN_SIZE = {0x78: 1, 0x79: 2}
+
+
+def _scan_cbor_class_paths(data: bytes) -> typing.Set[str]:
+    res = set()
+    for key in _CBOR_CLASS_KEYS:
+        pos = data.find(key)
+        while pos != -1:
+            start = pos + len(key)
+            head = data[start] if start < len(data) else 0
+            if head in _CBOR_SHORT_STR:
+                length, start = head - 0x60, start + 1
+            elif head in _CBOR_STR_LEN_SIZE:
+                size = _CBOR_STR_LEN_SIZE[head]
+                length, start = int.from_bytes(data[start + 1 : start + 1 + size], "big"), start + 1 + size
+            else:
+                length = 0
+            if length:
+                res.add(data[start : start + length].decode("utf-8", errors="replace"))
+            pos = data.find(key, start)
+    return res
+
+
+def scan_class_paths(data: bytes, format_: str = "json") -> typing.Set[str]:
+    """
+    Collect paths of classes used in encoded document without parsing it.
+    Result may contain false positives (for example from string values containing encoded data),
+    so it should be used only as a hint.
+
+    :param data: encoded data
+    :param format_: ``"json"`` or ``"cbor"``
+    """
+    if format_ == "cbor":
+        return _scan_cbor_class_paths(data)
+    return {x.decode("utf-8", errors="replace") for x in _JSON_CLASS_RE.findall(data)}
+
+
+def loads(
+    data: bytes,
+    format_: str = "json",
+    hooks: bool = True,
+    context: typing.Optional[DecodeContext] = None,
+    prefetch: bool = True,
+) -> typing.Any:
+    """
+    Decode data from bytes.
+
+    :param data: encoded data
+    :param format_: ``"json"`` or ``"cbor"``
+    :param hooks: if objects should be restored (see :py:func:`object_hook`).
+    :param context: context used to restore objects, could be used to get report of failures.
+        If not provided then new :py:class:`DecodeContext` is used.
+    :param prefetch: if modules of classes used in document should be imported concurrently before decoding
+        (see :py:meth:`~.MigrationRegistration.prefetch`).
+    """
+    _check_cbor(format_)
+    if not hooks:
+        hook = None
+    elif context is None:
+        hook = DecodeContext()
+    else:
+        hook = context
+    if hook is not None and prefetch:
+        hook.register.prefetch(scan_class_paths(data, format_))
+    if format_ == "cbor":
+        return cbor2.loads(data, object_hook=None if hook is None else hook.cbor_decoder)
+    return json.loads(data, object_hook=hook)
+
+
+def dumps(obj: typing.Any, format_: str = "json", hooks: typing.Optional["BoundHooks"] = None) -> bytes:
+    """
+    Encode data to bytes.
+
+    :param obj: object to be encoded
+    :param format_: ``"json"`` or ``"cbor"``
+    :param hooks: hooks used to encode objects (see :py:func:`~.make_hooks`).
+        If not provided then :py:func:`object_encoder` is used.
+    """
+    _check_cbor(format_)
+    if format_ == "cbor":
+        return cbor2.dumps(obj, default=cbor_encoder if hooks is None else hooks.cbor_encoder)
+    return json.dumps(obj, cls=Encoder if hooks is None else hooks.json_encoder).encode("utf-8")
+
+
+def load_file(
+    path: PathType,
+    format_: typing.Optional[str] = None,
+    hooks: bool = True,
+    cache: typing.Optional["MigrationCache"] = None,
+    context: typing.Optional[DecodeContext] = None,
+) -> typing.Any:
+    """
+    Load data from file.
+
+    :param path: path to file
+    :param format_: ``"json"`` or ``"cbor"``. If not provided then determined by :py:func:`file_format`.
+    :param hooks: if :py:func:`object_hook` should be used to restore objects.
+    :param cache: cache of already migrated documents. Used only if ``hooks`` is set.
+    :param context: context used to restore objects, could be used to get report of failures.
+        Not used if document is read from ``cache``.
+    """
+    if format_ is None:
+        format_ = file_format(path)
+    with open(path, "rb") as f_p:
+        content = f_p.read()
+    if cache is not None and hooks:
+        return cache.load(content, format_)
+    return loads(content, format_, hooks, context)
+
+
+def _check_cancelled(cancelled: typing.Optional[threading.Event]):
+    if cancelled is not None and cancelled.is_set():
+        raise InterruptedError("Write was cancelled")
+
+
+@functools.lru_cache(maxsize=None)
+def _new_file_mode() -> int:
+    """
+    Mode of regular file created with :py:func:`open`. Umask could be read only by setting it,
+    which is not thread safe, so it is read once.
+    """
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _temporary_file(path: Path) -> typing.IO[bytes]:
+    """Open temporary file in directory of destination. It should be moved to destination with :py:func:`_replace`."""
+    return tempfile.NamedTemporaryFile("wb", dir=path.parent, prefix=f".{path.name}.", delete=False)
+
+
+def _replace(temporary: str, path: Path):
+    """
+    Replace destination with written temporary file. Temporary files are created with mode ``0o600``,
+    so mode of destination is kept or, for new file, mode of file created with :py:func:`open` is used.
+    """
+    if path.exists():
+        shutil.copymode(path, temporary)
+    else:
+        os.chmod(temporary, _new_file_mode())
+    os.replace(temporary, path)
+
+
+def write_atomic(
+    path: PathType,
+    data: bytes,
+    chunk_size: typing.Optional[int] = None,
+    cancelled: typing.Optional[threading.Event] = None,
+):
+    """
+    Write data to file. Data are written to temporary file in the same directory
+    which then replaces destination, so the destination file is never partially written.
+
+    :param path: path to destination file
+    :param data: data to write
+    :param chunk_size: if provided then data are written in chunks of this size
+    :param cancelled: event checked before each chunk and before destination is replaced.
+        If it is set then temporary file is removed and :py:class:`InterruptedError` is raised.
+    """
+    path = Path(path)
+    view = memoryview(data)
+    step = chunk_size or max(len(view), 1)
+    with _temporary_file(path) as f_p:
+        try:
+            for start in range(0, len(view), step):
+                _check_cancelled(cancelled)
+                f_p.write(view[start : start + step])
+            f_p.flush()
+            os.fsync(f_p.fileno())
+            _check_cancelled(cancelled)
+        except BaseException:
+            f_p.close()
+            os.unlink(f_p.name)
+            raise
+    _replace(f_p.name, path)
+
+
+def dump_file(obj: typing.Any, path: PathType, format_: typing.Optional[str] = None):
+    """
+    Atomically save data to file.
+
+    :param obj: object to be saved
+    :param path: path to file
+    :param format_: ``"json"`` or ``"cbor"``. If not provided then determined by :py:func:`file_format`.
+    """
+    if format_ is None:
+        format_ = file_format(path)
+    write_atomic(path, dumps(obj, format_))
@@ -0,0 +1,53 @@
+"""
+This module contains pickle support for registered classes.
+Instances are pickled as class path, versions and values, and are restored through migrations,
+so pickles stay valid after class is moved (see ``old_paths``) or its version is bumped.
+"""
+
+import pickle
+import typing
+
+from ._class_register import REGISTER, MigrationRegistration
+from ._codegen import get_decoder, get_encoder
+
+
+def reduce_object(obj: typing.Any, _protocol: int = pickle.DEFAULT_PROTOCOL) -> typing.Tuple[typing.Any, ...]:
+    """
+    Implementation of ``__reduce_ex__`` installed on classes registered with ``pickle_support=True``.
+    Encoded form is reused, so version dict is shared between objects of the same class
+    and stored once per pickle thanks to pickle memo.
+
+    :param obj: object to be pickled
+    :param _protocol: pickle protocol, ignored
+    :return: :py:func:`restore_object` and its arguments
+    """
+    encoder = get_encoder(obj.__class__, REGISTER)
+    if encoder is None:  # pragma: no cover
+        raise pickle.PicklingError(f"Class {obj.__class__} is not supported by migration aware pickle")
+    dkt = encoder(obj)
+    return restore_object, (dkt["__class__"], dkt["__class_version_dkt__"], dkt["__values__"])
+
+
+def restore_object(class_str: str, version_dkt: typing.Dict[str, str], values: typing.Dict[str, typing.Any]):
+    """
+    Restore pickled object. Class is resolved and migrations are applied in the same way
+    as in :py:meth:`~.MigrationRegistration.migrate_data`.
+
+    :param class_str: class path at time of pickling
+    :param version_dkt: versions of class and its parents at time of pickling
+    :param values: values of object at time of pickling
+    :raises pickle.UnpicklingError: if object could not be restored
+    """
+    dkt = {"__class__": class_str, "__class_version_dkt__": version_dkt, "__values__": values}
+    try:
+        decoder = get_decoder(class_str, version_dkt, REGISTER, check_errors=False)
+    except ValueError as e:
+        raise pickle.UnpicklingError(str(e)) from e
+    res = decoder(dkt)
+    if res is dkt:
+        raise pickle.UnpicklingError(f"Could not restore {class_str}: {dkt['__error__']}")
+    return res
+
+
+# installed by register on classes registered with ``pickle_support=True``
+MigrationRegistration._pickle_reducer = staticmethod(reduce_object)
@@ -0,0 +1,189 @@
+"""
+This module contains selective decoding of data loaded without hooks.
+Only selected parts of data are migrated and restored, other subtrees are skipped.
+"""
+
+import typing
+
+from ._class_register import REGISTER, MigrationRegistration, class_to_str
+from ._columnar import ColumnarList, decode_columnar
+from ._hooks import make_hooks
+from ._serialize_hooks import encoded_parts
+
+PathSpec = typing.Union[str, typing.Sequence[typing.Union[str, int]]]
+FieldsSpec = typing.Mapping[typing.Union[str, typing.Type], typing.Iterable[str]]
+
+ANY = "*"
+"""Path element matching any key of dict, field of object or element of list."""
+
+# Selection tree. ``None`` means that whole subtree is selected.
+_Tree = typing.Optional[typing.Dict[str, typing.Any]]
+
+
+def _merge(tree1: _Tree, tree2: _Tree) -> _Tree:
+    if tree1 is None or tree2 is None:
+        return None
+    res = dict(tree1)
+    for key, value in tree2.items():
+        res[key] = _merge(res[key], value) if key in res else value
+    return res
+
+
+def _build_tree(paths: typing.Iterable[PathSpec]) -> typing.Dict[str, typing.Any]:
+    tree: typing.Dict[str, typing.Any] = {}
+    for path in paths:
+        parts = [str(x) for x in (path.split(".") if isinstance(path, str) else path)]
+        if not parts:
+            raise ValueError("Empty path")
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+class _Projector:
+    def __init__(self, fields: typing.Optional[FieldsSpec], register: MigrationRegistration):
+        self._register = register
+        self._object_hook = make_hooks(register).object_hook
+        self._fields = {
+            (x if isinstance(x, str) else class_to_str(x)): dict.fromkeys(field_names)
+            for x, field_names in (fields or {}).items()
+        }
+        self._class_cache: typing.Dict[str, typing.Optional[typing.Dict[str, None]]] = {}
+
+    def _class_fields(self, class_str: str) -> typing.Optional[typing.Dict[str, None]]:
+        """Selection tree for given class from ``fields`` argument. Class could be saved under old path."""
+        if not self._fields:
+            return None
+        try:
+            return self._class_cache[class_str]
+        except KeyError:
+            pass
+        try:
+            res = self._fields.get(class_to_str(self._register.get_class(class_str)))
+        except Exception:  # pylint: disable=W0703
+            res = self._fields.get(class_str)
+        self._class_cache[class_str] = res
+        return res
+
+    def project(self, node: typing.Any, tree: _Tree) -> typing.Any:
+        if isinstance(node, list):
+            if tree is None:
+                return [self.project(x, None) for x in node]
+            return [self.project(node[i], sub_tree) for i, sub_tree in self._select_indices(len(node), tree)]
+        if not isinstance(node, dict):
+            return node
+        if "__class__" in node or "__columnar__" in node:
+            return self._project_object(node, tree)
+        if tree is None:
+            return {key: self.project(value, None) for key, value in node.items()}
+        return self._project_mapping(node, tree)
+
+    @staticmethod
+    def _select_indices(size: int, tree: typing.Dict[str, typing.Any]) -> typing.Iterator[typing.Tuple[int, _Tree]]:
+        if ANY in tree:
+            for i in range(size):
+                yield i, _merge(tree[ANY], tree[str(i)]) if str(i) in tree else tree[ANY]
+            return
+        for key, sub_tree in tree.items():
+            if key.lstrip("-").isdigit() and -size <= int(key) < size:
+                yield int(key), sub_tree
+
+    def _project_mapping(self, dkt: typing.Dict[str, typing.Any], tree: typing.Dict[str, typing.Any]) -> dict:
+        if ANY not in tree:
+            return {key: self.project(dkt[key], sub_tree) for key, sub_tree in tree.items() if key in dkt}
+        any_tree = tree[ANY]
+        return {
+            key: self.project(value, _merge(any_tree, tree[key]) if key in tree else any_tree)
+            for key, value in dkt.items()
+        }
+
+    def _project_object(self, dkt: typing.Dict[str, typing.Any], tree: _Tree) -> typing.Any:
+        if "__columnar__" in dkt:
+            return self._project_columnar(dkt, tree)
+        class_str, version_dkt, values = encoded_parts(dkt)
+        if tree is None:
+            tree = self._class_fields(class_str)
+        if tree is None:
+            values = {key: self.project(value, None) for key, value in values.items()}
+            res = {"__class__": class_str, "__class_version_dkt__": version_dkt, "__values__": values}
+            if "__schema__" in dkt:
+                res["__schema__"] = dkt["__schema__"]
+            return self._object_hook(res)
+        try:
+            if self._register.migration_plan(class_str, version_dkt, fuse=True):
+                # migrations expect restored nested objects, same as in object_hook
+                values = {key: self.project(value, None) for key, value in values.items()}
+                values = self._register.migrate_data(class_str, version_dkt, values)
+        except Exception as e:  # pylint: disable=W0703
+            return {**dkt, "__error__": str(e)}
+        return self._project_mapping(values, tree)
+
+    def _project_columnar(self, dkt: typing.Dict[str, typing.Any], tree: _Tree) -> typing.Any:
+        """Decode columnar list, then select its elements (as list of objects) from migrated columns."""
+        columns = {name: self.project(column, None) for name, column in dkt["columns"].items()}
+        try:
+            res = decode_columnar({**dkt, "columns": columns}, self._register)
+        except Exception as e:  # pylint: disable=W0703
+            return {**dkt, "__error__": str(e)}
+        fields = self._class_fields(dkt["__columnar__"])
+        if tree is None and fields is None:
+            return res
+        columns = {
+            name: column if isinstance(column, (list, ColumnarList)) else column.tolist()
+            for name, column in res.columns.items()
+        }
+
+        def _row(index: int, row_tree: _Tree) -> typing.Any:
+            if row_tree is None:
+                row_tree = fields
+            if row_tree is None:
+                return res[index]
+            return self._project_mapping({name: column[index] for name, column in columns.items()}, row_tree)
+
+        if tree is None:
+            return [_row(i, None) for i in range(len(res))]
+        return [_row(i, sub_tree) for i, sub_tree in self._select_indices(len(res), tree)]
+
+
+def project(
+    data: typing.Any,
+    paths: typing.Optional[typing.Iterable[PathSpec]] = None,
+    fields: typing.Optional[FieldsSpec] = None,
+    register: MigrationRegistration = REGISTER,
+) -> typing.Any:
+    """
+    Restore only selected parts of data loaded without :py:func:`object_hook`
+    (for example with ``load_file(path, hooks=False)``). Objects outside selection are not migrated nor constructed.
+
+    Paths are sequences of keys or dot separated strings. Path elements select keys of dicts,
+    fields of encoded objects (after migrations, so current names should be used)
+    and elements of lists (by index). :py:data:`ANY` (``"*"``) matches every element.
+    Migrations get restored nested objects, so values of objects saved in old version are restored fully
+    before selection.
+    Encoded objects inside selected paths are returned as dicts of selected fields.
+    Subtree at end of path is restored fully.
+
+    Classes listed in ``fields`` are always returned as dicts containing only given fields
+    (after migrations), wherever they are in restored subtree.
+
+    Columnar lists (see :py:class:`ColumnarList`) are decoded whole, selection is applied to their elements.
+
+    :param data: data decoded without hooks
+    :param paths: paths to be selected. If ``None`` whole data is selected.
+    :param fields: mapping from class (or class path) to names of fields to be restored.
+    :param register: register used to resolve classes and migrations
+    :return: data with only selected subtrees
+
+    Example::
+
+        data = load_file("archive.json", hooks=False)
+        project(data, paths=["projects.*.name", "projects.*.version"])
+        project(data, fields={Project: ["name", "version"]})
+    """
+    tree = None if paths is None else _build_tree(paths)
+    return _Projector(fields, register).project(data, tree)
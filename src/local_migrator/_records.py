@@ -0,0 +1,497 @@
+"""
+This module contains record stream format. Each top level record is encoded separately,
+as single line of json (JSON Lines) or single cbor item (CBOR sequence), so file could be appended to,
+split into shards and processed in parallel.
+
+Records are preceded by header::
+
+    {"__records__": 1, "classes": ["module.Class"], "fingerprint": "..."}
+
+Header is repeated before each record which uses classes not listed in previous headers.
+Then it lists only new classes and fingerprint of all classes declared so far.
+Header of shard (see :py:func:`dump_sharded_records`) lists all classes and number of records in shard.
+"""
+
+import collections
+import functools
+import itertools
+import json
+import os
+import typing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from pathlib import Path
+
+from ._class_register import REGISTER, MigrationRegistration
+from ._hooks import make_hooks
+from ._io import PathType, _check_cbor, cbor2, write_atomic
+from ._serialize_hooks import ClassCollector, Encoder
+from ._upgrade import import_modules
+
+RECORD_FORMATS = {".jsonl": "json", ".cbors": "cbor"}
+"""Mapping from suffix of record stream file to name of format of single record."""
+
+_HEADER_KEY = "__records__"
+_JSON_HEADER_PREFIX = b'{"' + _HEADER_KEY.encode("ascii") + b'"'
+_MANIFEST_NAME = "manifest.jsonl"
+
+
+def record_format(path: PathType) -> str:
+    """
+    Determine format of records based on suffix of file.
+
+    :param path: path to file
+    :raises ValueError: if suffix is not listed in :py:data:`RECORD_FORMATS`
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in RECORD_FORMATS:
+        raise ValueError(f"Unknown format of record stream {path}")
+    return RECORD_FORMATS[suffix]
+
+
+def _is_header(item: typing.Any) -> bool:
+    return isinstance(item, dict) and _HEADER_KEY in item
+
+
+class _RecordEncoder:
+    """Encode single records of given format, collecting class paths used by each record."""
+
+    def __init__(self, format_: str, register: MigrationRegistration):
+        _check_cbor(format_)
+        self.format_ = format_
+        self.register = register
+        self._collector = ClassCollector(make_hooks(register).encoder)
+        self._json_encoder = Encoder(separators=(",", ":"), encoder=self._collector.encode)
+
+    def encode(self, record: typing.Any) -> typing.Tuple[bytes, typing.Set[str]]:
+        """Return encoded record and set of class paths used by it."""
+        self._collector.classes = set()
+        if self.format_ == "cbor":
+            data = cbor2.dumps(record, default=self._collector.cbor_encoder)
+        else:
+            data = self._json_encoder.encode(record).encode("ascii") + b"\n"
+        return data, self._collector.classes
+
+    def header(
+        self, classes: typing.Iterable[str], all_classes: typing.Iterable[str], count: typing.Optional[int] = None
+    ) -> bytes:
+        header: typing.Dict[str, typing.Any] = {
+            _HEADER_KEY: 1,
+            "classes": sorted(classes),
+            "fingerprint": self.register.fingerprint(all_classes),
+        }
+        if count is not None:
+            header["count"] = count
+        if self.format_ == "cbor":
+            return cbor2.dumps(header)
+        return json.dumps(header, separators=(",", ":")).encode("ascii") + b"\n"
+
+
+def _scan(path: Path, format_: str) -> typing.Tuple[int, typing.List[dict], int]:
+    """
+    Read record stream without restoring objects.
+
+    :return: number of complete records, headers and size of complete part of file
+    """
+    count = 0
+    headers = []
+    size = 0
+    with open(path, "rb") as f_p:
+        if format_ == "cbor":
+            end = os.fstat(f_p.fileno()).st_size
+            decoder = cbor2.CBORDecoder(f_p)
+            while size < end:
+                try:
+                    item = decoder.decode()
+                except cbor2.CBORDecodeError:
+                    break  # interrupted write
+                if _is_header(item):
+                    headers.append(item)
+                elif headers:
+                    count += 1
+                size = f_p.tell()
+        else:
+            for line in f_p:
+                if not line.endswith(b"\n"):
+                    break  # interrupted write
+                if line.startswith(_JSON_HEADER_PREFIX):
+                    headers.append(json.loads(line))
+                elif headers:
+                    count += 1
+                size += len(line)
+    if not headers:
+        raise ValueError(f"File {path} is not a record stream")
+    return count, headers, size
+
+
+class RecordWriter:
+    """
+    Append records to record stream file. Each record is encoded separately
+    (see :py:class:`Encoder` and :py:func:`cbor_encoder`), so records are never kept in memory.
+
+    :param path: path to file
+    :param format_: ``"json"`` or ``"cbor"``. If not provided then determined by :py:func:`record_format`.
+    :param resume: if records should be appended to existing file. Incomplete last record
+        (interrupted write) is removed and :py:attr:`count` is number of complete records.
+    :param fsync: if file should be synchronized to disk on each :py:meth:`flush`
+    :param register: register used to encode records and to calculate fingerprint of classes
+
+    Example::
+
+        with RecordWriter("export.jsonl", resume=True) as writer:
+            for record in itertools.islice(records, writer.count, None):
+                writer.append(record)
+    """
+
+    def __init__(
+        self,
+        path: PathType,
+        format_: typing.Optional[str] = None,
+        resume: bool = False,
+        fsync: bool = False,
+        register: MigrationRegistration = REGISTER,
+    ):
+        self.path = Path(path)
+        self.format_ = record_format(self.path) if format_ is None else format_
+        self.fsync = fsync
+        self._encoder = _RecordEncoder(self.format_, register)
+        self._classes: typing.Set[str] = set()
+        self.count = 0
+        """Number of records in file."""
+        if resume and self.path.exists():
+            self.count, headers, size = _scan(self.path, self.format_)
+            for header in headers:
+                self._classes.update(header["classes"])
+            self._file = open(self.path, "r+b")  # noqa: SIM115
+            self._file.truncate(size)
+            self._file.seek(size)
+        else:
+            self._file = open(self.path, "wb")  # noqa: SIM115
+            self._file.write(self._encoder.header((), ()))
+
+    def append(self, record: typing.Any):
+        """
+        Encode and write single record.
+
+        :param record: object to be saved
+        """
+        data, classes = self._encoder.encode(record)
+        new_classes = classes - self._classes
+        if new_classes:
+            self._classes |= new_classes
+            data = self._encoder.header(new_classes, self._classes) + data
+        self._file.write(data)
+        self.count += 1
+
+    def extend(self, records: typing.Iterable[typing.Any]):
+        """Write all records from iterable."""
+        for record in records:
+            self.append(record)
+
+    def flush(self):
+        """Flush written records to file (and to disk if ``fsync`` is set)."""
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RecordReader:
+    """
+    Read records from record stream file one by one. Incomplete last record (interrupted write) is ignored.
+    Modules of classes listed in headers are imported before records using them are decoded
+    (see :py:meth:`~.MigrationRegistration.prefetch`).
+
+    :param path: path to file
+    :param format_: ``"json"`` or ``"cbor"``. If not provided then determined by :py:func:`record_format`.
+    :param hooks: if :py:func:`object_hook` should be used to restore objects.
+    :param register: register used to restore objects and to check fingerprint of classes
+
+    Example::
+
+        with RecordReader("export.jsonl") as reader:
+            for record in reader:
+                process(record)
+    """
+
+    def __init__(
+        self,
+        path: PathType,
+        format_: typing.Optional[str] = None,
+        hooks: bool = True,
+        register: MigrationRegistration = REGISTER,
+    ):
+        self.path = Path(path)
+        self.format_ = record_format(self.path) if format_ is None else format_
+        _check_cbor(self.format_)
+        self.hooks = hooks
+        self._register = register
+        self._hooks = make_hooks(register)
+        self._headers: typing.Optional[typing.List[dict]] = None
+        self._file = open(self.path, "rb")  # noqa: SIM115
+
+    def _read_headers(self) -> typing.List[dict]:
+        if self._headers is None:
+            self._headers = _scan(self.path, self.format_)[1]
+        return self._headers
+
+    @property
+    def classes(self) -> typing.List[str]:
+        """Paths of classes used by records."""
+        return sorted({x for header in self._read_headers() for x in header["classes"]})
+
+    @property
+    def up_to_date(self) -> bool:
+        """If fingerprint of classes stored in file matches current register, so no migration is needed."""
+        return self._register.fingerprint(self.classes) == self._read_headers()[-1]["fingerprint"]
+
+    def _header_read(self, header: dict):
+        if self.hooks:
+            self._register.prefetch(header["classes"])
+
+    def _iter_json(self) -> typing.Iterator[typing.Any]:
+        hook = self._hooks.object_hook if self.hooks else None
+        first = True
+        for line in self._file:
+            if not line.endswith(b"\n"):
+                return  # interrupted write
+            if line.startswith(_JSON_HEADER_PREFIX):
+                self._header_read(json.loads(line))
+            elif first:
+                raise ValueError(f"File {self.path} is not a record stream")
+            else:
+                yield json.loads(line, object_hook=hook)
+            first = False
+
+    def _iter_cbor(self) -> typing.Iterator[typing.Any]:
+        end = os.fstat(self._file.fileno()).st_size
+        decoder = cbor2.CBORDecoder(self._file, object_hook=self._hooks.cbor_decoder if self.hooks else None)
+        first = True
+        while self._file.tell() < end:
+            try:
+                item = decoder.decode()
+            except EOFError:
+                return  # interrupted write
+            if _is_header(item):
+                self._header_read(item)
+            elif first:
+                raise ValueError(f"File {self.path} is not a record stream")
+            else:
+                yield item
+            first = False
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        self._file.seek(0)
+        if self.format_ == "cbor":
+            return self._iter_cbor()
+        return self._iter_json()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def dump_records(
+    records: typing.Iterable[typing.Any],
+    path: PathType,
+    format_: typing.Optional[str] = None,
+    register: MigrationRegistration = REGISTER,
+):
+    """
+    Save records to record stream file.
+
+    :param records: records to be saved
+    :param path: path to file
+    :param format_: ``"json"`` or ``"cbor"``. If not provided then determined by :py:func:`record_format`.
+    :param register: register used to encode records
+    """
+    with RecordWriter(path, format_, register=register) as writer:
+        writer.extend(records)
+
+
+def load_records(
+    path: PathType, hooks: bool = True, register: MigrationRegistration = REGISTER
+) -> typing.List[typing.Any]:
+    """
+    Load all records from record stream file.
+
+    :param path: path to file
+    :param hooks: if :py:func:`object_hook` should be used to restore objects.
+    :param register: register used to restore objects
+    """
+    with RecordReader(path, hooks=hooks, register=register) as reader:
+        return list(reader)
+
+
+def _shard_path(directory: Path, num: int, format_: str) -> Path:
+    suffix = next(suffix for suffix, name in RECORD_FORMATS.items() if name == format_)
+    return directory / f"{num:05d}{suffix}"
+
+
+def _write_shard(
+    path: Path, records: typing.List[typing.Any], register: MigrationRegistration = REGISTER
+) -> typing.List[str]:
+    """Encode records and atomically write shard. Return paths of used classes."""
+    encoder = _RecordEncoder(record_format(path), register)
+    parts = []
+    classes: typing.Set[str] = set()
+    for record in records:
+        data, record_classes = encoder.encode(record)
+        parts.append(data)
+        classes |= record_classes
+    write_atomic(path, encoder.header(classes, classes, len(records)) + b"".join(parts))
+    return sorted(classes)
+
+
+def _read_shard_header(path: Path) -> dict:
+    with open(path, "rb") as f_p:
+        if record_format(path) == "cbor":
+            return cbor2.CBORDecoder(f_p).decode()
+        return json.loads(f_p.readline())
+
+
+def _read_shard(path: Path, hooks: bool, register: MigrationRegistration = REGISTER) -> typing.List[typing.Any]:
+    with RecordReader(path, hooks=hooks, register=register) as reader:
+        return list(reader)
+
+
+def _bounded_map(
+    executor: typing.Optional[Executor],
+    func: typing.Callable,
+    tasks: typing.Iterable[typing.Tuple[typing.Any, ...]],
+    max_pending: int,
+) -> typing.Iterator[typing.Any]:
+    """Map in order, keeping at most ``max_pending`` tasks submitted, so input is not materialized."""
+    if executor is None:
+        for args in tasks:
+            yield func(*args)
+        return
+    pending: typing.Deque[Future] = collections.deque()
+    for args in tasks:
+        pending.append(executor.submit(func, *args))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def dump_sharded_records(  # noqa: PLR0913
+    records: typing.Iterable[typing.Any],
+    directory: PathType,
+    shard_size: int = 1000,
+    *,
+    format_: str = "json",
+    workers: typing.Optional[int] = None,
+    modules: typing.Sequence[str] = (),
+    register: MigrationRegistration = REGISTER,
+) -> int:
+    """
+    Save records to directory of record stream shards, encoding shards in process pool.
+    Each shard is written atomically. Manifest listing shards is written when all shards are saved.
+
+    If export was interrupted, calling this function again with the same records resumes it:
+    already saved shards are not encoded again.
+
+    :param records: records to be saved, they are sent to worker processes, so have to be picklable
+    :param directory: destination directory, created if not exists
+    :param shard_size: number of records in single shard
+    :param format_: ``"json"`` or ``"cbor"``, format of single record
+    :param workers: number of worker processes. If ``1`` then work is done in current process.
+    :param modules: modules that need to be imported to register classes
+    :param register: register used to encode records and to calculate fingerprint of classes.
+        Worker processes use global register, so if other register is passed then work is done in current process.
+    :return: number of saved records
+    """
+    _check_cbor(format_)
+    import_modules(modules)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    shards: typing.List[typing.Tuple[Path, int]] = []
+    classes: typing.Set[str] = set()
+
+    def _tasks() -> typing.Iterator[typing.Tuple[Path, typing.List[typing.Any]]]:
+        iterator = iter(records)
+        for num in itertools.count():
+            chunk = list(itertools.islice(iterator, shard_size))
+            if not chunk:
+                return
+            path = _shard_path(directory, num, format_)
+            shards.append((path, len(chunk)))
+            if path.exists():
+                header = _read_shard_header(path)
+                if header.get("count") == len(chunk):
+                    classes.update(header["classes"])
+                    continue
+            yield path, chunk
+
+    if workers == 1 or register is not REGISTER:
+        results = list(_bounded_map(None, functools.partial(_write_shard, register=register), _tasks(), 1))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=import_modules, initargs=(tuple(modules),)
+        ) as executor:
+            results = list(_bounded_map(executor, _write_shard, _tasks(), 2 * (workers or os.cpu_count() or 1)))
+    for shard_classes in results:
+        classes.update(shard_classes)
+    manifest = {
+        _HEADER_KEY: 1,
+        "format": format_,
+        "shards": [[path.name, count] for path, count in shards],
+        "classes": sorted(classes),
+        "fingerprint": register.fingerprint(classes),
+    }
+    write_atomic(directory / _MANIFEST_NAME, json.dumps(manifest).encode("ascii") + b"\n")
+    return sum(count for _, count in shards)
+
+
+def load_sharded_records(
+    directory: PathType,
+    hooks: bool = True,
+    workers: typing.Optional[int] = None,
+    modules: typing.Sequence[str] = (),
+    register: MigrationRegistration = REGISTER,
+) -> typing.List[typing.Any]:
+    """
+    Load records saved with :py:func:`dump_sharded_records`, decoding shards in process pool.
+
+    :param directory: directory with shards
+    :param hooks: if :py:func:`object_hook` should be used to restore objects.
+    :param workers: number of worker processes. If ``1`` then work is done in current process.
+    :param modules: modules that need to be imported to register classes
+    :param register: register used to restore objects.
+        Worker processes use global register, so if other register is passed then work is done in current process.
+    :raises ValueError: if export is not complete (manifest is missing)
+    """
+    directory = Path(directory)
+    manifest_path = directory / _MANIFEST_NAME
+    if not manifest_path.exists():
+        raise ValueError(f"Directory {directory} does not contain complete sharded export")
+    manifest = json.loads(manifest_path.read_bytes())
+    paths = [directory / name for name, _ in manifest["shards"]]
+    import_modules(modules)
+    if workers == 1 or register is not REGISTER:
+        parts = [_read_shard(path, hooks, register) for path in paths]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=import_modules, initargs=(tuple(modules),)
+        ) as executor:
+            parts = list(executor.map(_read_shard, paths, itertools.repeat(hooks)))
+    res = []
+    for (name, count), part in zip(manifest["shards"], parts):
+        if len(part) != count:
+            raise ValueError(f"Shard {name} contains {len(part)} records instead of {count}")
+        res.extend(part)
+    return res
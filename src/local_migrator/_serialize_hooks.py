@@ -1,26 +1,13 @@
 import dataclasses
 import enum
 import json
+import sys
 import typing
 from pathlib import Path
 
-from ._class_register import REGISTER, class_to_str
-
-try:
-    from pydantic import BaseModel
-except ImportError:  # pragma: no cover
-    # allow to use in environment without pydantic.
-    class BaseModel:  # type: ignore  [no-redef]
-        pass
-
-
-try:
-    from pydantic.v1 import BaseModel as BaseModelV1
-except ImportError:
-
-    class BaseModelV1:  # type: ignore  [no-redef]
-        pass
-
+from ._class_register import REGISTER, MigrationRegistration, class_to_str
+from ._codegen import BaseModel, BaseModelV1, class_version_dkt, get_decoder, get_encoder, strip_values
+from ._columnar import ColumnarList, decode_columnar
 
 try:
     from numpy import floating, integer, ndarray
@@ -36,28 +23,18 @@ except ImportError:  # pragma: no cover
         pass
 
 
-def add_class_info(obj: typing.Any, dkt: dict) -> dict:
+_ENCODED_META_KEYS = {"__class__", "__class_version_dkt__", "__error__", "__schema__"}
+
+
+def add_class_info(obj: typing.Any, dkt: dict, register: MigrationRegistration = REGISTER) -> dict:
     return {
         "__class__": class_to_str(obj.__class__),
-        "__class_version_dkt__": {
-            class_to_str(sup_obj): str(REGISTER.get_version(sup_obj))
-            for sup_obj in obj.__class__.__mro__
-            if class_to_str(sup_obj)
-            not in {
-                "object",
-                "pydantic.main.BaseModel",
-                "pydantic.utils.Representation",
-                "enum.Enum",
-                "builtins.object",
-                "typing.Generic",
-            }
-            and not class_to_str(sup_obj).startswith("collections.abc")
-        },
+        "__class_version_dkt__": class_version_dkt(obj.__class__, register),
         "__values__": dkt,
     }
 
 
-def object_encoder(obj: typing.Any):  # noqa: PLR0911
+def object_encoder(obj: typing.Any):
     """
     Function changing supported types to basic python types supported by most
     serializers and which could be restored by :py:func:`nme_object_hook` function.
@@ -72,18 +49,34 @@ def object_encoder(obj: typing.Any):  # noqa: PLR0911
     * :py:class:`numpy.floating` (change to pure float)
     * :py:class:`pathlib.Path` (Serialized to string)
     * Any class with an ``as_dict`` method. This method should return a dictionary of valid constructor arguments.
+    * :py:class:`ColumnarList` (encoded as columns)
+
+    Encoders for dataclasses and classes with ``as_dict`` method are generated on first use
+    and cached in :py:data:`REGISTER`.
 
     :param obj: object to be encoded.
     :return: encoded object for supported types. Otherwise ``None``.
 
     """
+    encoder = REGISTER._encoder_cache.get(obj.__class__)
+    if encoder is not None:
+        return encoder(obj)
+    return _encode_uncached(obj, REGISTER)
+
+
+def _encode_uncached(obj: typing.Any, register: MigrationRegistration):  # noqa: PLR0911
+    """Part of :py:func:`object_encoder` used if encoder of class is not yet cached in register."""
+    if isinstance(obj, ColumnarList):
+        return obj.encode(register)
     if isinstance(obj, enum.Enum):
-        dkt = {"value": obj.value}
-        return add_class_info(obj, dkt)
+        return get_encoder(obj.__class__, register)(obj)
     if dataclasses.is_dataclass(obj):
+        encoder = get_encoder(obj.__class__, register)
+        if encoder is not None:
+            return encoder(obj)
         fields = dataclasses.fields(obj)
         dkt = {x.name: getattr(obj, x.name) for x in fields}
-        return add_class_info(obj, dkt)
+        return add_class_info(obj, dkt, register)
 
     if isinstance(obj, ndarray):
         return obj.tolist()
@@ -93,11 +86,14 @@ def object_encoder(obj: typing.Any):  # noqa: PLR0911
             dkt = dict(obj)
         except (ValueError, TypeError):
             dkt = obj.dict()  # workaround for napari Colormap class
-        return add_class_info(obj, dkt)
+        return add_class_info(obj, dkt, register)
 
     if hasattr(obj, "as_dict"):
+        encoder = get_encoder(obj.__class__, register)
+        if encoder is not None:
+            return encoder(obj)
         dkt = obj.as_dict()
-        return add_class_info(obj, dkt)
+        return add_class_info(obj, dkt, register)
 
     if isinstance(obj, integer):
         return int(obj)
@@ -108,17 +104,163 @@ def object_encoder(obj: typing.Any):  # noqa: PLR0911
     return None
 
 
+def schema_object_encoder(obj: typing.Any):
+    """
+    Variant of :py:func:`object_encoder` which omits class metadata of objects stored in statically typed fields.
+
+    If field of registered class is annotated with concrete class (or ``Optional``, ``List``,
+    ``Tuple[..., ...]`` or ``Dict`` of concrete class) and its value is instance of exactly this class,
+    only values dict of this object is stored. Versions of such classes are merged into
+    ``__class_version_dkt__`` of the nearest object with class metadata, which is marked with ``"__schema__"`` key.
+    Values of polymorphic, ``Any`` or union fields and instances of subclasses are encoded with full metadata.
+
+    Data are restored by :py:func:`object_hook` using annotations of current version of classes,
+    after migrations of parent object. So migrations of parent see values dicts instead of objects
+    in statically typed fields.
+
+    :param obj: object to be encoded.
+    :return: encoded object for supported types. Otherwise ``None``.
+
+    Examples::
+
+        json.dump(data, f_p, cls=Encoder, schema=True)
+        cbor2.dump(data, f_p, default=lambda encoder, value: encoder.encode(schema_object_encoder(value)))
+    """
+    return _strip_metadata(obj, object_encoder(obj), REGISTER)
+
+
+def _strip_metadata(obj: typing.Any, res: typing.Any, register: MigrationRegistration) -> typing.Any:
+    """Remove class metadata of objects in statically typed fields from encoded object."""
+    if not isinstance(res, dict) or "__class__" not in res:
+        return res
+    versions = dict(res["__class_version_dkt__"])
+    values = strip_values(obj.__class__, res["__values__"], versions, register)
+    if values is res["__values__"]:
+        return res
+    return {"__class__": res["__class__"], "__class_version_dkt__": versions, "__values__": values, "__schema__": 1}
+
+
+class ReferenceTracker:
+    """
+    Stateful wrapper around :py:func:`object_encoder` which encodes each object only once.
+
+    First occurrence of registered object is encoded with additional ``"__id__"`` key.
+    Each next occurrence of the same object (checked by identity) is encoded as ``{"__ref__": id}``.
+    This also breaks reference cycles. Use :py:class:`ReferenceResolver` to decode such data.
+
+    Examples::
+
+        json.dump(data, f_p, cls=Encoder, track_references=True)
+        cbor2.dump(data, f_p, default=ReferenceTracker().cbor_encoder)
+    """
+
+    def __init__(self):
+        self._ids: typing.Dict[int, typing.Tuple[int, typing.Any]] = {}
+
+    def encode(self, obj: typing.Any) -> typing.Any:
+        """
+        Encode object. See :py:func:`object_encoder`.
+
+        :param obj: object to be encoded.
+        :return: encoded object for supported types. Otherwise ``None``.
+        """
+        entry = self._ids.get(id(obj))
+        if entry is not None:
+            return {"__ref__": entry[0]}
+        res = object_encoder(obj)
+        if isinstance(res, dict) and "__class__" in res:
+            ref_id = len(self._ids)
+            # object is kept to prevent reuse of its id during encoding
+            self._ids[id(obj)] = (ref_id, obj)
+            res = {**res, "__id__": ref_id}
+        return res
+
+    def cbor_encoder(self, encoder, value):
+        """Cbor encoder hook. See :py:func:`cbor_encoder`."""
+        res = self.encode(value)
+        if res is None:
+            raise TypeError(f"Cannot encode {value} of class {type(value)}")
+        return encoder.encode(res)
+
+
+class ClassCollector:
+    """
+    Wrapper around object encoder collecting paths of encoded classes,
+    for example to calculate fingerprint of classes used in document
+    (see :py:meth:`~.MigrationRegistration.fingerprint`).
+
+    :param encoder: function used to encode objects, for example :py:attr:`~.BoundHooks.encoder`
+
+    Example::
+
+        collector = ClassCollector()
+        text = json.dumps(data, cls=Encoder, encoder=collector.encode)
+        fingerprint = REGISTER.fingerprint(collector.classes)
+    """
+
+    def __init__(self, encoder: typing.Callable[[typing.Any], typing.Any] = object_encoder):
+        self._encoder = encoder
+        self.classes: typing.Set[str] = set()
+
+    def encode(self, obj: typing.Any) -> typing.Any:
+        """Encode object and remember its class. Could be used as ``encoder`` argument of :py:class:`Encoder`."""
+        res = self._encoder(obj)
+        if isinstance(res, dict):
+            if "__class__" in res:
+                self.classes.add(res["__class__"])
+            elif "__columnar__" in res:
+                self.classes.add(res["__columnar__"])
+        return res
+
+    def cbor_encoder(self, encoder, value):
+        """Cbor encoder hook. See :py:func:`cbor_encoder`."""
+        res = self.encode(value)
+        if res is None:
+            raise TypeError(f"Cannot encode {value} of class {type(value)}")
+        return encoder.encode(res)
+
+
 class Encoder(json.JSONEncoder):
     """
     JSONEncoder subclass for serializing Python objects into JSON.
     For list of supported types check :py:func:`nme_object_encoder` function.
+
+    :param track_references: if shared objects should be encoded only once (see :py:class:`ReferenceTracker`).
+        Disables ``check_circular``, so cycles of registered objects are allowed.
+    :param schema: if class metadata of objects in statically typed fields should be omitted
+        (see :py:func:`schema_object_encoder`). Could not be used together with ``track_references``.
+    :param encoder: function used to encode objects which are not supported by json,
+        for example :py:attr:`~.BoundHooks.encoder` or wrapper of :py:func:`object_encoder`.
+        Could not be used together with ``track_references`` or ``schema``.
     """
 
+    def __init__(
+        self,
+        *args,
+        track_references: bool = False,
+        schema: bool = False,
+        encoder: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
+        **kwargs,
+    ):
+        if track_references and schema:
+            raise ValueError("track_references and schema could not be used together")
+        if encoder is not None and (track_references or schema):
+            raise ValueError("encoder could not be used together with track_references or schema")
+        if track_references:
+            kwargs["check_circular"] = False
+        super().__init__(*args, **kwargs)
+        if encoder is not None:
+            self._encode = encoder
+        elif track_references:
+            self._encode = ReferenceTracker().encode
+        else:
+            self._encode = schema_object_encoder if schema else object_encoder
+
     def default(self, o):
         """
         Implementation that calls :py:func:`nme_object_encoder` function.
         """
-        val = object_encoder(o)
+        val = self._encode(o)
         if val is None:  # pragma: no cover
             return super().default(o)
         return val
@@ -134,6 +276,71 @@ def check_for_errors_in_dkt_values(dkt: dict) -> typing.List[str]:
     return [key for key, value in dkt.items() if isinstance(value, dict) and "__error__" in value]
 
 
+def contains_errors(data: typing.Any) -> bool:
+    """
+    Check if decoded data contains dict with ``"__error__"`` key.
+    Dicts and lists are checked recursively, restored objects are not inspected.
+
+    :param data: data decoded with :py:func:`object_hook`
+    """
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if "__error__" in item:
+                return True
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return False
+
+
+def encoded_parts(
+    dkt: typing.Dict[str, typing.Any],
+) -> typing.Tuple[str, typing.Dict[str, str], typing.Dict[str, typing.Any]]:
+    """
+    Split encoded object into class path, class version dict and values dict.
+    Handle both current and old (values stored next to ``__class__`` key) layout.
+
+    :param dkt: dict with ``"__class__"`` key
+    """
+    class_str = dkt["__class__"]
+    version_dkt = dkt.get("__class_version_dkt__", {class_str: "0.0.0"})
+    if "__values__" in dkt:
+        return class_str, version_dkt, dkt["__values__"]
+    return class_str, version_dkt, {k: v for k, v in dkt.items() if k not in _ENCODED_META_KEYS}
+
+
+def iter_encoded_objects(
+    data: typing.Any,
+) -> typing.Iterator[typing.Tuple[str, typing.Dict[str, str], typing.Dict[str, typing.Any]]]:
+    """
+    Iterate over all encoded objects in data loaded without :py:func:`object_hook`.
+    Nested objects are also visited. Objects are not constructed.
+    Each :py:class:`ColumnarList` is reported once, with dict of columns as values.
+
+    :param data: data structure decoded without hooks
+    :return: iterator over tuples of class path, class version dict and values dict
+    """
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(reversed(item))
+            continue
+        if not isinstance(item, dict):
+            continue
+        if "__class__" in item:
+            class_str, version_dkt, values = encoded_parts(item)
+            yield class_str, version_dkt, values
+            item = values
+        elif "__columnar__" in item:
+            class_str = item["__columnar__"]
+            yield class_str, item.get("__class_version_dkt__", {class_str: "0.0.0"}), item["columns"]
+            item = item["columns"]
+        stack.extend(reversed(list(item.values())))
+
+
 def object_hook(dkt: dict) -> typing.Any:
     """
     Function restoring supported types from :py:func:`nme_object_encoder` function output.
@@ -142,32 +349,402 @@ def object_hook(dkt: dict) -> typing.Any:
 
     If the restoring object fails then function return dict with ``"__error__"`` key.
 
+    Restoring is done by decoder generated once per class and set of versions and cached in :py:data:`REGISTER`.
+
     :param dkt: dictionary with data to restore.
     """
+    if "__class__" not in dkt and "__columnar__" not in dkt and "__error__" not in dkt:
+        return dkt
+    return _restore(dkt, REGISTER, True)
+
+
+def _restore(dkt: dict, register: MigrationRegistration, check_errors: bool) -> typing.Any:
+    """Implementation of :py:func:`object_hook` for given register."""
     if "__error__" in dkt:
         dkt.pop("__error__")  # different environments without same plugins installed
+    if "__columnar__" in dkt:
+        try:
+            return decode_columnar(dkt, register)
+        except Exception as e:  # pylint: disable=W0703
+            dkt["__error__"] = str(e)
+            return dkt
     if "__class__" in dkt:
         if "__values__" not in dkt:
             cls_str = dkt.pop("__class__")
             version_dkt = dkt.pop("__class_version_dkt__") if "__class_version_dkt__" in dkt else {cls_str: "0.0.0"}
             dkt = {"__values__": dkt, "__class__": cls_str, "__class_version_dkt__": version_dkt}
         try:
-            cls = REGISTER.get_class(dkt["__class__"])
-        except (KeyError, ValueError):
-            dkt["__error__"] = f"Class {dkt['__class__']} not found in register."
-            return dkt
-        problematic_fields = check_for_errors_in_dkt_values(dkt["__values__"])
-        if problematic_fields and not REGISTER.allow_errors_in_values(cls):
-            dkt["__error__"] = f"Error in fields: {', '.join(problematic_fields)}"
+            decoder = get_decoder(dkt["__class__"], dkt["__class_version_dkt__"], register, check_errors)
+        except Exception as e:  # pylint: disable=W0703
+            dkt["__error__"] = str(e)
             return dkt
+        return decoder(dkt)
+
+    return dkt
+
+
+class Interner:
+    """
+    Object hook wrapper interning strings of decoded dicts with :py:func:`sys.intern`,
+    so equal strings from many objects (and many loaded documents) are stored once in memory.
+
+    Keys of dicts, class paths and version strings are always interned.
+    String values (also in lists) are interned if they are not longer than ``max_length``.
+    Interned keys are shared with attribute names of classes, so dicts restored as raw values
+    (like fields annotated with ``dict``) do not keep own copies of keys.
+
+    :param hook: object hook called with interned dict.
+    :param max_length: maximum length of interned string values, ``0`` disables interning of values.
+
+    Examples::
+
+        data = json.load(f_p, object_hook=Interner(max_length=32))
+        data = cbor2.load(f_p, object_hook=Interner(DecodeContext()).cbor_decoder)
+    """
+
+    def __init__(self, hook: typing.Callable[[dict], typing.Any] = object_hook, max_length: int = 0):
+        self._hook = hook
+        self.max_length = max_length
+
+    def _intern_list(self, lst: list):
+        max_length = self.max_length
+        for index, item in enumerate(lst):
+            if type(item) is str:
+                if len(item) <= max_length:
+                    lst[index] = sys.intern(item)
+            elif type(item) is list:
+                self._intern_list(item)
+
+    def intern(self, dkt: dict) -> dict:
+        """
+        Return copy of dict with interned keys and strings. Nested dicts are not visited.
+
+        :param dkt: dict to process.
+        """
+        intern = sys.intern
+        max_length = self.max_length
+        res = {}
+        for key, value in dkt.items():
+            if type(value) is str and len(value) <= max_length:
+                res[intern(key) if type(key) is str else key] = intern(value)
+                continue
+            if max_length and type(value) is list:
+                self._intern_list(value)
+            res[intern(key) if type(key) is str else key] = value
+        class_str = res.get("__class__", res.get("__columnar__"))
+        if type(class_str) is str:
+            res["__class__" if "__class__" in res else "__columnar__"] = intern(class_str)
+            version_dkt = res.get("__class_version_dkt__")
+            if type(version_dkt) is dict:
+                # keys were interned when version dict was decoded
+                for name, version in version_dkt.items():
+                    version_dkt[name] = intern(version) if type(version) is str else version
+        return res
+
+    def __call__(self, dkt: dict) -> typing.Any:
+        return self._hook(self.intern(dkt))
+
+    def cbor_decoder(self, decoder, value):  # noqa: ARG002
+        """Cbor decoder hook. See :py:func:`cbor_decoder`."""
+        return self(value)
+
+
+@dataclasses.dataclass
+class DecodeError:
+    """
+    Information about object which could not be restored.
+
+    :ivar typing.Tuple[typing.Union[str,int],...] path: keys, field names and list indices leading to object
+    :ivar str class_str: class path of object
+    :ivar str message: reason of failure
+    """
+
+    path: typing.Tuple[typing.Union[str, int], ...]
+    class_str: str
+    message: str
+
+
+class _Failure:
+    """Decoded value containing objects which failed to restore, not yet attached to its parent."""
+
+    __slots__ = ("failed", "failed_keys", "obj", "records")
+
+    def __init__(self, obj: typing.Any, records: typing.List[int], failed_keys: typing.List[str], failed: bool):
+        self.obj = obj  # kept to prevent reuse of its id
+        self.records = records
+        self.failed_keys = failed_keys
+        self.failed = failed
+
+
+def _check_not_reference(dkt: dict):
+    if "__ref__" in dkt or "__id__" in dkt:
+        raise ValueError("Data encoded with track_references should be restored with ReferenceResolver")
+
+
+class DecodeContext:
+    """
+    Stateful object hook which records objects that failed to restore at the moment of failure.
+
+    Objects are decoded bottom-up, so failures are propagated from children to parents while parsing.
+    Values of objects are scanned for failed children only if some failure is not yet attached
+    to its parent, so documents without errors do not pay for scanning.
+    After loading :py:meth:`report` returns paths of all failed objects without additional walk over data.
+    Data encoded with ``track_references`` are rejected with :py:class:`ValueError`,
+    as shared objects would be lost (see :py:class:`ReferenceResolver`).
+    A new instance should be used for each loaded document.
+
+    :param register: register used to restore objects
+    :param intern_length: if provided, strings of decoded dicts are interned (see :py:class:`Interner`)
+        and it is maximum length of interned string values
+
+    Examples::
+
+        context = DecodeContext()
+        data = json.load(f_p, object_hook=context)
+        for error in context.report(data):
+            print(error.path, error.message)
+        data = cbor2.load(f_p, object_hook=DecodeContext().cbor_decoder)
+    """
+
+    def __init__(self, register: MigrationRegistration = REGISTER, intern_length: typing.Optional[int] = None):
+        self._register = register
+        self._interner = None if intern_length is None else Interner(max_length=intern_length)
+        self._records: typing.List[typing.Tuple[str, str, typing.List[typing.Union[str, int]]]] = []
+        self._pending: typing.Dict[int, _Failure] = {}
+
+    @property
+    def register(self) -> MigrationRegistration:
+        """Register used to restore objects."""
+        return self._register
+
+    def _take_children(
+        self, items: typing.Iterable[typing.Tuple[typing.Any, typing.Any]]
+    ) -> typing.Tuple[typing.List[int], typing.List[str]]:
+        """
+        Attach pending failures placed in given items.
+
+        :return: indices of attached error records and keys of items which are failed objects
+        """
+        records: typing.List[int] = []
+        failed_keys = []
+        for key, value in items:
+            if not self._pending:
+                break
+            if isinstance(value, list):
+                found = self._take_children(enumerate(value))[0]
+            else:
+                failure = self._pending.pop(id(value), None)
+                if failure is None:
+                    continue
+                found = failure.records
+                if failure.failed:
+                    failed_keys.append(key)
+            for num in found:
+                self._records[num][2].append(key)
+            records.extend(found)
+        return records, failed_keys
+
+    def _decode(self, dkt: dict, failed_keys: typing.List[str]) -> typing.Any:
+        class_str = dkt["__class__"]
         try:
-            dkt_migrated = REGISTER.migrate_data(dkt["__class__"], dkt["__class_version_dkt__"], dkt["__values__"])
-            cls = REGISTER.get_class(dkt["__class__"])
-            return cls(**dkt_migrated)
+            decoder = get_decoder(class_str, dkt["__class_version_dkt__"], self._register, check_errors=False)
         except Exception as e:  # pylint: disable=W0703
             dkt["__error__"] = str(e)
+            return dkt
+        if failed_keys and not self._register.allow_errors_in_values(class_str):
+            dkt["__error__"] = f"Error in fields: {', '.join(failed_keys)}"
+            return dkt
+        return decoder(dkt)
+
+    def _decode_columnar(self, dkt: dict) -> typing.Any:
+        failure = self._pending.pop(id(dkt["columns"]), None) if self._pending else None
+        records = [] if failure is None else failure.records
+        if records:
+            dkt["__error__"] = "Error in columns"
+        else:
+            try:
+                return decode_columnar(dkt, self._register)
+            except Exception as e:  # pylint: disable=W0703
+                dkt["__error__"] = str(e)
+        records.append(len(self._records))
+        self._records.append((dkt["__columnar__"], dkt["__error__"], []))
+        self._pending[id(dkt)] = _Failure(dkt, records, [], True)
+        return dkt
+
+    def __call__(self, dkt: dict) -> typing.Any:
+        if self._interner is not None:
+            dkt = self._interner.intern(dkt)
+        if "__error__" in dkt:
+            dkt.pop("__error__")  # different environments without same plugins installed
+        _check_not_reference(dkt)
+        if "__columnar__" in dkt:
+            return self._decode_columnar(dkt)
+        if "__class__" not in dkt:
+            if self._pending:
+                records, failed_keys = self._take_children(dkt.items())
+                if records:
+                    self._pending[id(dkt)] = _Failure(dkt, records, failed_keys, False)
+            return dkt
+        records, failed_keys = [], []
+        if "__values__" in dkt:
+            failure = self._pending.pop(id(dkt["__values__"]), None) if self._pending else None
+            if failure is not None:
+                records, failed_keys = failure.records, failure.failed_keys
+        else:
+            cls_str = dkt.pop("__class__")
+            version_dkt = dkt.pop("__class_version_dkt__") if "__class_version_dkt__" in dkt else {cls_str: "0.0.0"}
+            if self._pending:
+                records, failed_keys = self._take_children(dkt.items())
+            dkt = {"__values__": dkt, "__class__": cls_str, "__class_version_dkt__": version_dkt}
+        res = self._decode(dkt, failed_keys)
+        if res is dkt:
+            records.append(len(self._records))
+            self._records.append((dkt["__class__"], dkt["__error__"], []))
+            self._pending[id(dkt)] = _Failure(dkt, records, [], True)
+        elif records:
+            self._pending[id(res)] = _Failure(res, records, [], False)
+        return res
+
+    def report(self, data: typing.Any) -> typing.List[DecodeError]:
+        """
+        List objects which failed to restore, in order of decoding (children before parents).
 
-    return dkt
+        :param data: result of loading document with this context
+        """
+        if isinstance(data, list):
+            self._take_children(enumerate(data))
+        self._pending.clear()
+        return [DecodeError(tuple(reversed(path)), class_str, message) for class_str, message, path in self._records]
+
+    def cbor_decoder(self, decoder, value):  # noqa: ARG002
+        """Cbor decoder hook. See :py:func:`cbor_decoder`."""
+        return self(value)
+
+
+class _UnresolvedReference:
+    __slots__ = ("ref_id",)
+
+    def __init__(self, ref_id):
+        self.ref_id = ref_id
+
+    def __repr__(self):
+        return f"<unresolved reference {self.ref_id}>"
+
+
+class ReferenceResolver:
+    """
+    Stateful object hook restoring data encoded with :py:class:`ReferenceTracker`.
+    Objects referenced multiple times are restored once and shared.
+
+    Reference cycles are restored by setting attributes after construction of referenced object,
+    so they are supported only for classes which accept any value in constructor
+    and store arguments under the same attribute names (like dataclasses).
+    A new instance should be used for each loaded document
+    and :py:meth:`check` should be called after loading.
+
+    :param hook: object hook used to restore objects.
+
+    Examples::
+
+        resolver = ReferenceResolver()
+        data = json.load(f_p, object_hook=resolver)
+        resolver.check()
+        data = cbor2.load(f_p, object_hook=ReferenceResolver().cbor_decoder)
+    """
+
+    def __init__(self, hook: typing.Callable[[dict], typing.Any] = object_hook):
+        self._hook = hook
+        self._objects: typing.Dict[int, typing.Any] = {}
+        self._unresolved: typing.Dict[int, typing.List[typing.Tuple[typing.Any, typing.Any]]] = {}
+
+    def _register_list(self, lst: list):
+        for index, item in enumerate(lst):
+            if isinstance(item, _UnresolvedReference):
+                self._unresolved[item.ref_id].append((lst, index))
+            elif isinstance(item, list):
+                self._register_list(item)
+
+    def __call__(self, dkt: dict) -> typing.Any:
+        if "__ref__" in dkt:
+            ref_id = dkt["__ref__"]
+            if ref_id in self._objects:
+                return self._objects[ref_id]
+            self._unresolved.setdefault(ref_id, [])
+            return _UnresolvedReference(ref_id)
+        ref_id = dkt.pop("__id__", None)
+        values = dkt.get("__values__", dkt) if "__class__" in dkt else dkt
+        unresolved = []
+        if self._unresolved:
+            for key, value in values.items():
+                if isinstance(value, _UnresolvedReference):
+                    unresolved.append((key, value))
+                elif isinstance(value, list):
+                    self._register_list(value)
+        res = self._hook(dkt)
+        for key, value in unresolved:
+            if res is dkt:
+                self._unresolved[value.ref_id].append((values, key))
+            elif getattr(res, key, None) is value:
+                self._unresolved[value.ref_id].append((res, key))
+        if ref_id is not None:
+            self._resolve(ref_id, res)
+        return res
+
+    def _resolve(self, ref_id: int, obj: typing.Any):
+        self._objects[ref_id] = obj
+        for holder, key in self._unresolved.pop(ref_id, []):
+            if isinstance(holder, (dict, list)):
+                holder[key] = obj
+            else:
+                object.__setattr__(holder, key, obj)
+
+    def check(self):
+        """
+        Check if all references were resolved. References may point to objects placed later in document,
+        so it could be checked only after whole document is loaded.
+
+        :raises ValueError: if document contains references to objects not present in it
+        """
+        if self._unresolved:
+            raise ValueError(f"References to objects not present in document: {sorted(self._unresolved)}")
+
+    def cbor_decoder(self, decoder, value):  # noqa: ARG002
+        """Cbor decoder hook. See :py:func:`cbor_decoder`."""
+        return self(value)
+
+
+def cbor_encoder(encoder, value):
+    """
+    Cbor encoder hook. Use :py:func:`nme_object_encoder` to encode objects.
+
+    :param encoder: cbor2.Encoder
+    :param value: object to be encoded
+
+    Examples::
+
+        with open(path_to_file, "wb") as f_p:
+            cbor2.dump(data, f_p, default=nme_cbor_encoder)
+    """
+    res = object_encoder(value)
+    if res is None:
+        raise TypeError(f"Cannot encode {value} of class {type(value)}")
+    return encoder.encode(res)
+
+
+def cbor_decoder(decoder, value):  # noqa: ARG001
+    """
+    Cbor decoder hook. Use :py:func:`nme_object_hook` to decode objects.
+
+    :param decoder: cbor2.Decoder
+    :param value: object to be decoded
+
+    Examples::
+
+        with open(path_to_file, "rb") as f_p:
+            data = cbor2.load(f_p, object_hook=nme_cbor_decoder)
+
+    """
+    return object_hook(value)
 
 
 nme_object_hook = object_hook
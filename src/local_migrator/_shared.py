@@ -0,0 +1,221 @@
+"""
+This module contains transport of data with large arrays between processes on the same host
+through :py:mod:`multiprocessing.shared_memory`.
+
+Buffers of arrays are copied once into single shared memory block. Only small message is sent
+between processes: name of block and json document in which arrays are replaced by placeholders::
+
+    {"__shared_array__": offset, "dtype": "<f8", "shape": [1000, 1000]}
+
+Registered objects keep usual class and version envelope, so receiver applies migrations
+to structural part of data while arrays are mapped without copying.
+"""
+
+import contextlib
+import json
+import sys
+import typing
+import weakref
+from multiprocessing import shared_memory
+
+from ._serialize_hooks import Encoder, object_encoder, object_hook
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    # allow to use in environment without numpy.
+    np = None
+
+_SHARED_KEY = "__shared_array__"
+_ALIGNMENT = 64
+
+
+def _check_numpy():
+    if np is None:  # pragma: no cover
+        raise RuntimeError("numpy package is required to share arrays")
+
+
+def _release(shm: shared_memory.SharedMemory):
+    """Close and remove shared memory block. Called at most once per block."""
+    shm.close()
+    with contextlib.suppress(FileNotFoundError):  # already removed by other process
+        shm.unlink()
+
+
+def _view(shm: shared_memory.SharedMemory, offset: int, dtype: "np.dtype", shape: typing.Sequence[int]) -> "np.ndarray":
+    """
+    Create array backed by shared memory block. :py:func:`numpy.frombuffer` keeps buffer exported,
+    so block could not be unmapped while array exists (``numpy.ndarray(buffer=...)`` does not protect it).
+    """
+    count = 1
+    for dim in shape:
+        count *= dim
+    return np.frombuffer(shm.buf, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+
+class SharedBlock:
+    """
+    Copy arrays from data into shared memory block and encode remaining data as json.
+    Arrays smaller than ``min_bytes`` and arrays of python objects are encoded inline (as lists).
+
+    Owner of block is responsible for its removal. Block is removed on :py:meth:`close`,
+    on exit from ``with`` block, when this object is garbage collected or at interpreter exit.
+    On POSIX systems block could be removed as soon as all receivers attached it,
+    already mapped arrays stay valid. On Windows memory is freed when last process closes it.
+
+    :param obj: data to be shared
+    :param min_bytes: minimal size of array placed in shared memory
+
+    Example::
+
+        with SharedBlock(session) as block:
+            queue.put(block.message)
+            done_event.wait()
+    """
+
+    def __init__(self, obj: typing.Any, min_bytes: int = 2**16):
+        _check_numpy()
+        self.min_bytes = min_bytes
+        self._arrays: typing.List[typing.Tuple[int, typing.Any]] = []
+        self._size = 0
+        json_encoder = Encoder(separators=(",", ":"), encoder=self._encode_object)
+        text = json_encoder.encode(obj)
+        self._shm: typing.Optional[shared_memory.SharedMemory] = None
+        if self._arrays:
+            self._shm = shared_memory.SharedMemory(create=True, size=max(self._size, 1))
+            self._finalizer = weakref.finalize(self, _release, self._shm)
+            try:
+                for offset, array in self._arrays:
+                    # temporary view is dropped immediately, block could not be closed while views exist
+                    _view(self._shm, offset, array.dtype, array.shape)[...] = array
+            except BaseException:
+                self.close()
+                raise
+        self._arrays = []
+        self.message: typing.Dict[str, typing.Any] = {
+            "segment": None if self._shm is None else self._shm.name,
+            "data": text,
+        }
+        """Small picklable and json serializable message to be sent to receiver (see :py:class:`SharedView`)."""
+
+    def _encode_object(self, obj: typing.Any) -> typing.Any:
+        if isinstance(obj, np.ndarray) and obj.nbytes >= self.min_bytes and not obj.dtype.hasobject:
+            offset = -self._size // _ALIGNMENT * -_ALIGNMENT
+            self._arrays.append((offset, obj))
+            self._size = offset + obj.nbytes
+            return {_SHARED_KEY: offset, "dtype": np.lib.format.dtype_to_descr(obj.dtype), "shape": list(obj.shape)}
+        return object_encoder(obj)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of shared memory block. ``0`` if no array was placed in shared memory."""
+        return 0 if self._shm is None else self._shm.size
+
+    @property
+    def closed(self) -> bool:
+        """If block was already removed."""
+        return self._shm is None or not self._finalizer.alive
+
+    def close(self):
+        """Remove shared memory block. Receivers which already attached it are not affected on POSIX."""
+        if self._shm is not None:
+            self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):  # pragma: no cover
+        # block is owned by sender, so it should not be removed when receiver exits
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedView:
+    """
+    Restore data from message of :py:class:`SharedBlock`. Arrays are views of shared memory (no copy),
+    other data are decoded with ``hook`` (by default :py:func:`object_hook`, so migrations are applied).
+
+    Arrays are valid until :py:meth:`close`. Block could not be closed while arrays are still referenced,
+    so all references to arrays (and objects containing them) should be dropped before closing
+    or ``copy=True`` should be used.
+
+    :param message: :py:attr:`SharedBlock.message`
+    :param writable: if arrays should be writable. Changes are visible in all processes which attached block.
+    :param copy: if arrays should be copied to private memory, then block is closed immediately
+    :param hook: function used to restore objects, same as ``object_hook`` of :py:func:`json.loads`
+
+    Example::
+
+        with SharedView(queue.get()) as view:
+            process(view.data)
+        done_event.set()
+    """
+
+    def __init__(
+        self,
+        message: typing.Dict[str, typing.Any],
+        writable: bool = False,
+        copy: bool = False,
+        hook: typing.Callable[[dict], typing.Any] = object_hook,
+    ):
+        self._shm: typing.Optional[shared_memory.SharedMemory] = None
+        self._writable = writable
+        self._copy = copy
+        self._hook = hook
+        if message["segment"] is not None:
+            _check_numpy()
+            self._shm = _attach(message["segment"])
+        try:
+            self.data: typing.Any = json.loads(message["data"], object_hook=self._decode)
+        except BaseException:
+            self.close()
+            raise
+        if copy:
+            self._close_block()
+
+    def _decode(self, dkt: dict) -> typing.Any:
+        if _SHARED_KEY not in dkt:
+            return self._hook(dkt)
+        if self._shm is None:
+            raise ValueError("Message does not contain name of shared memory block")
+        array = _view(self._shm, dkt[_SHARED_KEY], np.lib.format.descr_to_dtype(dkt["dtype"]), dkt["shape"])
+        if self._copy:
+            return array.copy()
+        array.flags.writeable = self._writable
+        return array
+
+    @property
+    def closed(self) -> bool:
+        """If block was already closed."""
+        return self._shm is None
+
+    def close(self):
+        """
+        Close shared memory block. Data are dropped.
+
+        :raises BufferError: if arrays from block are still referenced
+        """
+        self.data = None
+        self._close_block()
+
+    def _close_block(self):
+        if self._shm is None:
+            return
+        try:
+            self._shm.close()
+        except BufferError:
+            raise BufferError(
+                "Arrays from shared memory block are still referenced. Drop them before closing view."
+            ) from None
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
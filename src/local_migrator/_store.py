@@ -0,0 +1,168 @@
+"""
+This module contains key-value storage of registered objects backed by :py:mod:`sqlite3`.
+"""
+
+import sqlite3
+import typing
+from collections.abc import MutableMapping
+from pathlib import Path
+
+from packaging.version import Version
+
+from ._class_register import REGISTER, MigrationRegistration, class_to_str, str_to_version
+from ._hooks import make_hooks
+
+
+class MigratingStore(MutableMapping):
+    """
+    Key-value store of objects serialized with :py:class:`Encoder`, backed by :py:mod:`sqlite3` database.
+
+    Each record is stored together with its class path and class version in indexed columns,
+    so records could be queried without decoding them (see :py:meth:`keys_below_version`).
+    Records are decoded and migrated lazily on access. Records which were stored
+    with older version of class are re-encoded in current version and written back
+    in bulk on :py:meth:`flush` (called also on :py:meth:`close`).
+
+    Only the version of top-level object is used to determine if the record needs upgrade.
+
+    :param path: path to database file. Could be ``":memory:"``.
+    :param table: name of table used for records
+    :param register: register used to encode and restore records and to determine current versions of classes
+
+    Example::
+
+        with MigratingStore("session.sqlite") as store:
+            store["settings"] = settings
+            settings = store["settings"]
+    """
+
+    def __init__(
+        self, path: typing.Union[str, Path], table: str = "records", register: MigrationRegistration = REGISTER
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name {table}")
+        self._table = table
+        self._register = register
+        self._hooks = make_hooks(register)
+        self._pending_upgrades: typing.Dict[str, typing.Tuple[str, str, str]] = {}
+        self._connection = sqlite3.connect(str(path))
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, class TEXT NOT NULL, version TEXT NOT NULL, data TEXT NOT NULL)"
+        )
+        self._connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_class_version ON {table} (class, version)")
+        self._connection.commit()
+
+    def _encode(self, value: typing.Any) -> typing.Tuple[str, str, str]:
+        encoded = self._hooks.encoder(value)
+        if isinstance(encoded, dict) and "__class__" in encoded:
+            class_str = encoded["__class__"]
+            return class_str, encoded["__class_version_dkt__"][class_str], self._hooks.dumps(encoded)
+        return "", "", self._hooks.dumps(value)
+
+    def _is_outdated(self, class_str: str, version: str) -> bool:
+        if not class_str:
+            return False
+        try:
+            cls = self._register.get_class(class_str)
+        except ValueError:
+            return False
+        return class_to_str(cls) != class_str or str(self._register.get_version(cls)) != version
+
+    def __getitem__(self, key: str) -> typing.Any:
+        row = self._connection.execute(
+            f"SELECT class, version, data FROM {self._table} WHERE key = ?", (key,)  # noqa: S608
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        class_str, version, data = row
+        value = self._hooks.loads(data)
+        if self._is_outdated(class_str, version) and not (isinstance(value, dict) and "__error__" in value):
+            self._pending_upgrades[key] = self._encode(value)
+        return value
+
+    def __setitem__(self, key: str, value: typing.Any):
+        self.update({key: value})
+
+    def __delitem__(self, key: str):
+        self._pending_upgrades.pop(key, None)
+        cursor = self._connection.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))  # noqa: S608
+        self._connection.commit()
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter([x for (x,) in self._connection.execute(f"SELECT key FROM {self._table}")])  # noqa: S608
+
+    def __len__(self) -> int:
+        return self._connection.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]  # noqa: S608
+
+    def __contains__(self, key: object) -> bool:
+        query = f"SELECT 1 FROM {self._table} WHERE key = ?"  # noqa: S608
+        return self._connection.execute(query, (key,)).fetchone() is not None
+
+    def update(self, *args, **kwargs):
+        """Encode and store all given records in single transaction."""
+        records = dict(*args, **kwargs)
+        rows = []
+        for key, value in records.items():
+            self._pending_upgrades.pop(key, None)
+            rows.append((key, *self._encode(value)))
+        self._write_rows(rows)
+
+    def _write_rows(self, rows: typing.List[typing.Tuple[str, str, str, str]]):
+        with self._connection:
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO {self._table} (key, class, version, data) VALUES (?, ?, ?, ?)",  # noqa: S608
+                rows,
+            )
+
+    def flush(self):
+        """Write back records which were upgraded to current version during read."""
+        if not self._pending_upgrades:
+            return
+        rows = [(key, *value) for key, value in self._pending_upgrades.items()]
+        self._pending_upgrades = {}
+        self._write_rows(rows)
+
+    def class_versions(self, cls: typing.Union[str, typing.Type]) -> typing.Dict[str, Version]:
+        """
+        Get version of all records of a given class, including records stored under old paths of class.
+        Records are not decoded.
+
+        :param cls: class or fully qualified class path
+        :return: mapping from key to version with which record was stored
+        """
+        names = self._register.class_paths(cls)
+        query = (
+            f"SELECT key, version FROM {self._table} "  # noqa: S608
+            f"WHERE class IN ({', '.join('?' * len(names))})"
+        )
+        return {key: str_to_version(version) for key, version in self._connection.execute(query, names)}
+
+    def keys_below_version(
+        self, cls: typing.Union[str, typing.Type], version: typing.Optional[typing.Union[str, Version]] = None
+    ) -> typing.List[str]:
+        """
+        Get keys of records of a given class stored with version lower than the given one.
+        Records are not decoded.
+
+        :param cls: class or fully qualified class path
+        :param version: version to compare with. If not provided then current version of class is used.
+        """
+        if version is None:
+            cls = self._register.get_class(cls) if isinstance(cls, str) else cls
+            version = self._register.get_version(cls)
+        version = str_to_version(version)
+        return [key for key, version_ in self.class_versions(cls).items() if version_ < version]
+
+    def close(self):
+        """Write pending upgrades and close database connection."""
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,319 @@
+"""
+This module contains streaming JSON encoder which writes large arrays and lists chunk by chunk
+and canonical encoding used to calculate stable content hashes.
+"""
+
+import hashlib
+import json
+import math
+import re
+import typing
+from json.encoder import encode_basestring, encode_basestring_ascii
+from operator import itemgetter
+
+from ._serialize_hooks import object_encoder
+
+try:
+    from numpy import ndarray
+except ImportError:  # pragma: no cover
+    # allow to use in environment without numpy.
+    class ndarray:  # type: ignore  [no-redef]
+        pass
+
+
+_PRIMITIVE_TYPES = (str, int, float, bool, type(None))
+
+
+class StreamingEncoder:
+    """
+    JSON encoder producing output as sequence of small chunks.
+    Output is the same as from ``json.dumps(obj, cls=Encoder)``.
+
+    Unlike :py:class:`Encoder` it does not materialize the whole output, nor converts
+    the whole :py:class:`numpy.ndarray` with ``tolist``. Arrays are converted block of rows by block of rows
+    and long lists are encoded ``chunk_items`` elements at once, so the peak memory usage
+    is proportional to a single chunk.
+
+    :param chunk_items: number of list elements or array rows encoded at once
+    :param ensure_ascii: same as for :py:class:`json.JSONEncoder`
+    :param separators: same as for :py:class:`json.JSONEncoder`
+    :param sort_keys: same as for :py:class:`json.JSONEncoder`
+    """
+
+    def __init__(
+        self,
+        chunk_items: int = 1024,
+        ensure_ascii: bool = True,
+        separators: typing.Tuple[str, str] = (", ", ": "),
+        sort_keys: bool = False,
+    ):
+        self.chunk_items = chunk_items
+        self.item_separator, self.key_separator = separators
+        self.sort_keys = sort_keys
+        self._encode_str = encode_basestring_ascii if ensure_ascii else encode_basestring
+        self._primitive_encoder = json.JSONEncoder(
+            ensure_ascii=ensure_ascii, separators=separators, check_circular=False
+        )
+
+    def _encode_float(self, value: float) -> str:
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "Infinity" if value > 0 else "-Infinity"
+        return float.__repr__(value)
+
+    def _encode_primitive(self, value: typing.Any) -> str:
+        if isinstance(value, str):
+            return self._encode_str(value)
+        if value is None:
+            return "null"
+        if value is True:
+            return "true"
+        if value is False:
+            return "false"
+        if isinstance(value, int):
+            return int.__repr__(value)
+        return self._encode_float(value)
+
+    def _encode_primitives(self, chunk: typing.Sequence) -> str:
+        """Encode sequence of primitive values without enclosing brackets."""
+        return self._primitive_encoder.encode(list(chunk))[1:-1]
+
+    def _encode_key(self, key: typing.Any) -> str:
+        if isinstance(key, str):
+            return self._encode_str(key)
+        if isinstance(key, _PRIMITIVE_TYPES):
+            return self._encode_str(self._encode_primitive(key))
+        raise TypeError(f"keys must be str, int, float, bool or None, not {key.__class__.__name__}")
+
+    def iterencode(self, obj: typing.Any) -> typing.Iterator[str]:
+        """
+        Encode object as sequence of strings.
+
+        :param obj: object to be encoded
+        """
+        if isinstance(obj, _PRIMITIVE_TYPES):
+            yield self._encode_primitive(obj)
+        elif isinstance(obj, (list, tuple)):
+            yield from self._iterencode_list(obj)
+        elif isinstance(obj, dict):
+            yield from self._iterencode_dict(obj)
+        elif isinstance(obj, ndarray):
+            yield from self._iterencode_array(obj)
+        else:
+            encoded = object_encoder(obj)
+            if encoded is None:
+                raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+            yield from self.iterencode(encoded)
+
+    def _iterencode_items(self, lst: typing.Sequence) -> typing.Iterator[str]:
+        """Encode elements of sequence without enclosing brackets."""
+        first = True
+        for start in range(0, len(lst), self.chunk_items):
+            chunk = lst[start : start + self.chunk_items]
+            if all(isinstance(x, _PRIMITIVE_TYPES) for x in chunk):
+                if not first:
+                    yield self.item_separator
+                first = False
+                yield self._encode_primitives(chunk)
+                continue
+            for item in chunk:
+                if not first:
+                    yield self.item_separator
+                first = False
+                if isinstance(item, _PRIMITIVE_TYPES):
+                    yield self._encode_primitive(item)
+                else:
+                    yield from self.iterencode(item)
+
+    def _iterencode_list(self, lst: typing.Sequence) -> typing.Iterator[str]:
+        if not lst:
+            yield "[]"
+            return
+        yield "["
+        yield from self._iterencode_items(lst)
+        yield "]"
+
+    def _dict_items(self, dkt: dict) -> typing.Iterable[typing.Tuple[str, typing.Any]]:
+        """Encoded keys and values of dict in output order."""
+        items = sorted(dkt.items()) if self.sort_keys else dkt.items()
+        return [(self._encode_key(key), value) for key, value in items]
+
+    def _iterencode_dict(self, dkt: dict) -> typing.Iterator[str]:
+        if not dkt:
+            yield "{}"
+            return
+        separator = "{"
+        for key, value in self._dict_items(dkt):
+            if isinstance(value, _PRIMITIVE_TYPES):
+                yield f"{separator}{key}{self.key_separator}{self._encode_primitive(value)}"
+            else:
+                yield f"{separator}{key}{self.key_separator}"
+                yield from self.iterencode(value)
+            separator = self.item_separator
+        yield "}"
+
+    def _iterencode_array(self, array: ndarray) -> typing.Iterator[str]:
+        if array.ndim == 0:
+            yield from self.iterencode(array.item())
+            return
+        if array.shape[0] == 0:
+            yield "[]"
+            return
+        yield "["
+        for start in range(0, array.shape[0], self.chunk_items):
+            if start:
+                yield self.item_separator
+            yield from self._iterencode_items(array[start : start + self.chunk_items].tolist())
+        yield "]"
+
+
+def dump_stream(obj: typing.Any, fp: typing.TextIO, chunk_size: int = 2**16, chunk_items: int = 1024, **kwargs) -> None:
+    """
+    Serialize ``obj`` as JSON to text file without materializing whole output.
+    Produced file could be read with ``json.load(fp, object_hook=object_hook)``.
+
+    :param obj: object to be saved
+    :param fp: file opened in text mode
+    :param chunk_size: approximated size (in characters) of single write to file
+    :param chunk_items: number of list elements or array rows encoded at once
+    :param kwargs: other arguments passed to :py:class:`StreamingEncoder`
+    """
+    buffer: typing.List[str] = []
+    size = 0
+    for chunk in StreamingEncoder(chunk_items=chunk_items, **kwargs).iterencode(obj):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            fp.write("".join(buffer))
+            buffer = []
+            size = 0
+    if buffer:
+        fp.write("".join(buffer))
+
+
+class CanonicalEncoder(StreamingEncoder):
+    """
+    Streaming encoder producing canonical JSON: the same data always give the same output,
+    independent of dict insertion order (including order of ``__class_version_dkt__``) and number types.
+
+    * keys of dicts are sorted by their encoded form,
+    * output is compact (no whitespace) and not escaped to ascii,
+    * floats use shortest representation which round-trips, without ``.0`` suffix
+      (``1.0`` is written as ``1``, ``-0.0`` as ``0``).
+
+    Output is streamed by chunks of lists, single element of list is encoded at once.
+
+    :param chunk_items: number of list elements or array rows encoded at once
+    """
+
+    def __init__(self, chunk_items: int = 1024):
+        super().__init__(chunk_items=chunk_items, ensure_ascii=False, separators=(",", ":"))
+
+    def _encode_float(self, value: float) -> str:
+        res = super()._encode_float(value)
+        if res.endswith(".0"):
+            res = res[:-2]
+            return "0" if res == "-0" else res
+        return res
+
+    def _encode_primitives(self, chunk: typing.Sequence) -> str:
+        types = set(map(type, chunk))
+        if types <= _NOT_FLOAT_TYPES:
+            return super()._encode_primitives(chunk)
+        if types <= _NUMBER_TYPES:
+            # no strings, so ".0" could be only suffix of float
+            return _FLOAT_SUFFIX.sub(_strip_float_suffix, super()._encode_primitives(chunk))
+        return self.item_separator.join(map(self._encode_primitive, chunk))
+
+    def _dict_items(self, dkt: dict) -> typing.Iterable[typing.Tuple[str, typing.Any]]:
+        return sorted(((self._encode_key(key), value) for key, value in dkt.items()), key=itemgetter(0))
+
+    def _iterencode_items(self, lst: typing.Sequence) -> typing.Iterator[str]:
+        # elements are encoded without generators, so output is streamed by chunks of list
+        # and single element is materialized at once
+        for start in range(0, len(lst), self.chunk_items):
+            chunk = lst[start : start + self.chunk_items]
+            parts = [self.item_separator] if start else []
+            if all(isinstance(x, _PRIMITIVE_TYPES) for x in chunk):
+                parts.append(self._encode_primitives(chunk))
+            else:
+                for i, item in enumerate(chunk):
+                    if i:
+                        parts.append(self.item_separator)
+                    self._append(item, parts)
+            yield "".join(parts)
+
+    def _append(self, obj: typing.Any, parts: typing.List[str]):
+        """Append encoded object to list of parts."""
+        if isinstance(obj, _PRIMITIVE_TYPES):
+            parts.append(self._encode_primitive(obj))
+        elif isinstance(obj, (list, tuple)):
+            if all(isinstance(x, _PRIMITIVE_TYPES) for x in obj):
+                parts.append(f"[{self._encode_primitives(obj)}]")
+                return
+            separator = "["
+            for item in obj:
+                parts.append(separator)
+                self._append(item, parts)
+                separator = self.item_separator
+            parts.append("]")
+        elif isinstance(obj, dict):
+            separator = "{"
+            for key, value in self._dict_items(obj):
+                parts.append(f"{separator}{key}{self.key_separator}")
+                self._append(value, parts)
+                separator = self.item_separator
+            parts.append("}" if obj else "{}")
+        elif isinstance(obj, ndarray):
+            self._append(obj.tolist(), parts)
+        else:
+            encoded = object_encoder(obj)
+            if encoded is None:
+                raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+            self._append(encoded, parts)
+
+
+_NOT_FLOAT_TYPES = {str, int, bool, type(None)}
+_NUMBER_TYPES = {float, int, bool, type(None)}
+_FLOAT_SUFFIX = re.compile(r"(^|,)(-?\d+)\.0(?=,|$)")
+
+
+def _strip_float_suffix(match: "re.Match") -> str:
+    number = match.group(2)
+    return match.group(1) + ("0" if number == "-0" else number)
+
+
+def dumps_canonical(obj: typing.Any) -> str:
+    """
+    Encode data to canonical JSON (see :py:class:`CanonicalEncoder`).
+    Result could be read with ``json.loads(text, object_hook=object_hook)``.
+
+    :param obj: data to be encoded
+    """
+    return "".join(CanonicalEncoder().iterencode(obj))
+
+
+def content_hash(obj: typing.Any, algorithm: str = "sha256", chunk_size: int = 2**16) -> str:
+    """
+    Calculate stable digest of canonical encoding of data. Output is hashed chunk by chunk,
+    so the whole encoded text is never materialized. Could be used as cache key for results
+    of expensive computations on registered objects.
+
+    :param obj: data to be hashed
+    :param algorithm: name of algorithm from :py:mod:`hashlib`
+    :param chunk_size: approximated size (in characters) of single hash update
+    :return: hex digest
+    """
+    hasher = hashlib.new(algorithm)
+    buffer: typing.List[str] = []
+    size = 0
+    for chunk in CanonicalEncoder().iterencode(obj):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            hasher.update("".join(buffer).encode("utf-8"))
+            buffer = []
+            size = 0
+    hasher.update("".join(buffer).encode("utf-8"))
+    return hasher.hexdigest()
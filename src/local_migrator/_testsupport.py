@@ -7,8 +7,10 @@ def clean_register():
 
     def clean():
         REGISTER._data_dkt = {}
+        REGISTER._clear_caches()
 
     old_dict = REGISTER._data_dkt
     clean()
     yield clean
     REGISTER._data_dkt = old_dict
+    REGISTER._clear_caches()
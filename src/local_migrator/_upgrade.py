@@ -0,0 +1,167 @@
+"""
+This module contains utilities for offline upgrade of saved files to current versions of registered classes.
+"""
+
+import importlib
+import typing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+
+from ._class_register import REGISTER, MigrationRegistration, class_to_str, migration_name
+from ._codegen import class_version_dkt
+from ._io import FILE_FORMATS, PathType, dump_file, file_format, load_file
+from ._serialize_hooks import DecodeContext, iter_encoded_objects
+
+
+@dataclass
+class UpgradeReport:
+    """
+    Information about upgrade of single file.
+
+    :ivar pathlib.Path path: path to file
+    :ivar typing.Dict[str,int] classes: number of outdated objects per class path
+    :ivar typing.Dict[str,int] migrations: number of calls per migration
+    :ivar bool upgraded: if file was rewritten
+    :ivar typing.Optional[str] error: reason why file could not be upgraded
+    """
+
+    path: Path
+    classes: typing.Dict[str, int] = field(default_factory=dict)
+    migrations: typing.Dict[str, int] = field(default_factory=dict)
+    upgraded: bool = False
+    error: typing.Optional[str] = None
+
+    @property
+    def outdated(self) -> bool:
+        """If file contains objects saved in old version of class or under old path."""
+        return bool(self.classes)
+
+    def __str__(self):
+        if self.error is not None:
+            return f"{self.path}: error: {self.error}"
+        if not self.outdated:
+            return f"{self.path}: up to date"
+        status = "upgraded" if self.upgraded else "needs upgrade"
+        lines = [f"{self.path}: {status}"]
+        lines.extend(f"    class {name} x{count}" for name, count in sorted(self.classes.items()))
+        lines.extend(f"    migration {name} x{count}" for name, count in sorted(self.migrations.items()))
+        return "\n".join(lines)
+
+
+def _outdated_migrations(
+    class_str: str, version_dkt: typing.Dict[str, str], register: MigrationRegistration
+) -> typing.Optional[typing.List[str]]:
+    """Return list of migration names if object needs upgrade, otherwise ``None``"""
+    cls = register.get_class(class_str)
+    migrations = [migration_name(x) for x in register.migration_plan(class_str, version_dkt)]
+    if migrations or class_to_str(cls) != class_str or class_version_dkt(cls, register) != version_dkt:
+        return migrations
+    return None
+
+
+def check_file(path: PathType, register: MigrationRegistration = REGISTER) -> UpgradeReport:
+    """
+    Check which outdated classes and migrations are present in file. Objects are not constructed.
+
+    :param path: path to file
+    :param register: register used to determine current versions
+    """
+    report = UpgradeReport(Path(path))
+    classes: typing.Counter[str] = Counter()
+    migrations: typing.Counter[str] = Counter()
+    cache: typing.Dict[typing.Tuple[str, tuple], typing.Optional[typing.List[str]]] = {}
+    try:
+        data = load_file(path, hooks=False)
+        for class_str, version_dkt, _ in iter_encoded_objects(data):
+            key = (class_str, tuple(version_dkt.items()))
+            if key not in cache:
+                cache[key] = _outdated_migrations(class_str, version_dkt, register)
+            if cache[key] is not None:
+                classes[class_str] += 1
+                migrations.update(cache[key])
+    except Exception as e:  # pylint: disable=W0703
+        report.error = str(e)
+    report.classes = dict(classes)
+    report.migrations = dict(migrations)
+    return report
+
+
+def upgrade_file(path: PathType, dry_run: bool = False) -> UpgradeReport:
+    """
+    Rewrite file using current versions of all classes. File is replaced atomically.
+    File is not rewritten if it is up to date or if any object fails to be restored.
+    Files saved with ``track_references`` (see :py:class:`~.ReferenceTracker`) are not supported
+    and reported as error.
+
+    :param path: path to file
+    :param dry_run: if only report should be generated, without rewriting file
+    """
+    report = check_file(path)
+    if dry_run or report.error is not None or not report.outdated:
+        return report
+    try:
+        context = DecodeContext()
+        data = load_file(path, context=context)
+        errors = context.report(data)
+        if errors:
+            report.error = (
+                f"{len(errors)} objects could not be restored, first at {errors[0].path}: {errors[0].message}"
+            )
+            return report
+        dump_file(data, path)
+    except Exception as e:  # pylint: disable=W0703
+        report.error = str(e)
+        return report
+    report.upgraded = True
+    return report
+
+
+def find_files(paths: typing.Iterable[PathType]) -> typing.List[Path]:
+    """
+    Collect files in supported formats (see :py:data:`~._io.FILE_FORMATS`).
+    Directories are searched recursively.
+
+    :param paths: list of files and directories
+    """
+    res = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            res.extend(sorted(x for x in path.rglob("*") if x.suffix.lower() in FILE_FORMATS and x.is_file()))
+        else:
+            file_format(path)
+            res.append(path)
+    return res
+
+
+def import_modules(modules: typing.Iterable[str]):
+    """Import modules to perform registration of classes."""
+    for name in modules:
+        importlib.import_module(name)
+
+
+def upgrade_paths(
+    paths: typing.Iterable[PathType],
+    dry_run: bool = False,
+    workers: typing.Optional[int] = None,
+    modules: typing.Sequence[str] = (),
+) -> typing.Iterator[UpgradeReport]:
+    """
+    Upgrade all files from given paths using process pool.
+
+    :param paths: list of files and directories
+    :param dry_run: if only reports should be generated, without rewriting files
+    :param workers: number of worker processes. If ``1`` then work is done in current process.
+    :param modules: modules that need to be imported to register classes
+    :return: iterator over reports in order of files
+    """
+    files = find_files(paths)
+    import_modules(modules)
+    func = partial(upgrade_file, dry_run=dry_run)
+    if workers == 1:
+        yield from map(func, files)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=import_modules, initargs=(tuple(modules),)) as executor:
+        yield from executor.map(func, files, chunksize=8)
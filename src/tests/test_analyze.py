@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+
+import pytest
+
+from local_migrator import MigrationRegistration, class_to_str, dump_file, make_hooks, register_class, rename_key
+from local_migrator.__main__ import main
+from local_migrator._analyze import analyze_paths, scan_file
+
+
+@dataclass
+class SampleDataclass:
+    field1: int
+
+
+@pytest.fixture
+def corpus(tmp_path, clean_register):
+    @register_class
+    @dataclass
+    class MigrateClass:
+        field: int
+
+    dump_file([MigrateClass(1), MigrateClass(2), SampleDataclass(3)], tmp_path / "v0.json")
+    class_str = class_to_str(MigrateClass)
+    clean_register()
+
+    @register_class(version="0.0.1", old_paths=[class_str], migrations=[("0.0.1", rename_key("field", "field1"))])
+    @dataclass
+    class MigrateClass:
+        field1: int
+
+    dump_file([MigrateClass(3), SampleDataclass(MigrateClass(4))], tmp_path / "v1.cbor")
+    clean_register()
+
+    def add_field(dkt):
+        return {**dkt, "field2": 0}
+
+    @register_class(
+        version="0.0.3",
+        old_paths=[class_str],
+        migrations=[("0.0.1", rename_key("field", "field1")), ("0.0.2", add_field), ("0.0.3", rename_key("x", "y"))],
+    )
+    @dataclass
+    class MigrateClass2:
+        field1: int
+        field2: int
+
+    dump_file([MigrateClass2(5, 5)], tmp_path / "v3.json")
+    (tmp_path / "broken.json").write_text("[")
+    return tmp_path, class_str, MigrateClass2
+
+
+def test_scan_file(corpus):
+    tmp_path, class_str, _ = corpus
+    counts, samples = scan_file(tmp_path / "v0.json", samples=1)
+    assert counts[(class_str, ((class_str, "0.0.0"),))] == 2
+    assert samples[(class_str, ((class_str, "0.0.0"),))] == [{"field": 1}]
+
+
+def test_analyze(corpus):
+    tmp_path, class_str, migrate_class = corpus
+    new_class_str = class_to_str(migrate_class)
+    sample_str = class_to_str(SampleDataclass)
+    report = analyze_paths([tmp_path], workers=1, samples=5)
+    assert report.files == 4
+    assert list(report.errors) == [str(tmp_path / "broken.json")]
+    assert report.classes == {class_str: 4, sample_str: 2, new_class_str: 1}
+    assert report.versions[class_str] == {"0.0.0": 2, "0.0.1": 2}
+    assert report.versions[new_class_str] == {"0.0.3": 1}
+    assert [(x.version, x.calls, x.samples, x.failures) for x in report.steps] == [
+        ("0.0.1", 2, 2, 0),
+        ("0.0.2", 4, 4, 0),
+        ("0.0.3", 4, 0, 4),
+    ]
+    assert report.steps[1].name.endswith("add_field")
+    assert report.steps[1].mean_time > 0
+    text = str(report)
+    assert f"{new_class_str} 0.0.2 {report.steps[1].name}: x4, mean" in text
+    assert "4 failures" in text
+
+
+def test_unused_step(corpus):
+    tmp_path, *_ = corpus
+    report = analyze_paths([tmp_path / "v3.json"], workers=1)
+    assert all(x.calls == 0 for x in report.steps)
+    assert len(report.steps) == 3
+    assert "unused" in str(report)
+
+
+def test_own_register(tmp_path):
+    @dataclass
+    class Child:
+        value: int
+
+    @dataclass
+    class Parent:
+        child: Child
+
+    old_register = MigrationRegistration()
+    old_register.register(Child)
+    old_register.register(Parent)
+    (tmp_path / "data.json").write_text(make_hooks(old_register).dumps([Parent(Child(1))]))
+
+    def migrate(dkt):
+        # nested object has to be restored with the same register
+        return {"child": Child(dkt["child"].value + 1)}
+
+    register = MigrationRegistration()
+    register.register(Child)
+    register.register(Parent, version="0.0.1", migrations=[("0.0.1", migrate)])
+    report = analyze_paths([tmp_path], workers=1, register=register)
+    assert [(x.calls, x.samples, x.failures) for x in report.steps] == [(1, 1, 0)]
+
+
+def test_process_pool(tmp_path):
+    dump_file([SampleDataclass(1)], tmp_path / "data1.json")
+    dump_file([SampleDataclass(2)], tmp_path / "data2.json")
+    report = analyze_paths([tmp_path], workers=2)
+    assert report.classes == {class_to_str(SampleDataclass): 2}
+    assert not report.errors
+
+
+def test_cli(corpus, capsys):
+    tmp_path, class_str, _ = corpus
+    assert main(["analyze", "--workers", "1", "--samples", "1", str(tmp_path / "v0.json")]) == 0
+    captured = capsys.readouterr()
+    assert f"{class_str} 0.0.0 x2" in captured.out
+    assert main(["analyze", "--workers", "1", str(tmp_path)]) == 1
+    assert "broken.json" in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pytest
+
+from local_migrator import AsyncSerializer, dump_file, dump_file_async, load_file, load_file_async
+
+
+@dataclass
+class SampleDataclass:
+    field1: int
+    field2: str
+
+
+def test_load_dump(tmp_path):
+    data = [SampleDataclass(i, "a" * i) for i in range(100)]
+
+    async def run():
+        await dump_file_async(data, tmp_path / "data.json")
+        await dump_file_async(data, tmp_path / "data.cbor")
+        return await asyncio.gather(load_file_async(tmp_path / "data.json"), load_file_async(tmp_path / "data.cbor"))
+
+    assert asyncio.run(run()) == [data, data]
+    assert load_file(tmp_path / "data.json") == data
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_executor(tmp_path, executor_class):
+    data = [SampleDataclass(i, "b") for i in range(10)]
+    for i in range(4):
+        dump_file(data[i:], tmp_path / f"data{i}.json")
+
+    async def run(serializer):
+        await serializer.dump(data, tmp_path / "data.cbor")
+        return await asyncio.gather(*[serializer.load(tmp_path / f"data{i}.json") for i in range(4)])
+
+    with executor_class(max_workers=2) as executor:
+        res = asyncio.run(run(AsyncSerializer(executor, max_concurrency=2, chunk_size=16)))
+    assert res == [data[i:] for i in range(4)]
+    assert load_file(tmp_path / "data.cbor") == data
+
+
+def test_concurrency_limit(tmp_path):
+    dump_file([1, 2, 3], tmp_path / "data.json")
+    serializer = AsyncSerializer(max_concurrency=1)
+
+    async def run():
+        semaphore = serializer._semaphore()
+        await semaphore.acquire()
+        task = asyncio.ensure_future(serializer.load(tmp_path / "data.json"))
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        semaphore.release()
+        return await task
+
+    assert asyncio.run(run()) == [1, 2, 3]
+
+
+def test_cancel_dump(tmp_path):
+    dump_file([1], tmp_path / "data.json")
+    serializer = AsyncSerializer(chunk_size=1)
+
+    async def run():
+        task = asyncio.ensure_future(serializer.dump(list(range(10000)), tmp_path / "data.json"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert load_file(tmp_path / "data.json") == [1]
+    assert [x.name for x in tmp_path.iterdir()] == ["data.json"]
+
+
+@pytest.mark.parametrize("delay", [0, 0.001, 0.01])
+def test_cancel_dump_removes_temporary_file(tmp_path, delay):
+    dump_file([1], tmp_path / "data.json")
+    serializer = AsyncSerializer(chunk_size=1)
+
+    async def run():
+        task = asyncio.ensure_future(serializer.dump(list(range(100000)), tmp_path / "data.json"))
+        await asyncio.sleep(delay)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # nothing is written in background after cancellation is propagated
+        assert [x.name for x in tmp_path.iterdir()] == ["data.json"]
+
+    asyncio.run(run())
+    assert load_file(tmp_path / "data.json") == [1]
@@ -0,0 +1,117 @@
+import os
+from dataclasses import dataclass
+
+from local_migrator import (
+    MigrationCache,
+    MigrationRegistration,
+    class_to_str,
+    dump_file,
+    load_file,
+    make_hooks,
+    register_class,
+    rename_key,
+)
+
+
+@dataclass
+class SampleDataclass:
+    field1: int
+
+
+def test_cache_hit(tmp_path):
+    cache = MigrationCache(tmp_path / "cache")
+    dump_file([SampleDataclass(1), {"a": 2}], tmp_path / "data.json")
+    assert load_file(tmp_path / "data.json", cache=cache) == [SampleDataclass(1), {"a": 2}]
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    assert load_file(tmp_path / "data.json", cache=cache) == [SampleDataclass(1), {"a": 2}]
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    dump_file([SampleDataclass(1)], tmp_path / "data.cbor")
+    assert load_file(tmp_path / "data.cbor", cache=cache) == [SampleDataclass(1)]
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+    cache.clear()
+    assert not list((tmp_path / "cache").iterdir())
+
+
+def test_cache_migrated(tmp_path, clean_register):
+    @register_class
+    @dataclass
+    class MigrateClass:
+        field: int
+
+    dump_file([MigrateClass(1)], tmp_path / "data.json")
+    clean_register()
+    calls = []
+
+    def migrate(dkt):
+        calls.append(dkt)
+        return {"field1": dkt["field"]}
+
+    @register_class(version="0.0.1", old_paths=[class_to_str(MigrateClass)], migrations=[("0.0.1", migrate)])
+    @dataclass
+    class MigrateClass2:
+        field1: int
+
+    cache = MigrationCache(tmp_path / "cache")
+    assert load_file(tmp_path / "data.json", cache=cache) == [MigrateClass2(1)]
+    assert load_file(tmp_path / "data.json", cache=cache) == [MigrateClass2(1)]
+    assert len(calls) == 1
+
+    clean_register()
+
+    @register_class(
+        version="0.0.2",
+        old_paths=[class_to_str(MigrateClass)],
+        migrations=[("0.0.1", migrate), ("0.0.2", rename_key("field1", "field2"))],
+    )
+    @dataclass
+    class MigrateClass3:
+        field2: int
+
+    assert load_file(tmp_path / "data.json", cache=cache) == [MigrateClass3(1)]
+    assert len(calls) == 2
+
+
+def test_own_register(tmp_path):
+    @dataclass
+    class LocalClass:
+        field: int
+
+    register = MigrationRegistration()
+    register.register(LocalClass)
+    content = make_hooks(register).dumps([LocalClass(1)]).encode("utf-8")
+
+    @dataclass
+    class LocalClass2:
+        field1: int
+
+    register = MigrationRegistration()
+    register.register(
+        LocalClass2,
+        version="0.0.1",
+        old_paths=[class_to_str(LocalClass)],
+        migrations=[("0.0.1", rename_key("field", "field1"))],
+    )
+    cache = MigrationCache(tmp_path / "cache", register=register)
+    assert cache.load(content) == [LocalClass2(1)]
+    assert class_to_str(LocalClass2) in next((tmp_path / "cache").iterdir()).read_text()
+    assert cache.load(content) == [LocalClass2(1)]
+
+
+def test_cache_errors_not_stored(tmp_path):
+    (tmp_path / "data.json").write_text('{"__class__": "nme_not.not_package.NotClass", "__values__": {}}')
+    cache = MigrationCache(tmp_path / "cache")
+    assert "__error__" in load_file(tmp_path / "data.json", cache=cache)
+    assert not list((tmp_path / "cache").iterdir())
+
+
+def test_eviction(tmp_path):
+    cache = MigrationCache(tmp_path / "cache")
+    for i in range(3):
+        dump_file([SampleDataclass(i)], tmp_path / f"data{i}.json")
+        load_file(tmp_path / f"data{i}.json", cache=cache)
+    entries = sorted((tmp_path / "cache").iterdir())
+    for i, entry in enumerate(entries):
+        os.utime(entry, (i, i))
+    cache.max_size = entries[0].stat().st_size * 2
+    cache.evict()
+    assert sorted((tmp_path / "cache").iterdir()) == entries[1:]
@@ -1,9 +1,21 @@
 from enum import Enum
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import pytest
 
-from local_migrator import REGISTER, class_to_str, register_class, rename_key, update_argument
+from local_migrator import (
+    REGISTER,
+    class_to_str,
+    convert_value,
+    drop_key,
+    nest_keys,
+    register_class,
+    rename_key,
+    set_default,
+    unnest_key,
+    update_argument,
+)
+from local_migrator._class_register import FusedMigration, fuse_migrations
 
 
 @register_class
@@ -52,6 +64,12 @@ def test_old_paths():
     assert REGISTER.get_class("test.test.BBase") is SampleClass4
 
 
+def test_class_paths():
+    assert REGISTER.class_paths(SampleClass4) == [class_to_str(SampleClass4), "test.test.BBase"]
+    assert REGISTER.class_paths("test.test.BBase") == [class_to_str(SampleClass4), "test.test.BBase"]
+    assert REGISTER.class_paths(SampleClass3) == [class_to_str(SampleClass3)]
+
+
 def test_import_part():
     obj = REGISTER.get_class("class_register_util.SampleClass5")
     from class_register_util import SampleClass5
@@ -177,3 +195,218 @@ def test_allow_errors(clean_register):
 
     assert not REGISTER.allow_errors_in_values(_SampleClass1)
     assert REGISTER.allow_errors_in_values(_SampleClass2)
+
+
+def test_class_fingerprint(clean_register):
+    @register_class(version="0.0.1", migrations=[("0.0.1", rename_key("field", "field1"))])
+    class BaseMigrateClass:
+        pass
+
+    @register_class(old_paths=["test.test.OldMigrateClass"])
+    class MigrateClass(BaseMigrateClass):
+        pass
+
+    fingerprint = REGISTER.class_fingerprint(MigrateClass)
+    assert REGISTER.class_fingerprint("test.test.OldMigrateClass") == fingerprint
+    assert REGISTER.class_fingerprint(BaseMigrateClass) != fingerprint
+    assert REGISTER.fingerprint([MigrateClass, BaseMigrateClass]) == REGISTER.fingerprint(
+        [BaseMigrateClass, "test.test.OldMigrateClass"]
+    )
+
+    clean_register()
+    register_class(BaseMigrateClass, version="0.0.2", migrations=[("0.0.1", rename_key("field", "field1"))])
+    register_class(MigrateClass)
+    assert REGISTER.class_fingerprint(MigrateClass) != fingerprint
+
+
+def test_declarative_operations():
+    dkt = {"aaa": 1, "bbb": 2, "ccc": {"x": 1, "y": 2}}
+    assert drop_key("aaa")(dkt) == {"bbb": 2, "ccc": {"x": 1, "y": 2}}
+    assert drop_key("ddd")(dkt) == dkt
+    assert set_default("ddd", 5)(dkt)["ddd"] == 5
+    assert set_default("aaa", 5)(dkt)["aaa"] == 1
+    assert set_default("ddd", factory=list)(dkt)["ddd"] == []
+    default = set_default("ddd", [])
+    first, second = default(dkt)["ddd"], default(dkt)["ddd"]
+    assert first == second == []
+    assert first is not second
+    columns = {"aaa": [1, 2]}
+    default.apply_columns(columns, 2)
+    assert columns["ddd"] == [[], []]
+    assert columns["ddd"][0] is not columns["ddd"][1]
+    assert convert_value("aaa", str)(dkt)["aaa"] == "1"
+    assert convert_value("ddd", str)(dkt) == dkt
+    with pytest.raises(KeyError):
+        convert_value("ddd", str, optional=False)(dkt)
+    assert nest_keys(["aaa", "bbb", "ddd"], "sub")(dkt) == {"ccc": {"x": 1, "y": 2}, "sub": {"aaa": 1, "bbb": 2}}
+    assert unnest_key("ccc", prefix="c_")(dkt) == {"aaa": 1, "bbb": 2, "c_x": 1, "c_y": 2}
+    assert dkt == {"aaa": 1, "bbb": 2, "ccc": {"x": 1, "y": 2}}
+    assert rename_key("aaa", "bbb") == rename_key("aaa", "bbb")
+    assert repr(rename_key("aaa", "bbb")) == "RenameKey('aaa', 'bbb', False)"
+
+
+def test_fuse_migrations():
+    def barrier(dkt):
+        return dkt
+
+    migrations = [rename_key("a", "b"), drop_key("c"), barrier, set_default("d", 1), barrier, rename_key("b", "e")]
+    fused = fuse_migrations(migrations)
+    assert len(fused) == 5
+    assert isinstance(fused[0], FusedMigration)
+    assert fused[0].operations == (rename_key("a", "b"), drop_key("c"))
+    assert fused[1:] == migrations[2:]
+
+
+def test_migrate_fused_single_copy(clean_register):
+    copies = []
+
+    class CountDict(dict):
+        def copy(self):
+            copies.append(1)
+            return super().copy()
+
+    @register_class(
+        version="0.0.3",
+        migrations=[
+            ("0.0.1", rename_key("field", "field1")),
+            ("0.0.2", set_default("field2", 5)),
+            ("0.0.3", nest_keys(["field1", "field2"], "sub")),
+        ],
+    )
+    class MigrateClass:
+        def __init__(self, sub):
+            self.sub = sub
+
+    migrated = REGISTER.migrate_data(MigrateClass, {}, CountDict(field=1))
+    assert migrated == {"sub": {"field1": 1, "field2": 5}}
+    assert len(copies) == 1
+    assert len(REGISTER.migration_plan(MigrateClass, {})) == 3
+    assert len(REGISTER.migration_plan(MigrateClass, {}, fuse=True)) == 1
+
+
+def test_update_argument_containers(clean_register):
+    @register_class(version="0.0.1", migrations=[("0.0.1", rename_key("field", "field1"))])
+    class MigrateClass:
+        def __init__(self, field1):
+            self.field1 = field1
+
+    @update_argument("arg")
+    def list_func(arg: List[MigrateClass]):
+        return arg
+
+    @update_argument("arg")
+    def dict_func(arg: Dict[str, MigrateClass]):
+        return arg
+
+    @update_argument("arg")
+    def optional_func(arg: Optional[MigrateClass] = None):
+        return arg
+
+    @update_argument("arg")
+    def tuple_func(arg: Tuple[MigrateClass, ...]):
+        return arg
+
+    @update_argument("arg")
+    def fixed_tuple_func(arg: Tuple[int, MigrateClass]):
+        return arg
+
+    res = list_func([{"field": 1}, {"field": 2}, MigrateClass(3)])
+    assert [x.field1 for x in res] == [1, 2, 3]
+    res = dict_func(arg={"a": {"field": 1}, "b": {"field": 2}})
+    assert {k: v.field1 for k, v in res.items()} == {"a": 1, "b": 2}
+    assert optional_func(None) is None
+    assert optional_func() is None
+    assert optional_func({"field": 5}).field1 == 5
+    res = tuple_func(({"field": 1}, {"field": 2}))
+    assert isinstance(res, tuple)
+    assert [x.field1 for x in res] == [1, 2]
+    res = fixed_tuple_func([1, {"field": 2}])
+    assert res[0] == 1
+    assert res[1].field1 == 2
+
+
+def test_update_argument_not_supported():
+    with pytest.raises(ValueError, match="is not a class"):
+
+        @update_argument("arg")
+        def func(arg: Union[int, str]):
+            pass
+
+
+@pytest.mark.parametrize("annotation", [Dict[str, Any], List[int], Optional[int], Any])
+def test_update_argument_without_class(annotation):
+    def func(arg):
+        return arg
+
+    func.__annotations__["arg"] = annotation
+    with pytest.raises(ValueError, match="is not a class"):
+        update_argument("arg")(func)
+
+
+def test_update_argument_skip_not_convertible(clean_register):
+    @register_class(version="0.0.1", migrations=[("0.0.1", rename_key("field", "field1"))])
+    class MigrateClass:
+        def __init__(self, field1):
+            self.field1 = field1
+
+    @update_argument("arg")
+    def func(arg: Tuple[MigrateClass, Dict[str, Any], List[int], Optional[int]]):
+        return arg
+
+    values = {"a": {"b": 1}}
+    numbers = [1, 2, 3]
+    res = func(({"field": 1}, values, numbers, None))
+    assert res[0].field1 == 1
+    assert res[1] is values
+    assert res[2] is numbers
+    assert res[3] is None
+
+
+def test_update_argument_enum(clean_register):
+    @register_class(version="0.0.1", migrations=[("0.0.1", rename_key("val", "value"))])
+    class MigrateEnum(Enum):
+        a = 1
+        b = 2
+
+    @update_argument("arg")
+    def func(arg: MigrateEnum):
+        return arg
+
+    @update_argument("arg")
+    def list_func(arg: List[MigrateEnum]):
+        return arg
+
+    assert func({"val": 1}) is MigrateEnum.a
+    assert func(MigrateEnum.b) is MigrateEnum.b
+    assert list_func([{"val": 2}, MigrateEnum.a]) == [MigrateEnum.b, MigrateEnum.a]
+
+
+class PlainClass:
+    def __init__(self, field):
+        self.field = field
+
+
+def test_update_argument_not_registered_class(clean_register):
+    @update_argument("arg")
+    def func(arg: PlainClass):
+        return arg
+
+    @update_argument("arg")
+    def int_func(arg: int):
+        return arg
+
+    assert func({"field": 1}).field == 1
+    assert int_func(1) == 1
+
+
+def test_migration_plan_cache(clean_register):
+    @register_class(version="0.0.1", migrations=[("0.0.1", rename_key("field", "field1"))])
+    class MigrateClass:
+        pass
+
+    plan = REGISTER.migration_plan(MigrateClass, {}, fuse=True)
+    assert REGISTER.migration_plan(class_to_str(MigrateClass), {}, fuse=True) is plan
+    register_class(SampleClass3)
+    assert REGISTER.migration_plan(MigrateClass, {}, fuse=True) is plan
+    REGISTER._invalidate(MigrateClass)
+    assert REGISTER.migration_plan(MigrateClass, {}, fuse=True) is not plan
@@ -0,0 +1,248 @@
+import gc
+import weakref
+from dataclasses import dataclass
+from enum import Enum, Flag
+
+import pytest
+
+from local_migrator import REGISTER, class_to_str, object_encoder, object_hook, register_class, rename_key
+from local_migrator._class_register import MigrationRegistration
+from local_migrator._codegen import compile_decoder, compile_encoder, get_decoder, get_encoder
+from local_migrator._serialize_hooks import add_class_info
+
+
+@dataclass
+class WideDataclass:
+    field1: int
+    field2: str
+    field3: float = 1.5
+
+
+class AsDictClass:
+    def __init__(self, value1, value2):
+        self.value1 = value1
+        self.value2 = value2
+
+    def as_dict(self):
+        return {"value1": self.value1, "value2": self.value2}
+
+
+class Color(Enum):
+    red = 1
+    green = 2
+
+
+class Permission(Flag):
+    read = 1
+    write = 2
+
+
+@dataclass(frozen=True)
+class FrozenDataclass:
+    field1: int
+    field2: str
+
+
+class TestCompileEncoder:
+    def test_dataclass(self, clean_register):
+        ob = WideDataclass(1, "a")
+        encoder = compile_encoder(WideDataclass, REGISTER)
+        assert encoder(ob) == add_class_info(ob, {"field1": 1, "field2": "a", "field3": 1.5})
+
+    def test_as_dict(self, clean_register):
+        ob = AsDictClass(1, [1, 2])
+        encoder = compile_encoder(AsDictClass, REGISTER)
+        assert encoder(ob) == add_class_info(ob, {"value1": 1, "value2": [1, 2]})
+
+    def test_not_supported(self, clean_register):
+        assert compile_encoder(int, REGISTER) is None
+
+    def test_enum(self, clean_register):
+        encoder = compile_encoder(Color, REGISTER)
+        assert encoder(Color.red) == add_class_info(Color.red, {"value": 1})
+        assert encoder(Color.red) is encoder(Color.red)
+        assert encoder(Color.green)["__values__"] == {"value": 2}
+
+    def test_flag_combination(self, clean_register):
+        encoder = compile_encoder(Permission, REGISTER)
+        value = Permission.read | Permission.write
+        assert encoder(value)["__values__"] == {"value": 3}
+        assert encoder(value) is encoder(value)
+
+
+class TestMemoize:
+    def test_frozen_dataclass(self):
+        register = MigrationRegistration()
+        register.register(FrozenDataclass, memoize=True)
+        encoder = compile_encoder(FrozenDataclass, register)
+        ob = FrozenDataclass(1, "a")
+        res = encoder(ob)
+        assert res == add_class_info(ob, {"field1": 1, "field2": "a"})
+        assert encoder(ob) is res
+        assert encoder(FrozenDataclass(1, "a")) == res
+
+    def test_not_memoized_by_default(self):
+        register = MigrationRegistration()
+        register.register(FrozenDataclass)
+        assert not register.memoize(FrozenDataclass)
+        encoder = compile_encoder(FrozenDataclass, register)
+        ob = FrozenDataclass(1, "a")
+        assert encoder(ob) is not encoder(ob)
+
+    def test_not_weak_referenceable(self):
+        class SlotsClass:
+            __slots__ = ("value",)
+
+            def __init__(self, value):
+                self.value = value
+
+            def as_dict(self):
+                return {"value": self.value}
+
+        register = MigrationRegistration()
+        register.register(SlotsClass, memoize=True)
+        encoder = compile_encoder(SlotsClass, register)
+        ob = SlotsClass(1)
+        assert encoder(ob)["__values__"] == {"value": 1}
+        assert encoder(ob) is not encoder(ob)
+
+    def test_instance_released(self):
+        register = MigrationRegistration()
+        register.register(FrozenDataclass, memoize=True)
+        encoder = compile_encoder(FrozenDataclass, register)
+        ob = FrozenDataclass(1, "a")
+        ref = weakref.ref(ob)
+        encoder(ob)
+        del ob
+        gc.collect()
+        assert ref() is None
+
+
+def test_encoder_cached(clean_register):
+    ob = WideDataclass(1, "a")
+    assert WideDataclass not in REGISTER._encoder_cache
+    res = object_encoder(ob)
+    assert REGISTER._encoder_cache[WideDataclass] is get_encoder(WideDataclass, REGISTER)
+    assert object_encoder(ob) == res
+    assert res["__values__"] == {"field1": 1, "field2": "a", "field3": 1.5}
+
+
+def test_shared_version_dkt_read_only(clean_register):
+    res = object_encoder(WideDataclass(1, "a"))
+    with pytest.raises(TypeError, match="could not be modified"):
+        res["__class_version_dkt__"]["other"] = "0.0.1"
+    with pytest.raises(TypeError, match="could not be modified"):
+        object_encoder(Color.red)["__values__"]["value"] = 2
+    copied = dict(res["__class_version_dkt__"])
+    copied["other"] = "0.0.1"
+    assert object_encoder(WideDataclass(2, "b"))["__class_version_dkt__"] == {class_to_str(WideDataclass): "0.0.0"}
+    assert object_encoder(Color.red)["__values__"] == {"value": 1}
+
+
+def test_encoder_cache_invalidation(clean_register):
+    object_encoder(WideDataclass(1, "a"))
+    assert WideDataclass in REGISTER._encoder_cache
+
+    @register_class(version="0.1.0")
+    @dataclass
+    class OtherDataclass:
+        field: int
+
+    assert WideDataclass in REGISTER._encoder_cache
+    res = object_encoder(OtherDataclass(1))
+    assert res["__class_version_dkt__"] == {class_to_str(OtherDataclass): "0.1.0"}
+
+
+def test_invalidate_subclasses(clean_register):
+    @register_class
+    @dataclass
+    class Base:
+        field: int
+
+    @register_class
+    @dataclass
+    class Child(Base):
+        other: int
+
+    for ob in (Base(1), Child(1, 2), WideDataclass(1, "a")):
+        object_hook(object_encoder(ob))
+        REGISTER.class_fingerprint(ob.__class__)
+    REGISTER._invalidate(Base)
+    assert set(REGISTER._encoder_cache) == {WideDataclass}
+    assert {x[0] for x in REGISTER._decoder_cache} == {class_to_str(WideDataclass)}
+    assert {x[0] for x in REGISTER._plan_cache} == {class_to_str(WideDataclass)}
+    assert set(REGISTER._fingerprint_cache) == {class_to_str(WideDataclass), "builtins.object"}
+
+
+class TestCompileDecoder:
+    def test_migrations(self, clean_register):
+        @register_class(
+            version="0.0.2", migrations=[("0.0.1", rename_key("a", "b")), ("0.0.2", rename_key("b", "field1"))]
+        )
+        @dataclass
+        class MigrateDataclass:
+            field1: int
+
+        class_str = class_to_str(MigrateDataclass)
+        decoder = compile_decoder(class_str, {class_str: "0.0.0"}, REGISTER)
+        assert decoder({"__values__": {"a": 1}}) == MigrateDataclass(1)
+        decoder = compile_decoder(class_str, {class_str: "0.0.1"}, REGISTER)
+        assert decoder({"__values__": {"b": 1}}) == MigrateDataclass(1)
+
+    def test_error_in_values(self, clean_register):
+        class_str = class_to_str(WideDataclass)
+        decoder = compile_decoder(class_str, {}, REGISTER)
+        dkt = {"__values__": {"field1": {"__error__": "text"}, "field2": "a"}}
+        assert decoder(dkt) is dkt
+        assert dkt["__error__"] == "Error in fields: field1"
+
+    def test_constructor_error(self, clean_register):
+        decoder = compile_decoder(class_to_str(WideDataclass), {}, REGISTER)
+        dkt = {"__values__": {"field1": 1}}
+        assert decoder(dkt) is dkt
+        assert "field2" in dkt["__error__"]
+
+    def test_missed_class(self, clean_register):
+        with pytest.raises(ValueError, match="not found in register"):
+            compile_decoder("nme_not.not_package.NotClass", {}, REGISTER)
+
+    def test_enum_cache(self, clean_register):
+        calls = []
+
+        def migration(dkt):
+            calls.append(dkt)
+            return {"value": dkt["value"] + 1}
+
+        @register_class(version="0.0.1", migrations=[("0.0.1", migration)])
+        class CachedEnum(Enum):
+            first = 1
+            second = 2
+
+        class_str = class_to_str(CachedEnum)
+        decoder = compile_decoder(class_str, {class_str: "0.0.0"}, REGISTER)
+        assert decoder({"__values__": {"value": 0}}) is CachedEnum.first
+        assert decoder({"__values__": {"value": 0}}) is CachedEnum.first
+        assert decoder({"__values__": {"value": 1}}) is CachedEnum.second
+        assert len(calls) == 2
+        dkt = {"__values__": {"value": 5}}
+        assert decoder(dkt) is dkt
+        assert decoder({"__values__": {"value": [1]}})["__error__"]
+
+
+def test_decoder_cache(clean_register):
+    class_str = class_to_str(WideDataclass)
+    dkt = {
+        "__class__": class_str,
+        "__class_version_dkt__": {class_str: "0.0.0"},
+        "__values__": {"field1": 1, "field2": "a"},
+    }
+    ob = object_hook(dkt)
+    assert ob == WideDataclass(1, "a")
+    decoder = get_decoder(class_str, {class_str: "0.0.0"}, REGISTER)
+    assert (class_str, ((class_str, "0.0.0"),), True) in REGISTER._decoder_cache
+    assert get_decoder(class_str, {class_str: "0.0.0"}, REGISTER) is decoder
+
+    register_class(AsDictClass)
+    assert get_decoder(class_str, {class_str: "0.0.0"}, REGISTER) is decoder
+    REGISTER._invalidate(WideDataclass)
+    assert not REGISTER._decoder_cache
@@ -0,0 +1,196 @@
+import json
+from dataclasses import dataclass
+from enum import Enum
+
+import cbor2
+import numpy as np
+import pytest
+
+from local_migrator import (
+    ColumnarList,
+    DecodeContext,
+    Encoder,
+    cbor_decoder,
+    cbor_encoder,
+    class_to_str,
+    convert_value,
+    object_hook,
+    register_class,
+    rename_key,
+    set_default,
+)
+from local_migrator._serialize_hooks import iter_encoded_objects
+
+
+class Label(Enum):
+    background = 0
+    cell = 1
+
+
+@dataclass
+class Row:
+    x: int
+    y: float
+    flag: bool
+    name: str
+    label: Label
+
+
+class AsDictClass:
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+
+    def as_dict(self):
+        return {"a": self.a, "b": self.b}
+
+    def __eq__(self, other):
+        return isinstance(other, AsDictClass) and (self.a, self.b) == (other.a, other.b)
+
+    def __hash__(self):
+        return hash((self.a, self.b))
+
+
+def rows(num):
+    return [Row(i, i / 2, i % 2 == 0, f"n{i}", Label(i % 2)) for i in range(num)]
+
+
+def test_columns():
+    data = ColumnarList(rows(10))
+    assert len(data) == 10
+    assert data[3] == rows(10)[3]
+    assert data[-1] == rows(10)[-1]
+    assert data == rows(10)
+    assert data[2:5] == rows(10)[2:5]
+    assert data.tolist() == rows(10)
+    assert data.element_class is Row
+    assert isinstance(data.columns["x"], np.ndarray)
+    assert isinstance(data.columns["name"], list)
+    with pytest.raises(IndexError):
+        data[10]
+
+
+def test_errors():
+    with pytest.raises(ValueError, match="cls is required"):
+        ColumnarList([])
+    with pytest.raises(TypeError, match="All elements"):
+        ColumnarList([Row(1, 1.0, True, "a", Label.cell), Label.cell])
+    with pytest.raises(TypeError, match="not supported"):
+        ColumnarList([1, 2])
+
+
+def test_structured_array():
+    data = ColumnarList([Label.cell, Label.background])
+    arr = data.structured_array()
+    assert arr["value"].tolist() == [1, 0]
+    with pytest.raises(ValueError, match="name, label"):
+        ColumnarList(rows(2)).structured_array()
+
+
+@pytest.mark.parametrize("items", [rows(100), [Label.cell, Label.background] * 10, [AsDictClass(1, "a")]])
+def test_json_round_trip(items):
+    text = json.dumps({"items": ColumnarList(items)}, cls=Encoder)
+    res = json.loads(text, object_hook=object_hook)["items"]
+    assert isinstance(res, ColumnarList)
+    assert res == items
+    res = json.loads(text, object_hook=DecodeContext())["items"]
+    assert res == items
+    assert json.dumps(res, cls=Encoder) == json.dumps(ColumnarList(items), cls=Encoder)
+
+
+def test_cbor_round_trip():
+    items = rows(20)
+    res = cbor2.loads(cbor2.dumps(ColumnarList(items), default=cbor_encoder), object_hook=cbor_decoder)
+    assert res == items
+
+
+def test_empty():
+    text = json.dumps(ColumnarList(cls=Row), cls=Encoder)
+    res = json.loads(text, object_hook=object_hook)
+    assert len(res) == 0
+    assert res.element_class is Row
+
+
+def test_compact():
+    items = rows(1000)
+    assert len(json.dumps(ColumnarList(items), cls=Encoder)) < len(json.dumps(items, cls=Encoder)) / 3
+
+
+def test_scan():
+    raw = json.loads(json.dumps([ColumnarList(rows(3))], cls=Encoder))
+    assert [x[0] for x in iter_encoded_objects(raw)] == [class_to_str(Row), class_to_str(Label)]
+
+
+@pytest.fixture
+def migrated(clean_register):
+    @register_class
+    @dataclass
+    class Point:
+        x: int
+        y: int
+
+    class_str = class_to_str(Point)
+    text = json.dumps(ColumnarList([Point(i, 2 * i) for i in range(5)]), cls=Encoder)
+    clean_register()
+    return class_str, text
+
+
+def test_column_migrations(migrated):
+    class_str, text = migrated
+    calls = []
+
+    def double(value):
+        calls.append(value)
+        return value * 2
+
+    @register_class(
+        version="0.0.3",
+        old_paths=[class_str],
+        migrations=[
+            ("0.0.1", rename_key("x", "a")),
+            ("0.0.2", set_default("z", 7)),
+            ("0.0.3", convert_value("y", double)),
+        ],
+    )
+    @dataclass
+    class Point2:
+        a: int
+        y: int
+        z: int
+
+    res = json.loads(text, object_hook=object_hook)
+    assert res == [Point2(i, 4 * i, 7) for i in range(5)]
+    assert isinstance(res.columns["a"], np.ndarray)
+    assert len(calls) == 5
+
+
+def test_element_migrations(migrated):
+    class_str, text = migrated
+    calls = []
+
+    def swap(dkt):
+        calls.append(dkt)
+        return {"a": dkt["y"], "y": dkt["a"]}
+
+    @register_class(
+        version="0.0.3",
+        old_paths=[class_str],
+        migrations=[("0.0.1", rename_key("x", "a")), ("0.0.2", swap), ("0.0.3", rename_key("y", "c"))],
+    )
+    @dataclass
+    class Point2:
+        a: int
+        c: int
+
+    res = json.loads(text, object_hook=object_hook)
+    assert res == [Point2(2 * i, i) for i in range(5)]
+    assert len(calls) == 5
+    assert isinstance(res.columns["c"], np.ndarray)
+
+
+def test_decode_context_error():
+    text = json.dumps({"a": ColumnarList([Label.cell])}, cls=Encoder).replace(class_to_str(Label), "unknown.Label")
+    context = DecodeContext()
+    res = json.loads(text, object_hook=context)
+    assert "__error__" in res["a"]
+    assert [x.path for x in context.report(res)] == [("a",)]
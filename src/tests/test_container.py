@@ -0,0 +1,180 @@
+import json
+import os
+import stat
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+
+from local_migrator import (
+    ColumnarList,
+    ContainerReader,
+    ContainerWriter,
+    MigrationRegistration,
+    class_to_str,
+    dump_container,
+    load_container,
+    register_class,
+    rename_key,
+)
+from local_migrator._container import CODECS
+
+
+@dataclass
+class SampleDataclass:
+    field1: int
+    field2: list
+
+
+@pytest.mark.parametrize("codec", list(CODECS))
+@pytest.mark.parametrize("format_", ["json", "cbor"])
+@pytest.mark.parametrize(
+    "data",
+    [
+        [SampleDataclass(i, [1, 2, 3] * i) for i in range(10)],
+        {"a": SampleDataclass(1, []), "b": [1, 2], "c": np.arange(5)},
+        SampleDataclass(1, [SampleDataclass(2, [])]),
+        [],
+    ],
+)
+def test_dump_load(tmp_path, data, codec, format_):
+    dump_container(data, tmp_path / "data.lmc", format_=format_, codec=codec)
+    loaded = load_container(tmp_path / "data.lmc")
+    if isinstance(data, dict):
+        assert loaded.keys() == data.keys()
+        assert loaded["c"] == data["c"].tolist()
+        data = {**data, "c": loaded["c"]}
+    assert loaded == data
+
+
+def test_random_access(tmp_path):
+    data = [SampleDataclass(i, list(range(1000))) for i in range(20)]
+    dump_container(data, tmp_path / "data.lmc", codec="lzma")
+    with ContainerReader(tmp_path / "data.lmc") as reader:
+        assert len(reader) == 20
+        assert reader[5] == data[5]
+        assert reader[-1] == data[-1]
+        assert reader.header["codec"] == "lzma"
+        assert reader.classes == [class_to_str(SampleDataclass)]
+        assert reader.up_to_date
+        raw = reader._file.seek(0, 2)
+    assert raw < len(json.dumps(data[0].field2)) * 20
+    with ContainerReader(tmp_path / "data.lmc", hooks=False) as reader:
+        assert reader[3]["__class__"] == class_to_str(SampleDataclass)
+
+
+def test_dict_keys(tmp_path):
+    dump_container({"x": 1, "y": SampleDataclass(1, [])}, tmp_path / "data.lmc")
+    with ContainerReader(tmp_path / "data.lmc") as reader:
+        assert reader.keys() == ["x", "y"]
+        assert reader["y"] == SampleDataclass(1, [])
+
+
+def test_fingerprint_and_migration(tmp_path, clean_register):
+    @register_class
+    @dataclass
+    class MigrateClass:
+        field: int
+
+    dump_container([MigrateClass(1)], tmp_path / "data.lmc")
+    clean_register()
+
+    @register_class(
+        version="0.0.1", old_paths=[class_to_str(MigrateClass)], migrations=[("0.0.1", rename_key("field", "value"))]
+    )
+    @dataclass
+    class MigrateClass2:
+        value: int
+
+    with ContainerReader(tmp_path / "data.lmc") as reader:
+        assert not reader.up_to_date
+        assert reader[0] == MigrateClass2(1)
+
+
+def test_columnar_fingerprint(tmp_path, clean_register):
+    @register_class
+    @dataclass
+    class MigrateClass:
+        field: int
+
+    dump_container([ColumnarList([MigrateClass(1), MigrateClass(2)])], tmp_path / "data.lmc")
+    with ContainerReader(tmp_path / "data.lmc") as reader:
+        assert reader.classes == [class_to_str(MigrateClass)]
+        assert reader.up_to_date
+    clean_register()
+
+    @register_class(
+        version="0.0.1", old_paths=[class_to_str(MigrateClass)], migrations=[("0.0.1", rename_key("field", "value"))]
+    )
+    @dataclass
+    class MigrateClass2:
+        value: int
+
+    with ContainerReader(tmp_path / "data.lmc") as reader:
+        assert not reader.up_to_date
+        assert reader[0] == [MigrateClass2(1), MigrateClass2(2)]
+
+
+@pytest.mark.parametrize("format_", ["json", "cbor"])
+def test_own_register(tmp_path, format_):
+    @dataclass
+    class LocalClass:
+        field: int
+
+    register = MigrationRegistration()
+    register.register(LocalClass)
+    dump_container([LocalClass(1)], tmp_path / "data.lmc", format_, register=register)
+
+    @dataclass
+    class LocalClass2:
+        value: int
+
+    register = MigrationRegistration()
+    register.register(
+        LocalClass2,
+        version="0.0.1",
+        old_paths=[class_to_str(LocalClass)],
+        migrations=[("0.0.1", rename_key("field", "value"))],
+    )
+    with ContainerReader(tmp_path / "data.lmc", register=register) as reader:
+        assert not reader.up_to_date
+        assert reader[0] == LocalClass2(1)
+    assert load_container(tmp_path / "data.lmc", register=register) == [LocalClass2(1)]
+
+
+def test_writer_abort(tmp_path):
+    dump_container([1, 2], tmp_path / "data.lmc")
+    writer = ContainerWriter(tmp_path / "data.lmc")
+    writer.append(3)
+    writer.abort()
+    with pytest.raises(TypeError), ContainerWriter(tmp_path / "data.lmc") as writer:
+        writer.append(object())
+    assert load_container(tmp_path / "data.lmc") == [1, 2]
+    assert [x.name for x in tmp_path.iterdir()] == ["data.lmc"]
+
+
+def test_errors(tmp_path):
+    with pytest.raises(ValueError, match="Unknown or unavailable codec"):
+        ContainerWriter(tmp_path / "data.lmc", codec="brotli")
+    with ContainerWriter(tmp_path / "data.lmc", kind="dict") as writer, pytest.raises(ValueError, match="key"):
+        writer.append(1)
+    (tmp_path / "data.json").write_text("[1, 2]")
+    with pytest.raises(ValueError, match="not a container"):
+        ContainerReader(tmp_path / "data.json")
+    dump_container([1, 2], tmp_path / "data.lmc")
+    (tmp_path / "data.lmc").write_bytes((tmp_path / "data.lmc").read_bytes()[:-3])
+    with pytest.raises(ValueError, match="truncated"):
+        ContainerReader(tmp_path / "data.lmc")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="permissions are not supported on Windows")
+def test_file_mode(tmp_path):
+    umask = os.umask(0o022)
+    os.umask(umask)
+    path = tmp_path / "data.lmc"
+    dump_container([1, 2], path)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+    path.chmod(0o640)
+    dump_container([3], path)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    assert load_container(path) == [3]
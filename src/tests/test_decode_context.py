@@ -0,0 +1,161 @@
+import json
+from dataclasses import dataclass
+
+import cbor2
+import pytest
+
+from local_migrator import (
+    DecodeContext,
+    DecodeError,
+    Encoder,
+    Interner,
+    cbor_encoder,
+    class_to_str,
+    object_hook,
+    register_class,
+)
+
+
+@dataclass
+class Positive:
+    value: int
+
+    def __post_init__(self):
+        if self.value < 0:
+            raise ValueError("negative value")
+
+
+def invalid(value):
+    obj = object.__new__(Positive)
+    obj.value = value
+    return obj
+
+
+@dataclass
+class Holder:
+    item: Positive
+    items: list
+    mapping: dict
+
+
+@register_class(allow_errors_in_values=True)
+@dataclass
+class TolerantHolder:
+    item: Positive
+
+
+def test_no_errors():
+    data = [Holder(Positive(1), [Positive(2)], {"a": Positive(3)})]
+    context = DecodeContext()
+    assert json.loads(json.dumps(data, cls=Encoder), object_hook=context) == data
+    assert context.report(data) == []
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"a": [1, Holder(Positive(1), [Positive(1), [invalid(-1)]], {"a": Positive(2)})]},
+        [Holder(Positive(1), [Positive(1), [invalid(-1)]], {"a": Positive(2)})],
+        Holder(invalid(-1), [], {"b": [invalid(-2)]}),
+        TolerantHolder(invalid(-1)),
+    ],
+)
+def test_same_as_object_hook(data):
+    text = json.dumps(data, cls=Encoder)
+    context = DecodeContext()
+    assert json.loads(text, object_hook=context) == json.loads(text, object_hook=object_hook)
+    assert context.report(data)
+
+
+def test_report_paths():
+    data = {
+        "records": [
+            Holder(Positive(1), [Positive(1), [invalid(-1)]], {"a": Positive(2)}),
+            Holder(invalid(-2), [], {"b": invalid(-3)}),
+        ],
+        "tolerant": TolerantHolder(invalid(-4)),
+        "other": Positive(5),
+    }
+    context = DecodeContext()
+    res = json.loads(json.dumps(data, cls=Encoder), object_hook=context)
+    assert isinstance(res["records"][0], Holder)
+    assert res["records"][0].items[1][0]["__error__"] == "negative value"
+    assert res["records"][1]["__error__"] == "Error in fields: item"
+    assert isinstance(res["tolerant"], TolerantHolder)
+    assert res["other"] == Positive(5)
+    positive_str = class_to_str(Positive)
+    assert context.report(res) == [
+        DecodeError(("records", 0, "items", 1, 0), positive_str, "negative value"),
+        DecodeError(("records", 1, "item"), positive_str, "negative value"),
+        DecodeError(("records", 1, "mapping", "b"), positive_str, "negative value"),
+        DecodeError(("records", 1), class_to_str(Holder), "Error in fields: item"),
+        DecodeError(("tolerant", "item"), positive_str, "negative value"),
+    ]
+
+
+def test_report_root_list_and_old_format():
+    class_str = class_to_str(Positive)
+    text = json.dumps([{"a": 1}, [{"__class__": class_str, "value": -1}], {"__class__": "unknown.Class"}])
+    context = DecodeContext()
+    res = json.loads(text, object_hook=context)
+    errors = context.report(res)
+    assert [x.path for x in errors] == [(1, 0), (2,)]
+    assert errors[1].message == "Class unknown.Class not found in register."
+
+
+def test_cbor():
+    data = [Positive(1), {"a": invalid(-1)}]
+    context = DecodeContext()
+    res = cbor2.loads(cbor2.dumps(data, default=cbor_encoder), object_hook=context.cbor_decoder)
+    assert res[0] == Positive(1)
+    assert [x.path for x in context.report(res)] == [(1, "a")]
+
+
+@dataclass
+class Named:
+    name: str
+    meta: dict
+    tags: list
+
+
+def _named_data():
+    # strings built at runtime, so equal strings are separate objects
+    return [
+        Named("".join(["ch", str(i % 2)]), {"".join(["un", "it"]): "um"}, [["".join(["t", "ag"])]]) for i in range(4)
+    ]
+
+
+@pytest.mark.parametrize("format_", ["json", "cbor"])
+def test_interner(format_):
+    data = _named_data()
+    if format_ == "json":
+        res = json.loads(json.dumps(data, cls=Encoder), object_hook=Interner(max_length=3))
+    else:
+        res = cbor2.loads(cbor2.dumps(data, default=cbor_encoder), object_hook=Interner(max_length=3).cbor_decoder)
+    assert res == data
+    assert res[0].name is res[2].name
+    assert next(iter(res[0].meta)) is next(iter(res[1].meta))
+    assert res[0].tags[0][0] is res[1].tags[0][0]
+
+
+def test_interner_limit():
+    res = json.loads(json.dumps(_named_data(), cls=Encoder), object_hook=Interner())
+    assert res[0].name is not res[2].name
+    assert next(iter(res[0].meta)) is next(iter(res[1].meta))
+
+
+def test_interner_class_and_versions():
+    class_str = class_to_str(Positive)
+    text = json.dumps([{"__class__": "unknown.Class", "__class_version_dkt__": {"unknown.Class": "0.0.1"}}] * 2)
+    res = json.loads(text, object_hook=Interner(DecodeContext()))
+    assert res[0]["__class__"] is res[1]["__class__"]
+    assert res[0]["__class_version_dkt__"]["unknown.Class"] is res[1]["__class_version_dkt__"]["unknown.Class"]
+    assert json.loads(json.dumps({"__class__": class_str, "value": 1}), object_hook=Interner()) == Positive(1)
+
+
+def test_decode_context_intern():
+    data = [Holder(Positive(1), [Positive(1), [invalid(-1)]], {"a": Positive(2)}), *_named_data()]
+    context = DecodeContext(intern_length=3)
+    res = json.loads(json.dumps(data, cls=Encoder), object_hook=context)
+    assert res[1].name is res[3].name
+    assert [x.path for x in context.report(res)] == [(0, "items", 1, 0)]
@@ -0,0 +1,191 @@
+import json
+from dataclasses import dataclass, field
+from enum import Enum
+
+import numpy as np
+import pytest
+
+from local_migrator import DeltaWriter, _delta, class_to_str, load_delta, register_class, rename_key
+from local_migrator._serialize_hooks import object_encoder
+
+
+class Mode(Enum):
+    fast = 1
+    slow = 2
+
+
+@dataclass
+class Item:
+    name: str
+    value: int
+    mode: Mode = Mode.fast
+
+
+@dataclass
+class Session:
+    items: list
+    settings: dict = field(default_factory=dict)
+
+
+def read_blocks(path):
+    lines = path.read_text().splitlines()
+    assert lines[0] == "LMDELTA1"
+    blocks = [[]]
+    for line in lines[1:]:
+        if line == ".":
+            blocks.append([])
+        else:
+            blocks[-1].append(line.split(" ", 1))
+    assert not blocks.pop()
+    return blocks
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "session.lmd"
+    session = Session([Item("a", 1), Item("b", 2, Mode.slow)], {"array": np.arange(3)})
+    writer = DeltaWriter(path)
+    assert writer.save(session) == 5
+    res = load_delta(path)
+    assert res.items == session.items
+    assert res.settings["array"] == [0, 1, 2]
+    assert len(read_blocks(path)) == 1
+
+
+def test_only_changed_nodes(tmp_path):
+    path = tmp_path / "session.lmd"
+    session = Session([Item(str(i), i) for i in range(20)])
+    writer = DeltaWriter(path)
+    writer.save(session)
+    assert writer.save(session) == 0
+    assert len(read_blocks(path)) == 1
+
+    session.items[3].value = 100
+    assert writer.save(session) == 2
+    blocks = read_blocks(path)
+    assert len(blocks) == 2
+    assert [kind for kind, _ in blocks[1]] == ["n", "n", "d", "d", "r"]
+    assert load_delta(path) == session
+
+
+def test_added_and_removed(tmp_path):
+    path = tmp_path / "session.lmd"
+    session = Session([Item(str(i), i) for i in range(20)])
+    writer = DeltaWriter(path)
+    writer.save(session)
+    del session.items[5]
+    session.items.append(Item("new", 1))
+    assert writer.save(session) == 2
+    assert [kind for kind, _ in read_blocks(path)[1]].count("d") == 2
+    assert load_delta(path) == session
+
+    writer.save([session, Item("other", 2)])
+    assert load_delta(path) == [session, Item("other", 2)]
+
+
+def test_save_changed(tmp_path, monkeypatch):
+    path = tmp_path / "session.lmd"
+    session = Session([Item(str(i), i) for i in range(20)])
+    writer = DeltaWriter(path)
+    writer.save(session)
+
+    encoded = []
+    monkeypatch.setattr(_delta, "object_encoder", lambda x: encoded.append(x) or object_encoder(x))
+    session.items[3].value = 100
+    session.items[4].value = 100  # not marked, so not saved
+    assert writer.save(session, changed=[session.items[3]]) == 2
+    assert [x for x in encoded if isinstance(x, Item)] == [session.items[3]]
+    assert load_delta(path).items[3].value == 100
+    assert load_delta(path).items[4].value == 4
+
+    encoded.clear()
+    assert writer.save(session, changed=[]) == 0
+    assert not encoded
+
+    del session.items[5]
+    session.items.append(Item("new", 1))
+    assert writer.save(session, changed=[session]) == 2
+    assert [x for x in encoded if isinstance(x, Item)] == [session.items[-1]]
+    res = load_delta(path)
+    assert len(res.items) == 20
+    assert res.items[-1] == Item("new", 1)
+    assert res.items[4].value == 4
+    assert res.items[5] == session.items[5]
+
+
+def test_shared_object(tmp_path):
+    path = tmp_path / "session.lmd"
+    item = Item("a", 1)
+    writer = DeltaWriter(path)
+    writer.save({"first": item, "second": item})
+    res = load_delta(path)
+    assert res["first"] is res["second"]
+
+
+def test_cycle(tmp_path):
+    session = Session([])
+    session.items.append(session)
+    with pytest.raises(ValueError, match="Cycle"):
+        DeltaWriter(tmp_path / "session.lmd").save(session)
+
+
+def test_compaction(tmp_path):
+    path = tmp_path / "session.lmd"
+    session = Session([Item(str(i), i) for i in range(50)])
+    writer = DeltaWriter(path, compact_every=3)
+    writer.save(session)
+    for i in range(4):
+        session.items[i].value = -1
+        writer.save(session)
+        assert len(read_blocks(path)) == [2, 3, 1, 2][i]
+    assert load_delta(path) == session
+
+
+def test_compaction_on_size(tmp_path):
+    path = tmp_path / "session.lmd"
+    session = Session([Item(str(i), i) for i in range(4)])
+    writer = DeltaWriter(path)
+    writer.save(session)
+    session.items = [Item(str(i), i + 1) for i in range(4)]
+    writer.save(session)
+    assert len(read_blocks(path)) == 2
+    session.items = [Item(str(i), i + 2) for i in range(4)]
+    writer.save(session)
+    assert len(read_blocks(path)) == 1
+    assert load_delta(path) == session
+
+
+def test_truncated_last_line(tmp_path):
+    path = tmp_path / "session.lmd"
+    session = Session([Item(str(i), i) for i in range(20)])
+    writer = DeltaWriter(path, fsync=False)
+    writer.save(session)
+    session.items[0].value = 10
+    writer.save(session)
+    session.items[1].value = 10
+    writer.save(session)
+    path.write_bytes(path.read_bytes()[:-3])
+    res = load_delta(path)
+    assert res.items[0].value == 10
+    assert res.items[1].value == 1
+
+
+def test_migration_on_replay(tmp_path, clean_register):
+    @register_class(version="0.0.1", migrations=[("0.0.1", rename_key("val", "value"))])
+    @dataclass
+    class Migrated:
+        value: int
+
+    class_str = class_to_str(Migrated)
+    path = tmp_path / "session.lmd"
+    node = {"__class__": class_str, "__class_version_dkt__": {class_str: "0.0.0"}, "__values__": {"val": 1}}
+    path.write_text(f'LMDELTA1\nn 0 {json.dumps(node)}\nr [{{"__node__": 0}}, {{"__node__": 0}}]\n.\n')
+    res = load_delta(path)
+    assert res == [Migrated(1), Migrated(1)]
+    assert res[0] is res[1]
+
+
+def test_not_delta_file(tmp_path):
+    path = tmp_path / "session.lmd"
+    path.write_text("[]")
+    with pytest.raises(ValueError, match="not a delta log"):
+        load_delta(path)
@@ -0,0 +1,134 @@
+import json
+from dataclasses import dataclass
+from typing import List
+
+import cbor2
+import pytest
+
+from local_migrator import (
+    REGISTER,
+    ColumnarList,
+    MigrationRegistration,
+    class_to_str,
+    make_hooks,
+    object_hook,
+    rename_key,
+)
+
+
+@dataclass
+class Item:
+    value: int
+
+    def __post_init__(self):
+        if self.value < 0:
+            raise ValueError("negative value")
+
+
+@dataclass
+class Holder:
+    item: Item
+
+
+@dataclass
+class Box:
+    items: List[Item]
+    name: str = "box"
+
+
+def _old_item(version="0.0.0"):
+    class_str = class_to_str(Item)
+    return {"__class__": class_str, "__class_version_dkt__": {class_str: version}, "__values__": {"val": 1}}
+
+
+@pytest.fixture
+def register():
+    res = MigrationRegistration()
+    res.register(Item, version="0.0.1", migrations=[("0.0.1", rename_key("val", "value"))])
+    return res
+
+
+def test_isolated_registers(register):
+    hooks = make_hooks(register)
+    other = make_hooks(MigrationRegistration())
+    text = json.dumps(_old_item())
+    assert hooks.loads(text) == Item(1)
+    assert "__error__" in other.loads(text)
+    assert hooks.encoder(Item(1))["__class_version_dkt__"] == {class_to_str(Item): "0.0.1"}
+    assert other.encoder(Item(1))["__class_version_dkt__"] == {class_to_str(Item): "0.0.0"}
+    assert Item not in REGISTER._encoder_cache
+    assert "__error__" in json.loads(text, object_hook=object_hook)
+
+
+@pytest.mark.parametrize("schema", [False, True])
+def test_roundtrip(register, schema):
+    hooks = make_hooks(register, schema=schema)
+    data = {"box": Box([Item(1), Item(2)]), "items": ColumnarList([Item(3)])}
+    text = hooks.dumps(data)
+    assert ("__schema__" in text) == schema
+    assert hooks.loads(text) == data
+    assert hooks.loads(text) == data  # cached decoders
+    assert json.loads(json.dumps(data, cls=hooks.json_encoder), object_hook=hooks.object_hook) == data
+    raw = cbor2.dumps(data, default=hooks.cbor_encoder)
+    assert cbor2.loads(raw, object_hook=hooks.cbor_decoder) == data
+
+
+def test_trusted(register):
+    class_str = class_to_str(Holder)
+    item = {**_old_item("0.0.1"), "__values__": {"value": -1}}
+    text = json.dumps(
+        {"__class__": class_str, "__class_version_dkt__": {class_str: "0.0.0"}, "__values__": {"item": item}}
+    )
+    assert make_hooks(register).loads(text)["__error__"] == "Error in fields: item"
+    res = make_hooks(register, trusted=True).loads(text)
+    assert isinstance(res, Holder)
+    assert res.item["__error__"] == "negative value"
+
+
+def test_old_layout_and_plain_dicts(register):
+    hooks = make_hooks(register)
+    assert hooks.loads('{"__values__": 1, "a": {"__error__": "x"}}') == {"__values__": 1, "a": {}}
+    assert hooks.loads(json.dumps({"__class__": class_to_str(Item), "val": 2})) == Item(2)
+
+
+@pytest.mark.parametrize("versions", [None, "0.0.1", ["0.0.1"]])
+def test_malformed_version_dkt(register, versions):
+    hooks = make_hooks(register)
+    assert hooks.loads(hooks.dumps(Item(1))) == Item(1)  # fill decoder cache
+    dkt = {"__class__": class_to_str(Item), "__values__": {"value": 1}}
+    if versions is not None:
+        dkt["__class_version_dkt__"] = versions
+    expected = object_hook(dict(dkt))
+    assert "__error__" in expected
+    assert hooks.object_hook(dict(dkt)) == expected
+
+
+def test_cache_invalidation(register):
+    hooks = make_hooks(register)
+    assert hooks.loads(json.dumps({**_old_item("0.0.1"), "__values__": {"value": 1}})) == Item(1)
+    register.register(Box, version="0.0.1", migrations=[("0.0.1", rename_key("title", "name"))])
+    class_str = class_to_str(Box)
+    text = json.dumps(
+        {
+            "__class__": class_str,
+            "__class_version_dkt__": {class_str: "0.0.0"},
+            "__values__": {"items": [], "title": "a"},
+        }
+    )
+    assert hooks.loads(text) == Box([], "a")
+    assert hooks.encoder(Box([]))["__class_version_dkt__"][class_str] == "0.0.1"
+
+
+def test_update_argument(register):
+    hooks = make_hooks(register)
+
+    @hooks.update_argument("arg")
+    def func(arg: Item):
+        return arg
+
+    assert func({"val": 3}) == Item(3)
+
+
+def test_bound_encoder_options(register):
+    with pytest.raises(ValueError, match="could not be used together"):
+        make_hooks(register).dumps(Item(1), track_references=True)
@@ -0,0 +1,24 @@
+import os
+import stat
+
+import pytest
+
+from local_migrator import dump_file, load_file
+from local_migrator._io import write_atomic
+
+
+def _mode(path):
+    return stat.S_IMODE(path.stat().st_mode)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="permissions are not supported on Windows")
+def test_write_atomic_mode(tmp_path):
+    umask = os.umask(0o022)
+    os.umask(umask)
+    path = tmp_path / "data.json"
+    dump_file([1], path)
+    assert _mode(path) == 0o666 & ~umask
+    path.chmod(0o640)
+    write_atomic(path, b"[2]")
+    assert _mode(path) == 0o640
+    assert load_file(path) == [2]
@@ -8,7 +8,7 @@ import numpy as np
 import pytest
 from pydantic import BaseModel, Extra, dataclasses
 
-from local_migrator import Encoder, class_to_str, object_hook, register_class, rename_key
+from local_migrator import ClassCollector, Encoder, class_to_str, object_hook, register_class, rename_key
 from local_migrator._serialize_hooks import add_class_info
 
 try:
@@ -188,6 +188,15 @@ def test_path_serialization(tmp_path):
     assert str(Path()) == data
 
 
+def test_encoder_function():
+    collector = ClassCollector()
+    text = json.dumps([SampleAsDict(1, 2), Path("a")], cls=Encoder, encoder=collector.encode)
+    assert collector.classes == {class_to_str(SampleAsDict)}
+    assert json.loads(text, object_hook=object_hook)[1] == "a"
+    with pytest.raises(ValueError, match="could not be used together"):
+        Encoder(encoder=collector.encode, schema=True)
+
+
 def test_error_deserialization(clean_register, tmp_path):
     class SampleEnum(Enum):
         field = 1
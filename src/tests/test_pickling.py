@@ -0,0 +1,117 @@
+import copy
+import pickle
+from dataclasses import dataclass
+from enum import Enum
+
+import pytest
+
+from local_migrator import MigrationRegistration, class_to_str, register_class, rename_key
+from local_migrator._pickling import restore_object
+
+
+@dataclass
+class PickledData:
+    field1: int
+    field2: str = "a"
+
+
+@dataclass
+class PickledContainer:
+    items: list
+    data: PickledData
+
+
+class PickledEnum(Enum):
+    first = 1
+    second = 2
+
+
+class AsDictPickled:
+    def __init__(self, value):
+        self.value = value
+
+    def as_dict(self):
+        return {"value": self.value}
+
+    def __eq__(self, other):
+        return isinstance(other, AsDictPickled) and self.value == other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+
+class PickleRaw:
+    """Produce pickle of object saved with older version of class."""
+
+    def __init__(self, *args):
+        self.args = args
+
+    def __reduce__(self):
+        return restore_object, self.args
+
+
+def test_roundtrip(clean_register):
+    register_class(PickledData, pickle_support=True)
+    register_class(PickledContainer, pickle_support=True)
+    ob = PickledContainer([1, PickledData(2)], PickledData(3, "b"))
+    assert pickle.loads(pickle.dumps(ob)) == ob
+    assert b"restore_object" in pickle.dumps(ob)
+
+
+def test_enum_and_as_dict(clean_register):
+    register_class(PickledEnum, pickle_support=True)
+    register_class(AsDictPickled, pickle_support=True)
+    assert pickle.loads(pickle.dumps(PickledEnum.second)) is PickledEnum.second
+    assert pickle.loads(pickle.dumps(AsDictPickled([1, 2]))) == AsDictPickled([1, 2])
+
+
+def test_copy(clean_register):
+    register_class(PickledData, pickle_support=True)
+    ob = PickledData(1, "b")
+    assert copy.deepcopy(ob) == ob
+    assert copy.copy(ob) == ob
+
+
+def test_migration(clean_register):
+    register_class(
+        PickledData,
+        version="0.0.1",
+        migrations=[("0.0.1", rename_key("value", "field1"))],
+        old_paths=["old_module.OldData"],
+        pickle_support=True,
+    )
+    data = pickle.dumps(PickleRaw("old_module.OldData", {"old_module.OldData": "0.0.0"}, {"value": 5}))
+    assert pickle.loads(data) == PickledData(5)
+    class_str = class_to_str(PickledData)
+    data = pickle.dumps(PickleRaw(class_str, {class_str: "0.0.1"}, {"field1": 6}))
+    assert pickle.loads(data) == PickledData(6)
+
+
+def test_restore_error(clean_register):
+    register_class(PickledData, pickle_support=True)
+    class_str = class_to_str(PickledData)
+    data = pickle.dumps(PickleRaw(class_str, {class_str: "0.0.0"}, {"value": 5}))
+    with pytest.raises(pickle.UnpicklingError, match="Could not restore"):
+        pickle.loads(data)
+    data = pickle.dumps(PickleRaw("not_existing.Class", {}, {}))
+    with pytest.raises(pickle.UnpicklingError, match="not found"):
+        pickle.loads(data)
+
+
+def test_not_supported_class(clean_register):
+    class PlainClass:
+        pass
+
+    with pytest.raises(ValueError, match="Pickle support is not available"):
+        register_class(PlainClass, pickle_support=True)
+
+
+def test_own_register_not_supported():
+    @dataclass
+    class LocalData:
+        field1: int
+
+    register = MigrationRegistration()
+    with pytest.raises(ValueError, match="only for classes registered in global REGISTER"):
+        register.register(LocalData, version="1.0.0", pickle_support=True)
+    assert LocalData.__reduce_ex__ is object.__reduce_ex__
@@ -0,0 +1,58 @@
+import json
+import sys
+import time
+from dataclasses import dataclass
+
+import cbor2
+import pytest
+
+from local_migrator import REGISTER, cbor_encoder, class_to_str, load_file
+from local_migrator._io import dumps, scan_class_paths
+
+
+@dataclass
+class SampleDataclass:
+    field1: object
+
+
+@pytest.fixture
+def slow_modules(tmp_path, monkeypatch):
+    names = ["prefetch_mod_a", "prefetch_mod_b", "prefetch_mod_c"]
+    for name in names:
+        (tmp_path / f"{name}.py").write_text(
+            "import time\nfrom dataclasses import dataclass\n\ntime.sleep(0.2)\n\n\n"
+            "@dataclass\nclass Sample:\n    value: int\n\n    @dataclass\n    class Inner:\n        value: int\n"
+        )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield names
+    for name in names:
+        sys.modules.pop(name, None)
+
+
+@pytest.mark.parametrize("format_", ["json", "cbor"])
+def test_scan_class_paths(format_):
+    long_name = "a" * 30 + ".B"
+    data = [SampleDataclass(1), {"__class__": long_name, "__values__": {}}, {"text": "__class__"}]
+    raw = dumps(data, format_) if format_ == "json" else cbor2.dumps(data, default=cbor_encoder)
+    assert scan_class_paths(raw, format_) == {class_to_str(SampleDataclass), long_name}
+
+
+def test_prefetch(slow_modules, clean_register):
+    paths = [f"{name}.Sample" for name in slow_modules] + ["prefetch_mod_a.Sample.Inner", "not_existing_mod.Class"]
+    start = time.monotonic()
+    assert REGISTER.prefetch(paths) == ["not_existing_mod.Class"]
+    assert time.monotonic() - start < 0.5
+    for path in paths[:-1]:
+        assert path in REGISTER._data_dkt
+
+
+def test_load_prefetch(slow_modules, tmp_path, clean_register):
+    data = [
+        {"__class__": f"{name}.Sample", "__class_version_dkt__": {}, "__values__": {"value": 1}}
+        for name in slow_modules
+    ]
+    (tmp_path / "data.json").write_text(json.dumps(data))
+    start = time.monotonic()
+    data = load_file(tmp_path / "data.json")
+    assert time.monotonic() - start < 0.5
+    assert [class_to_str(type(x)) for x in data] == [f"{name}.Sample" for name in slow_modules]
@@ -0,0 +1,192 @@
+import json
+from dataclasses import dataclass
+from enum import Enum
+
+import pytest
+
+from local_migrator import (
+    ColumnarList,
+    Encoder,
+    MigrationRegistration,
+    class_to_str,
+    make_hooks,
+    object_hook,
+    project,
+    register_class,
+    rename_key,
+    unnest_key,
+)
+
+
+class SampleEnum(Enum):
+    value1 = 1
+    value2 = 2
+
+
+@dataclass
+class Inner:
+    field1: int
+    field2: SampleEnum
+
+
+@dataclass
+class Outer:
+    name: str
+    version: int
+    items: list
+
+
+def to_raw(data):
+    return json.loads(json.dumps(data, cls=Encoder))
+
+
+@pytest.fixture
+def raw_data():
+    return to_raw(
+        {
+            "projects": [Outer(f"p{i}", i, [Inner(j, SampleEnum.value1) for j in range(3)]) for i in range(3)],
+            "meta": {"count": 3, "tag": "a"},
+        }
+    )
+
+
+def test_no_selection(raw_data):
+    res = project(raw_data)
+    assert res["projects"][1] == Outer("p1", 1, [Inner(j, SampleEnum.value1) for j in range(3)])
+    assert res["meta"] == {"count": 3, "tag": "a"}
+
+
+def test_paths(raw_data):
+    assert project(raw_data, paths=["projects.*.name", "projects.*.version"]) == {
+        "projects": [{"name": f"p{i}", "version": i} for i in range(3)]
+    }
+    assert project(raw_data, paths=["meta.tag", ("projects", 1, "items", -1)]) == {
+        "meta": {"tag": "a"},
+        "projects": [{"items": [Inner(2, SampleEnum.value1)]}],
+    }
+    assert project(raw_data, paths=["projects.*.items.0.field2", "projects.0", "missing"]) == {
+        "projects": [
+            Outer("p0", 0, [Inner(j, SampleEnum.value1) for j in range(3)]),
+            {"items": [{"field2": SampleEnum.value1}]},
+            {"items": [{"field2": SampleEnum.value1}]},
+        ]
+    }
+    assert project(raw_data, paths=["meta.*"]) == {"meta": {"count": 3, "tag": "a"}}
+
+
+def test_fields(raw_data):
+    res = project(raw_data, fields={Inner: ["field1"]})
+    assert res["projects"][0].items == [{"field1": j} for j in range(3)]
+    res = project(raw_data, paths=["projects.*"], fields={class_to_str(Outer): ["name"]})
+    assert res == {"projects": [{"name": f"p{i}"} for i in range(3)]}
+
+
+def test_skip_construction(raw_data, monkeypatch):
+    calls = []
+    original_init = Inner.__init__
+
+    def init(self, *args, **kwargs):
+        calls.append(1)
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(Inner, "__init__", init)
+    project(raw_data, paths=["projects.*.name"])
+    assert not calls
+    project(raw_data, paths=["projects.0.items"])
+    assert len(calls) == 3
+
+
+def test_migrated_fields(clean_register):
+    @register_class
+    @dataclass
+    class MigrateClass:
+        field: int
+        other: list
+
+    raw = to_raw([MigrateClass(1, [MigrateClass(2, [])])])
+    clean_register()
+
+    @register_class(
+        version="0.0.1", old_paths=[class_to_str(MigrateClass)], migrations=[("0.0.1", rename_key("field", "value"))]
+    )
+    @dataclass
+    class MigrateClass2:
+        value: int
+        other: list
+
+    assert project(raw, paths=["*.value"]) == [{"value": 1}]
+    assert project(raw, fields={MigrateClass2: ["value", "other"]}) == [
+        {"value": 1, "other": [{"value": 2, "other": []}]}
+    ]
+
+
+def test_migration_of_nested_object(clean_register):
+    @register_class
+    @dataclass
+    class Outer1:
+        name: str
+        inner: Inner
+
+    raw = to_raw([Outer1("n", Inner(1, SampleEnum.value2))])
+    clean_register()
+
+    @register_class(version="0.0.1", old_paths=[class_to_str(Outer1)], migrations=[("0.0.1", unnest_key("inner"))])
+    @dataclass
+    class Outer2:
+        name: str
+        field1: int
+        field2: SampleEnum
+
+    assert json.loads(json.dumps(raw), object_hook=object_hook) == [Outer2("n", 1, SampleEnum.value2)]
+    assert project(raw, paths=["*.field1", "*.name"]) == [{"name": "n", "field1": 1}]
+    assert project(raw, fields={Outer2: ["name", "field1"]}) == [{"name": "n", "field1": 1}]
+
+
+def test_columnar():
+    items = [Inner(j, SampleEnum.value2) for j in range(4)]
+    raw = to_raw({"items": ColumnarList(items), "name": "a"})
+    res = project(raw)
+    assert res == json.loads(json.dumps(raw), object_hook=object_hook)
+    assert isinstance(res["items"], ColumnarList)
+    assert res["items"] == items
+    assert project(raw, paths=["items.*.field1"]) == {"items": [{"field1": j} for j in range(4)]}
+    assert project(raw, paths=["items.1", "items.-1.field2"]) == {
+        "items": [Inner(1, SampleEnum.value2), {"field2": SampleEnum.value2}]
+    }
+    assert project(raw, fields={Inner: ["field2"]}) == {"items": [{"field2": SampleEnum.value2}] * 4, "name": "a"}
+
+
+def test_old_format():
+    raw = [{"__class__": class_to_str(Inner), "field1": 1, "field2": to_raw(SampleEnum.value2)}]
+    assert project(raw, paths=["0.field2"]) == [{"field2": SampleEnum.value2}]
+    assert project(raw) == [Inner(1, SampleEnum.value2)]
+
+
+def test_unknown_class():
+    raw = [{"__class__": "unknown_module.Class", "__class_version_dkt__": {}, "__values__": {"a": 1}}]
+    assert "__error__" in project(raw, paths=["0.a"])[0]
+    assert "__error__" in project(raw)[0]
+
+
+def test_own_register():
+    @dataclass
+    class LocalClass:
+        field: int
+
+    register = MigrationRegistration()
+    register.register(LocalClass)
+    raw = json.loads(make_hooks(register).dumps([LocalClass(1), LocalClass(2)]))
+
+    @dataclass
+    class LocalClass2:
+        value: int
+
+    register = MigrationRegistration()
+    register.register(
+        LocalClass2,
+        version="0.0.1",
+        old_paths=[class_to_str(LocalClass)],
+        migrations=[("0.0.1", rename_key("field", "value"))],
+    )
+    assert project(raw, paths=["0.value"], register=register) == [{"value": 1}]
+    assert project(raw, register=register) == [LocalClass2(1), LocalClass2(2)]
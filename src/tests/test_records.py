@@ -0,0 +1,170 @@
+import json
+from dataclasses import dataclass
+from enum import Enum
+
+import pytest
+
+from local_migrator import (
+    MigrationRegistration,
+    RecordReader,
+    RecordWriter,
+    class_to_str,
+    dump_records,
+    dump_sharded_records,
+    load_records,
+    load_sharded_records,
+    register_class,
+    rename_key,
+)
+
+
+class Kind(Enum):
+    a = 1
+    b = 2
+
+
+@dataclass
+class Row:
+    num: int
+    kind: Kind = Kind.a
+
+
+@dataclass
+class Other:
+    text: str
+
+
+def _records(count):
+    return [Row(i, Kind.b if i % 3 else Kind.a) for i in range(count)]
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".cbors"])
+def test_roundtrip(tmp_path, suffix):
+    path = tmp_path / f"records{suffix}"
+    records = [*_records(5), {"a": [Other("x")]}, 7]
+    dump_records(records, path)
+    assert load_records(path) == records
+    with RecordReader(path) as reader:
+        assert reader.classes == sorted(map(class_to_str, (Kind, Row, Other)))
+        assert reader.up_to_date
+    raw = load_records(path, hooks=False)
+    assert raw[0]["__class__"] == class_to_str(Row)
+
+
+def test_headers(tmp_path):
+    path = tmp_path / "records.jsonl"
+    dump_records([Row(1), Row(2), Other("a"), Row(3)], path)
+    lines = path.read_text().splitlines()
+    assert len(lines) == 7
+    headers = [json.loads(lines[i]) for i in (0, 1, 4)]
+    assert [x["classes"] for x in headers] == [[], sorted(map(class_to_str, (Kind, Row))), [class_to_str(Other)]]
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".cbors"])
+def test_resume(tmp_path, suffix):
+    path = tmp_path / f"records{suffix}"
+    records = [*_records(10), Other("a")]
+    with RecordWriter(path) as writer:
+        writer.extend(records[:4])
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])  # interrupted write
+    assert load_records(path) == records[:3]
+    with RecordWriter(path, resume=True) as writer:
+        assert writer.count == 3
+        writer.extend(records[writer.count :])
+    assert load_records(path) == records
+    with RecordWriter(path, resume=True) as writer:
+        assert writer.count == len(records)
+
+
+def test_not_record_stream(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text('{"a": 1}\n')
+    with pytest.raises(ValueError, match="not a record stream"):
+        load_records(path)
+    with pytest.raises(ValueError, match="not a record stream"):
+        RecordWriter(path, resume=True)
+    with pytest.raises(ValueError, match="Unknown format"):
+        RecordWriter(tmp_path / "records.json")
+
+
+def test_migration(tmp_path, clean_register):
+    @register_class(version="0.0.1", migrations=[("0.0.1", rename_key("value", "num"))])
+    @dataclass
+    class Migrated:
+        num: int
+
+    class_str = class_to_str(Migrated)
+    path = tmp_path / "records.jsonl"
+    header = {"__records__": 1, "classes": [class_str], "fingerprint": ""}
+    record = {"__class__": class_str, "__class_version_dkt__": {class_str: "0.0.0"}, "__values__": {"value": 1}}
+    path.write_text(f'{{"__records__":1,"classes":[],"fingerprint":""}}\n{json.dumps(header)}\n{json.dumps(record)}\n')
+    with RecordReader(path) as reader:
+        assert list(reader) == [Migrated(1)]
+        assert not reader.up_to_date
+
+
+@pytest.mark.parametrize("format_", ["json", "cbor"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sharded(tmp_path, format_, workers):
+    records = _records(25)
+    assert dump_sharded_records(records, tmp_path, shard_size=10, format_=format_, workers=workers) == 25
+    assert len(list(tmp_path.iterdir())) == 4
+    assert load_sharded_records(tmp_path, workers=workers) == records
+
+
+def test_sharded_resume(tmp_path):
+    records = _records(25)
+    dump_sharded_records(records, tmp_path, shard_size=10, workers=1)
+    (tmp_path / "manifest.jsonl").unlink()
+    with pytest.raises(ValueError, match="complete"):
+        load_sharded_records(tmp_path, workers=1)
+    first = tmp_path / "00000.jsonl"
+    modified = first.stat().st_mtime_ns
+    (tmp_path / "00001.jsonl").unlink()
+    records.append(Row(100))
+    assert dump_sharded_records(records, tmp_path, shard_size=10, workers=1) == 26
+    assert first.stat().st_mtime_ns == modified
+    assert load_sharded_records(tmp_path, workers=1) == records
+
+
+def _own_registers():
+    @dataclass
+    class LocalClass:
+        field: int
+
+    first = MigrationRegistration()
+    first.register(LocalClass)
+
+    @dataclass
+    class LocalClass2:
+        value: int
+
+    second = MigrationRegistration()
+    second.register(
+        LocalClass2,
+        version="0.0.1",
+        old_paths=[class_to_str(LocalClass)],
+        migrations=[("0.0.1", rename_key("field", "value"))],
+    )
+    return LocalClass, first, LocalClass2, second
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".cbors"])
+def test_own_register(tmp_path, suffix):
+    local_class, first, local_class2, second = _own_registers()
+    path = tmp_path / f"records{suffix}"
+    dump_records([local_class(1), local_class(2)], path, register=first)
+    with RecordReader(path, register=second) as reader:
+        assert not reader.up_to_date
+        assert list(reader) == [local_class2(1), local_class2(2)]
+    assert load_records(path, register=second) == [local_class2(1), local_class2(2)]
+
+
+@pytest.mark.parametrize("format_", ["json", "cbor"])
+def test_sharded_own_register(tmp_path, format_):
+    local_class, first, local_class2, second = _own_registers()
+    records = [local_class(i) for i in range(5)]
+    # local classes could not be sent to worker processes, so work is done in current process
+    assert dump_sharded_records(records, tmp_path, 2, format_=format_, workers=2, register=first) == 5
+    assert load_sharded_records(tmp_path, workers=2, register=second) == [local_class2(i) for i in range(5)]
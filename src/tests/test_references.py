@@ -0,0 +1,113 @@
+import json
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, List, Optional
+
+import cbor2
+import pytest
+
+from local_migrator import (
+    Encoder,
+    MigrationCache,
+    ReferenceResolver,
+    ReferenceTracker,
+    load_file,
+    object_hook,
+)
+
+
+class SampleEnum(Enum):
+    value1 = 1
+    value2 = 2
+
+
+@dataclass
+class Profile:
+    name: str
+    kind: SampleEnum = SampleEnum.value1
+
+
+@dataclass
+class Node:
+    name: str
+    profile: Optional[Profile] = None
+    parent: Any = None
+    children: List[Any] = field(default_factory=list)
+
+
+def test_shared_json():
+    profile = Profile("shared")
+    data = {"a": Node("a", profile), "b": [Node("b", profile), profile], "enum": [SampleEnum.value2] * 3}
+    text = json.dumps(data, cls=Encoder, track_references=True)
+    assert len(text) < len(json.dumps(data, cls=Encoder))
+    assert text.count('"shared"') == 1
+    data2 = json.loads(text, object_hook=ReferenceResolver())
+    assert data2 == data
+    assert data2["a"].profile is data2["b"][0].profile
+    assert data2["b"][1] is data2["a"].profile
+    assert data2["enum"][1] is SampleEnum.value2
+
+
+def test_shared_cbor():
+    profile = Profile("shared")
+    data = [Node("a", profile), Node("b", profile)]
+    encoded = cbor2.dumps(data, default=ReferenceTracker().cbor_encoder)
+    data2 = cbor2.loads(encoded, object_hook=ReferenceResolver().cbor_decoder)
+    assert data2 == data
+    assert data2[0].profile is data2[1].profile
+
+
+def test_cycle():
+    root = Node("root")
+    root.children = [Node("child1", parent=root), Node("child2", parent=root)]
+    root.children[0].children = [[root]]
+    with pytest.raises(ValueError, match="Circular reference"):
+        json.dumps(root, cls=Encoder)
+    text = json.dumps(root, cls=Encoder, track_references=True)
+    root2 = json.loads(text, object_hook=ReferenceResolver())
+    assert root2.name == "root"
+    assert [x.name for x in root2.children] == ["child1", "child2"]
+    assert root2.children[0].parent is root2
+    assert root2.children[1].parent is root2
+    assert root2.children[0].children[0][0] is root2
+
+
+def test_cycle_in_plain_dict():
+    root = Node("root")
+    root.children = [{"parent": root}]
+    text = json.dumps(root, cls=Encoder, track_references=True)
+    root2 = json.loads(text, object_hook=ReferenceResolver())
+    assert root2.children[0]["parent"] is root2
+
+
+def test_tracked_readable_by_object_hook():
+    profile = Profile("shared")
+    text = json.dumps([profile], cls=Encoder, track_references=True)
+    assert json.loads(text, object_hook=object_hook) == [profile]
+
+
+def test_missing_reference():
+    resolver = ReferenceResolver()
+    data = json.loads('[{"__ref__": 5}, {"a": {"__ref__": 5}}]', object_hook=resolver)
+    assert len(data) == 2
+    with pytest.raises(ValueError, match=r"not present in document: \[5\]"):
+        resolver.check()
+    resolver = ReferenceResolver()
+    json.loads(json.dumps([Profile("a")] * 2, cls=Encoder, track_references=True), object_hook=resolver)
+    resolver.check()
+
+
+@pytest.mark.parametrize("suffix", [".json", ".cbor"])
+def test_helpers_reject_references(tmp_path, suffix):
+    profile = Profile("shared")
+    path = tmp_path / f"data{suffix}"
+    if suffix == ".json":
+        path.write_text(json.dumps([profile, profile], cls=Encoder, track_references=True))
+    else:
+        path.write_bytes(cbor2.dumps([profile, profile], default=ReferenceTracker().cbor_encoder))
+    with pytest.raises(ValueError, match="ReferenceResolver"):
+        load_file(path)
+    cache = MigrationCache(tmp_path / "cache")
+    with pytest.raises(ValueError, match="ReferenceResolver"):
+        load_file(path, cache=cache)
+    assert not list((tmp_path / "cache").iterdir())
@@ -0,0 +1,161 @@
+import json
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import pytest
+from pydantic import BaseModel
+
+from local_migrator import (
+    DecodeContext,
+    Encoder,
+    class_to_str,
+    load_file,
+    object_hook,
+    project,
+    register_class,
+    rename_key,
+    schema_object_encoder,
+)
+from local_migrator._io import loads
+
+
+class Color(Enum):
+    red = 1
+    green = 2
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+@dataclass
+class Point3D(Point):
+    z: int = 0
+
+
+@dataclass
+class Shape:
+    name: str
+    center: Point
+    color: Color = Color.red
+    points: List[Point] = field(default_factory=list)
+    named: Dict[str, Point] = field(default_factory=dict)
+    path: Sequence[Point] = field(default_factory=list)
+    pair: Optional[Tuple[Point, ...]] = None
+    parent: Optional["Shape"] = None
+    extra: Any = None
+    either: Union[Point, Color, None] = None
+
+
+class Model(BaseModel):
+    shape: Shape
+    value: int = 1
+
+
+def dumps(data):
+    return json.dumps(data, cls=Encoder, schema=True)
+
+
+def test_metadata_omitted():
+    shape = Shape(
+        "a", Point(1, 2), points=[Point(3, 4)], named={"b": Point(5, 6)}, path=[Point(7, 8)], pair=(Point(9, 9),)
+    )
+    text = dumps(shape)
+    assert text.count("__class__") == 1
+    encoded = json.loads(text)
+    assert encoded["__schema__"] == 1
+    assert encoded["__values__"]["center"] == {"x": 1, "y": 2}
+    assert encoded["__values__"]["color"] == {"value": 1}
+    assert class_to_str(Point) in encoded["__class_version_dkt__"]
+    res = json.loads(text, object_hook=object_hook)
+    assert res == Shape(
+        "a", Point(1, 2), points=[Point(3, 4)], named={"b": Point(5, 6)}, path=[Point(7, 8)], pair=[Point(9, 9)]
+    )
+
+
+def test_polymorphic_fields():
+    shape = Shape("a", Point3D(1, 2, 3), extra=Point(1, 1), either=Point(2, 2), parent=Shape("p", Point(0, 0)))
+    encoded = json.loads(dumps(shape))
+    values = encoded["__values__"]
+    assert values["center"]["__class__"] == class_to_str(Point3D)
+    assert values["extra"]["__class__"] == class_to_str(Point)
+    assert values["either"]["__class__"] == class_to_str(Point)
+    assert "__class__" not in values["parent"]
+    assert "__class__" not in values["parent"]["center"]
+    assert json.loads(dumps(shape), object_hook=object_hook) == shape
+
+
+def test_not_registered_parent():
+    assert json.loads(dumps({"a": [Point(1, 2)]}), object_hook=object_hook) == {"a": [Point(1, 2)]}
+    assert json.loads(dumps(Point(1, 2))) == json.loads(json.dumps(Point(1, 2), cls=Encoder))
+
+
+def test_pydantic():
+    model = Model(shape=Shape("a", Point(1, 2)))
+    text = dumps(model)
+    assert text.count("__class__") == 1
+    assert json.loads(text, object_hook=object_hook) == model
+
+
+def test_decode_context():
+    shape = Shape("a", Point(1, 2), parent=Shape("b", Point(3, 4)))
+    assert json.loads(dumps(shape), object_hook=DecodeContext()) == shape
+
+
+def test_projection():
+    shape = Shape("a", Point(1, 2))
+    data = json.loads(dumps({"shape": shape}))
+    assert project(data) == {"shape": shape}
+
+
+def test_migration_of_omitted_class(clean_register):
+    @register_class(version="0.0.1", migrations=[("0.0.1", rename_key("a", "value"))])
+    @dataclass
+    class Inner:
+        value: int
+
+    @register_class(version="0.0.1", migrations=[("0.0.1", rename_key("old", "inner"))])
+    @dataclass
+    class Outer:
+        inner: Inner
+
+    outer_str = class_to_str(Outer)
+    inner_str = class_to_str(Inner)
+    data = {
+        "__class__": outer_str,
+        "__class_version_dkt__": {outer_str: "0.0.0", inner_str: "0.0.0"},
+        "__values__": {"old": {"a": 5}},
+        "__schema__": 1,
+    }
+    assert json.loads(json.dumps(data), object_hook=object_hook) == Outer(Inner(5))
+
+    data["__values__"]["old"] = {"b": 5}
+    res = json.loads(json.dumps(data), object_hook=object_hook)
+    assert "Could not restore" in res["__error__"]
+
+
+def test_load_file(tmp_path):
+    shape = Shape("a", Point(1, 2), points=[Point(3, 4)])
+    path = tmp_path / "shape.json"
+    path.write_text(dumps(shape))
+    assert load_file(path) == shape
+
+
+def test_not_with_references():
+    with pytest.raises(ValueError, match="could not be used together"):
+        Encoder(schema=True, track_references=True)
+
+
+def test_cbor():
+    cbor2 = pytest.importorskip("cbor2")
+    shape = Shape("a", Point(1, 2))
+    data = cbor2.dumps(shape, default=lambda encoder, value: encoder.encode(schema_object_encoder(value)))
+    assert data.count(b"__class__") == 1
+    assert load_file_bytes(data) == shape
+
+
+def load_file_bytes(data):
+    return loads(data, "cbor")
@@ -0,0 +1,102 @@
+import multiprocessing
+import pickle
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from local_migrator import SharedBlock, SharedView, class_to_str, register_class, rename_key
+
+
+@dataclass
+class Frame:
+    name: str
+    image: np.ndarray
+
+
+def _child_sum(message, queue):
+    with SharedView(message) as view:
+        queue.put(float(view.data["frames"][1].image.sum()))
+
+
+def test_roundtrip():
+    image = np.arange(100_000, dtype=np.float32).reshape(100, 1000)
+    data = {"frames": [Frame("a", image), Frame("b", image[::2])], "small": np.arange(3)}
+    with SharedBlock(data) as block:
+        assert block.nbytes >= image.nbytes * 3 // 2
+        assert len(block.message["data"]) < 1000
+        view = SharedView(pickle.loads(pickle.dumps(block.message)))
+        frames = view.data["frames"]
+        assert frames[0].name == "a"
+        assert np.array_equal(frames[0].image, image)
+        assert np.array_equal(frames[1].image, image[::2])
+        assert not frames[0].image.flags.writeable
+        assert view.data["small"] == [0, 1, 2]
+        with pytest.raises(BufferError, match="still referenced"):
+            view.close()
+        del frames
+        view.close()
+        assert view.closed
+    assert block.closed
+
+
+def test_other_process():
+    data = {"frames": [Frame("a", np.zeros(10)), Frame("b", np.ones((300, 300)))]}
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    with SharedBlock(data) as block:
+        process = context.Process(target=_child_sum, args=(block.message, queue))
+        process.start()
+        assert queue.get(timeout=60) == 90000
+        process.join(timeout=60)
+    assert process.exitcode == 0
+
+
+def test_writable_and_copy():
+    data = [np.zeros(10_000), np.zeros((100, 100), dtype=[("x", "<i4"), ("y", "<f8")])]
+    with SharedBlock(data, min_bytes=1000) as block:
+        with SharedView(block.message, writable=True) as view:
+            view.data[0][1] = 5
+            view.data = None
+        view = SharedView(block.message, copy=True)
+        assert view.closed
+        assert view.data[0][1] == 5
+        assert view.data[1].dtype == data[1].dtype
+        view.data[0][1] = 7
+        assert SharedView(block.message, copy=True).data[0][1] == 5
+
+
+def test_no_arrays():
+    block = SharedBlock({"a": np.arange(5)})
+    assert block.message["segment"] is None
+    assert block.nbytes == 0
+    block.close()
+    assert SharedView(block.message).data == {"a": [0, 1, 2, 3, 4]}
+
+
+def test_cleanup():
+    block = SharedBlock([np.ones(100_000)])
+    name = block.message["segment"]
+    del block
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_migration(clean_register):
+    @register_class(version="0.0.1", migrations=[("0.0.1", rename_key("data", "image"))])
+    @dataclass
+    class Migrated:
+        image: np.ndarray
+
+    class_str = class_to_str(Migrated)
+    with SharedBlock({"data": np.ones(100_000)}) as block:
+        text = block.message["data"].replace(
+            '{"data"',
+            f'{{"__class__":"{class_str}","__class_version_dkt__":{{"{class_str}":"0.0.0"}},"__values__":{{"data"',
+        )
+        message = {"segment": block.message["segment"], "data": text + "}"}
+        view = SharedView(message)
+        assert isinstance(view.data, Migrated)
+        assert view.data.image.sum() == 100_000
+        view.close()
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+
+import pytest
+
+from local_migrator import MigratingStore, MigrationRegistration, class_to_str, register_class, rename_key
+
+
+@dataclass
+class SampleDataclass:
+    field1: int
+    field2: str
+
+
+@pytest.fixture
+def store(tmp_path):
+    with MigratingStore(tmp_path / "store.sqlite") as store_:
+        yield store_
+
+
+def test_base_operations(store):
+    store["a"] = SampleDataclass(1, "a")
+    store.update({"b": SampleDataclass(2, "b"), "c": [1, 2, 3]})
+    assert len(store) == 3
+    assert set(store) == {"a", "b", "c"}
+    assert "a" in store
+    assert "d" not in store
+    assert store["a"] == SampleDataclass(1, "a")
+    assert store["c"] == [1, 2, 3]
+    del store["a"]
+    assert "a" not in store
+    with pytest.raises(KeyError):
+        store["a"]
+    with pytest.raises(KeyError):
+        del store["a"]
+
+
+def test_persistence(tmp_path):
+    with MigratingStore(tmp_path / "store.sqlite") as store:
+        store["a"] = SampleDataclass(1, "a")
+    with MigratingStore(tmp_path / "store.sqlite") as store:
+        assert store["a"] == SampleDataclass(1, "a")
+
+
+def test_lazy_upgrade(tmp_path, clean_register):
+    @register_class
+    @dataclass
+    class MigrateClass:
+        field: int
+
+    with MigratingStore(tmp_path / "store.sqlite") as store:
+        store.update({"a": MigrateClass(1), "b": MigrateClass(2), "c": 1})
+
+    clean_register()
+
+    @register_class(
+        version="0.0.1", old_paths=[class_to_str(MigrateClass)], migrations=[("0.0.1", rename_key("field", "field1"))]
+    )
+    @dataclass
+    class MigrateClass2:
+        field1: int
+
+    with MigratingStore(tmp_path / "store.sqlite") as store:
+        assert store.keys_below_version(MigrateClass2) == ["a", "b"]
+        assert store.keys_below_version(MigrateClass2, "0.0.0") == []
+        assert store["a"] == MigrateClass2(1)
+        assert store.keys_below_version(MigrateClass2) == ["a", "b"]
+        store.flush()
+        assert store.keys_below_version(MigrateClass2) == ["b"]
+        assert {str(x) for x in store.class_versions(MigrateClass2).values()} == {"0.0.0", "0.0.1"}
+
+    with MigratingStore(tmp_path / "store.sqlite") as store:
+        assert store["b"] == MigrateClass2(2)
+    with MigratingStore(tmp_path / "store.sqlite") as store:
+        assert store.keys_below_version(class_to_str(MigrateClass2)) == []
+
+
+def test_own_register(tmp_path):
+    @dataclass
+    class LocalClass:
+        field: int
+
+    register = MigrationRegistration()
+    register.register(LocalClass)
+    with MigratingStore(tmp_path / "store.sqlite", register=register) as store:
+        store["a"] = LocalClass(1)
+
+    @dataclass
+    class LocalClass2:
+        field1: int
+
+    register = MigrationRegistration()
+    register.register(
+        LocalClass2,
+        version="0.0.1",
+        old_paths=[class_to_str(LocalClass)],
+        migrations=[("0.0.1", rename_key("field", "field1"))],
+    )
+    with MigratingStore(tmp_path / "store.sqlite", register=register) as store:
+        assert store.keys_below_version(LocalClass2) == ["a"]
+        assert store["a"] == LocalClass2(1)
+    with MigratingStore(tmp_path / "store.sqlite", register=register) as store:
+        assert store.keys_below_version(LocalClass2) == []
+        assert store["a"] == LocalClass2(1)
+
+
+def test_wrong_table_name(tmp_path):
+    with pytest.raises(ValueError, match="Invalid table name"):
+        MigratingStore(tmp_path / "store.sqlite", table="a b")
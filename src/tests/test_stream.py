@@ -0,0 +1,129 @@
+import hashlib
+import io
+import json
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from local_migrator import (
+    CanonicalEncoder,
+    Encoder,
+    StreamingEncoder,
+    content_hash,
+    dump_stream,
+    dumps_canonical,
+    object_hook,
+)
+
+
+class SampleEnum(Enum):
+    value1 = 1
+
+
+@dataclass
+class SampleDataclass:
+    field1: int
+    field2: list
+
+
+class CountWrites(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.sizes = []
+
+    def write(self, s):
+        self.sizes.append(len(s))
+        return super().write(s)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        1,
+        "text",
+        None,
+        [],
+        {},
+        [1.5, float("nan"), float("inf"), -float("inf"), True, False, None, "ą"],
+        {"a": [1, 2, {"b": (1, 2)}], 1: 2, 1.5: 3, None: 4, False: 5},
+        [SampleDataclass(i, [SampleEnum.value1, Path("a")]) for i in range(50)],
+        {"arr": np.arange(100).reshape(25, 4), "arr1": np.arange(7, dtype=np.float32), "empty": np.zeros((0, 2))},
+        np.float64(1.5),
+        np.array(5),
+    ],
+)
+def test_same_as_encoder(data):
+    expected = json.dumps(data, cls=Encoder)
+    assert "".join(StreamingEncoder(chunk_items=3).iterencode(data)) == expected
+    f_p = io.StringIO()
+    dump_stream(data, f_p, chunk_size=10, chunk_items=3)
+    assert f_p.getvalue() == expected
+
+
+def test_options():
+    data = {"b": [1, 2], "a": "ą"}
+    encoder = StreamingEncoder(ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    assert "".join(encoder.iterencode(data)) == json.dumps(
+        data, ensure_ascii=False, separators=(",", ":"), sort_keys=True
+    )
+
+
+def test_not_serializable():
+    with pytest.raises(TypeError, match="not JSON serializable"):
+        list(StreamingEncoder().iterencode(object()))
+    with pytest.raises(TypeError, match="keys must be"):
+        list(StreamingEncoder().iterencode({(1, 2): 1}))
+
+
+def test_chunked_writes():
+    data = {"arr": np.arange(100000).reshape(10000, 10), "objects": [SampleDataclass(i, [i]) for i in range(2000)]}
+    f_p = CountWrites()
+    dump_stream(data, f_p, chunk_size=2**14, chunk_items=256)
+    assert len(f_p.sizes) > 10
+    assert max(f_p.sizes) < 2**16
+    loaded = json.loads(f_p.getvalue(), object_hook=object_hook)
+    assert loaded["arr"] == data["arr"].tolist()
+    assert loaded["objects"] == data["objects"]
+
+
+class TestCanonical:
+    def test_key_order(self):
+        assert dumps_canonical({"b": 1, "a": {"d": 2, "c": 3}}) == dumps_canonical({"a": {"c": 3, "d": 2}, "b": 1})
+        assert dumps_canonical({"b": 1, "a": [1, 2]}) == '{"a":[1,2],"b":1}'
+        assert dumps_canonical({1: "a", "0": "b"}) == '{"0":"b","1":"a"}'
+
+    def test_numbers(self):
+        assert (
+            dumps_canonical([1.0, -0.0, 1.5, 1e300, 2**60 * 1.0, np.float32(2)])
+            == "[1,0,1.5,1e+300,1.152921504606847e+18,2]"
+        )
+        assert dumps_canonical(np.array([1.0, 2.5])) == "[1,2.5]"
+        assert dumps_canonical([np.float64(1.0), 2, "a"]) == dumps_canonical([1, 2.0, "a"]) == '[1,2,"a"]'
+        assert dumps_canonical([-0.0, 10.0, True, None]) == "[0,10,true,null]"
+        assert dumps_canonical({"a": 1.0}) == dumps_canonical({"a": 1})
+
+    def test_version_dkt_order(self):
+        data = SampleDataclass(1, [SampleEnum.value1])
+        text = dumps_canonical(data)
+        assert json.loads(text, object_hook=object_hook) == data
+        encoded = json.loads(json.dumps(data, cls=Encoder))
+        encoded["__class_version_dkt__"] = dict(reversed(encoded["__class_version_dkt__"].items()))
+        assert dumps_canonical(encoded) == text
+
+    def test_chunks(self):
+        data = [SampleDataclass(i, list(range(i))) for i in range(30)]
+        assert "".join(CanonicalEncoder(chunk_items=4).iterencode(data)) == dumps_canonical(data)
+
+    def test_content_hash(self):
+        data = {"objects": [SampleDataclass(i, [float(i)]) for i in range(100)], "arr": np.arange(10)}
+        digest = content_hash(data, chunk_size=100)
+        assert digest == hashlib.sha256(dumps_canonical(data).encode("utf-8")).hexdigest()
+        assert digest == content_hash(
+            {"arr": list(range(10)), "objects": [SampleDataclass(i, [i]) for i in range(100)]}
+        )
+        assert digest != content_hash({"arr": list(range(10)), "objects": []})
+        expected = hashlib.sha1(dumps_canonical(data).encode("utf-8")).hexdigest()  # noqa: S324
+        assert content_hash(data, algorithm="sha1") == expected
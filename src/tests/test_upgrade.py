@@ -0,0 +1,124 @@
+import json
+from dataclasses import dataclass
+
+import cbor2
+import pytest
+
+from local_migrator import Encoder, class_to_str, dump_file, load_file, register_class, rename_key
+from local_migrator.__main__ import main
+from local_migrator._upgrade import find_files, upgrade_paths
+
+
+@dataclass
+class SampleDataclass:
+    field1: int
+
+
+@pytest.fixture
+def old_files(tmp_path, clean_register):
+    @register_class
+    @dataclass
+    class MigrateClass:
+        field: int
+
+    (tmp_path / "sub").mkdir()
+    data = [MigrateClass(1), MigrateClass(2), SampleDataclass(3)]
+    dump_file(data, tmp_path / "data.json")
+    dump_file(data, tmp_path / "sub" / "data.cbor")
+    dump_file([SampleDataclass(3)], tmp_path / "current.json")
+    (tmp_path / "other.txt").write_text("text")
+
+    clean_register()
+
+    @register_class(
+        version="0.0.1", old_paths=[class_to_str(MigrateClass)], migrations=[("0.0.1", rename_key("field", "field1"))]
+    )
+    @dataclass
+    class MigrateClass2:
+        field1: int
+
+    return tmp_path, MigrateClass2
+
+
+def test_find_files(old_files):
+    tmp_path, _ = old_files
+    assert find_files([tmp_path]) == [tmp_path / "current.json", tmp_path / "data.json", tmp_path / "sub" / "data.cbor"]
+    with pytest.raises(ValueError, match="Unknown format"):
+        find_files([tmp_path / "other.txt"])
+
+
+def test_dry_run(old_files):
+    tmp_path, _ = old_files
+    text = (tmp_path / "data.json").read_text()
+    reports = list(upgrade_paths([tmp_path], dry_run=True, workers=1))
+    assert [x.outdated for x in reports] == [False, True, True]
+    assert not any(x.upgraded for x in reports)
+    assert reports[1].classes == {"test_upgrade.old_files.<locals>.MigrateClass": 2}
+    assert list(reports[1].migrations.values()) == [2]
+    assert (tmp_path / "data.json").read_text() == text
+
+
+def test_upgrade(old_files):
+    tmp_path, migrate_class = old_files
+    reports = list(upgrade_paths([tmp_path], workers=1))
+    assert [x.upgraded for x in reports] == [False, True, True]
+    with (tmp_path / "data.json").open() as f_p:
+        raw = json.load(f_p)
+    assert raw[0]["__class__"] == class_to_str(migrate_class)
+    assert raw[0]["__values__"] == {"field1": 1}
+    with (tmp_path / "sub" / "data.cbor").open("rb") as f_p:
+        raw = cbor2.load(f_p)
+    assert raw[1]["__values__"] == {"field1": 2}
+    assert load_file(tmp_path / "data.json") == [migrate_class(1), migrate_class(2), SampleDataclass(3)]
+    assert not any(x.outdated for x in upgrade_paths([tmp_path], dry_run=True, workers=1))
+
+
+def test_upgrade_error(tmp_path):
+    (tmp_path / "data.json").write_text(
+        json.dumps({"__class__": "nme_not.not_package.NotClass", "__values__": {}}, cls=Encoder)
+    )
+    (report,) = upgrade_paths([tmp_path / "data.json"], workers=1)
+    assert report.error is not None
+    assert not report.upgraded
+
+
+def test_upgrade_references(tmp_path, clean_register):
+    @register_class
+    @dataclass
+    class MigrateClass:
+        field: int
+
+    item = MigrateClass(1)
+    (tmp_path / "data.json").write_text(json.dumps([item, item], cls=Encoder, track_references=True))
+    text = (tmp_path / "data.json").read_text()
+    clean_register()
+
+    @register_class(
+        version="0.0.1", old_paths=[class_to_str(MigrateClass)], migrations=[("0.0.1", rename_key("field", "field1"))]
+    )
+    @dataclass
+    class MigrateClass2:
+        field1: int
+
+    (report,) = upgrade_paths([tmp_path / "data.json"], workers=1)
+    assert "ReferenceResolver" in report.error
+    assert not report.upgraded
+    assert (tmp_path / "data.json").read_text() == text
+
+
+def test_process_pool(tmp_path):
+    dump_file([SampleDataclass(1)], tmp_path / "data1.json")
+    dump_file([SampleDataclass(2)], tmp_path / "data2.json")
+    reports = list(upgrade_paths([tmp_path], dry_run=True, workers=2))
+    assert [x.path.name for x in reports] == ["data1.json", "data2.json"]
+    assert not any(x.outdated or x.error for x in reports)
+
+
+def test_cli(old_files, capsys):
+    tmp_path, _ = old_files
+    assert main(["upgrade", "--dry-run", "--workers", "1", str(tmp_path)]) == 0
+    captured = capsys.readouterr()
+    assert "current.json: up to date" in captured.out
+    assert "data.json: needs upgrade" in captured.out
+    assert main(["upgrade", "--workers", "1", "--import", "json", str(tmp_path / "data.json")]) == 0
+    assert "data.json: upgraded" in capsys.readouterr().out